@@ -4,6 +4,11 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from limiter import limiter
 from routes.generate import router as generate_router
+from routes.gif_jobs import router as gif_jobs_router
+from routes.metrics import router as metrics_router
+from services.render_pool import render_pool
+from services.gif_jobs import gif_jobs
+from contextlib import asynccontextmanager
 import sys
 import asyncio
 
@@ -11,10 +16,24 @@ import asyncio
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the GIF render pool so the first /generate-gif doesn't pay the browser launch
+    try:
+        await render_pool.start()
+    except Exception as e:
+        print(f"Render pool failed to start, will retry on first GIF request: {e}")
+    yield
+    await gif_jobs.shutdown()
+    await render_pool.shutdown()
+
+
 app = FastAPI(
     title="AI HTML Animation Generator",
     description="Generate animated HTML content from text descriptions using Google Gemini",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Connect limiter to app
@@ -32,6 +51,8 @@ app.add_middleware(
 
 # Include routes
 app.include_router(generate_router)
+app.include_router(gif_jobs_router)
+app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -1,27 +1,97 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Literal
 import os
-from services.groq_service import generate_animation
-from services.gif_service import generate_gif_from_html
+import json
+import time
+from services.groq_service import generate_animation_async, stream_animation, DEFAULT_MODEL, PROMPT_TEMPLATE_VERSION
+from services.gif_service import get_or_generate_gif
+from services.animation_encoders import OUTPUT_FORMATS, available_formats
 from services.sanitizer import sanitize_html
+from services.prompt_cache import prompt_cache
+from services.prompt_text import normalize_prompt
+from services.single_flight import SingleFlight
+from services.batch_generation import generate_batch, rate_limiter_for, BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY, BATCH_MAX_PROMPTS
+from services.llm_providers import LLM_PROVIDER
+from services import metrics
 from limiter import limiter
 
 router = APIRouter()
 
+# Identical generations in flight at the same time run once (see generate_shared)
+_generation_flight = SingleFlight()
+
 
 class AnimationRequest(BaseModel):
     prompt: str
+    fresh: bool = False  # Skip the prompt cache and always generate a new variation
 
 
 class AnimationResponse(BaseModel):
     generated_html: str
 
 
-class GifRequest(BaseModel):
+class ClipRect(BaseModel):
+    """Region of the 600x400 viewport to capture, in CSS pixels."""
+    x: int = Field(ge=0, lt=600)
+    y: int = Field(ge=0, lt=400)
+    width: int = Field(gt=0, le=600)
+    height: int = Field(gt=0, le=400)
+
+
+class GifOptions(BaseModel):
+    palette_mode: Literal["adaptive", "global", "global_dither"] = "global"
+    format: Literal["gif", "webp", "apng", "mp4", "webm"] = "gif"
+    # Left unset, both are detected from the animation (loop length, lowest smooth fps)
+    duration: float | None = Field(default=None, gt=0, le=30)
+    fps: int | None = Field(default=None, ge=1, le=60)
+    # Output size relative to the captured region (0.5 = half-size thumbnail)
+    scale: float = Field(default=1.0, gt=0, le=1)
+    # Device pixels per CSS pixel: 2 renders text and shapes at retina sharpness
+    device_scale_factor: float = Field(default=1.0, ge=1, le=3)
+    clip: ClipRect | None = None
+    # Capture only the area the animation moves in (detected by a probe pass); ignored with clip
+    auto_crop: bool = False
+
+    def capture_options(self) -> dict:
+        """Keyword arguments for get_or_generate_gif that select which pixels are captured."""
+        return {
+            "scale": self.scale,
+            "device_scale_factor": self.device_scale_factor,
+            "clip": self.clip.model_dump() if self.clip else None,
+            "auto_crop": self.auto_crop,
+        }
+
+    def render_options(self) -> dict:
+        """Every keyword argument for get_or_generate_gif except the HTML."""
+        return {
+            "duration": self.duration,
+            "fps": self.fps,
+            "palette_mode": self.palette_mode,
+            "output_format": self.format,
+            **self.capture_options(),
+        }
+
+
+class GifRequest(GifOptions):
     html: str
 
 
+class BatchRequest(BaseModel):
+    prompts: list[str] = Field(min_length=1, max_length=BATCH_MAX_PROMPTS)
+    fresh: bool = False
+    concurrency: int = Field(default=BATCH_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY)
+    # Also render each animation (through the /gif-jobs queue) with these options
+    gif: GifOptions | None = None
+
+
+def check_output_format(output_format: str):
+    """Video formats need PyAV or ffmpeg on the server; reject them up front when missing."""
+    if output_format not in available_formats():
+        raise HTTPException(status_code=400, detail=f"Format '{output_format}' is not available on this server")
+
+
 def cleanup_file(path: str):
     """Remove temporary file."""
     try:
@@ -31,6 +101,25 @@ def cleanup_file(path: str):
         print(f"Error removing file {path}: {e}")
 
 
+async def generate_shared(prompt: str, coalesce: bool = True) -> str:
+    """
+    Generates and caches the animation for a prompt. Requests whose prompts normalize alike
+    (see normalize_prompt) and arrive while a generation for it is in flight wait for that one
+    instead of starting their own, unless `coalesce` is off (fresh requests want a new variation).
+    """
+    async def generate():
+        generated_html = await generate_animation_async(prompt)
+        prompt_cache.put(prompt, DEFAULT_MODEL, PROMPT_TEMPLATE_VERSION, generated_html)
+        return generated_html
+
+    if not coalesce:
+        return await generate()
+    key = f"{DEFAULT_MODEL}\n{normalize_prompt(prompt)}"
+    if _generation_flight.in_flight(key):
+        metrics.LLM_COALESCED_REQUESTS.inc()
+    return await _generation_flight.do(key, generate)
+
+
 @router.post("/generate-animation", response_model=AnimationResponse)
 @limiter.limit("10/minute")
 async def generate_animation_endpoint(request: Request, body: AnimationRequest):
@@ -39,8 +128,14 @@ async def generate_animation_endpoint(request: Request, body: AnimationRequest):
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
 
     try:
+        prompt = body.prompt.strip()
+        cached_html = None if body.fresh else prompt_cache.get(prompt, DEFAULT_MODEL, PROMPT_TEMPLATE_VERSION)
+        if cached_html:
+            print(f"Prompt cache hit for: {prompt[:50]}...")
+            return AnimationResponse(generated_html=sanitize_html(cached_html))
+
         print(f"Generating animation with Groq for prompt: {body.prompt[:50]}...")
-        generated_html = generate_animation(body.prompt.strip())
+        generated_html = await generate_shared(prompt, coalesce=not body.fresh)
         
         # Sanitize HTML
         safe_html = sanitize_html(generated_html)
@@ -55,26 +150,106 @@ async def generate_animation_endpoint(request: Request, body: AnimationRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate-animation/stream")
+@limiter.limit("10/minute")
+async def generate_animation_stream_endpoint(request: Request, body: AnimationRequest):
+    """Stream progress and generated HTML as server-sent events, ending with the validated document."""
+    if not body.prompt or not body.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    prompt = body.prompt.strip()
+
+    async def events():
+        try:
+            cached_html = None if body.fresh else prompt_cache.get(prompt, DEFAULT_MODEL, PROMPT_TEMPLATE_VERSION)
+            if cached_html:
+                print(f"Prompt cache hit for: {prompt[:50]}...")
+                yield sse_event("progress", {"message": "Served from cache"})
+                yield sse_event("done", {"generated_html": sanitize_html(cached_html)})
+                return
+
+            print(f"Streaming animation with Groq for prompt: {body.prompt[:50]}...")
+            async for event, data in stream_animation(prompt):
+                if event == "token":
+                    yield sse_event("token", {"text": data})
+                elif event == "done":
+                    prompt_cache.put(prompt, DEFAULT_MODEL, PROMPT_TEMPLATE_VERSION, data)
+                    yield sse_event("done", {"generated_html": sanitize_html(data)})
+                    print("Streamed animation generated and sanitized successfully.")
+                else:
+                    yield sse_event(event, {"message": data})
+        except Exception as e:
+            print(f"Streaming Generation Error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/generate-animation/batch")
+@limiter.limit("5/minute")
+async def generate_animation_batch_endpoint(request: Request, body: BatchRequest):
+    """
+    Generate many animations, streaming one NDJSON line per prompt as each completes (in
+    completion order; "index" is the prompt's position), then a final {"summary": ...} line.
+    """
+    prompts = [prompt.strip() for prompt in body.prompts]
+    if not all(prompts):
+        raise HTTPException(status_code=400, detail="Prompts cannot be empty")
+    if body.gif:
+        check_output_format(body.gif.format)
+
+    async def generate(prompt: str) -> str:
+        cached_html = None if body.fresh else prompt_cache.get(prompt, DEFAULT_MODEL, PROMPT_TEMPLATE_VERSION)
+        generated_html = cached_html or await generate_shared(prompt, coalesce=not body.fresh)
+        return sanitize_html(generated_html)
+
+    async def lines():
+        started = time.perf_counter()
+        succeeded = 0
+        async for result in generate_batch(prompts, generate, body.concurrency, rate_limiter_for(LLM_PROVIDER),
+                                           body.gif.render_options() if body.gif else None):
+            succeeded += result["status"] == "ok"
+            yield json.dumps(result) + "\n"
+        summary = {"prompts": len(prompts), "succeeded": succeeded, "failed": len(prompts) - succeeded,
+                   "seconds": round(time.perf_counter() - started, 3)}
+        print(f"Batch of {len(prompts)} prompts finished: {succeeded} succeeded in {summary['seconds']}s")
+        yield json.dumps({"summary": summary}) + "\n"
+
+    print(f"Starting batch of {len(prompts)} prompts ({body.concurrency} concurrent)...")
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+
 @router.post("/generate-gif")
 @limiter.limit("5/minute")
 async def generate_gif_endpoint(request: Request, body: GifRequest, background_tasks: BackgroundTasks):
     """Generate a GIF from HTML content."""
     if not body.html or not body.html.strip():
         raise HTTPException(status_code=400, detail="HTML content cannot be empty")
+    check_output_format(body.format)
 
     try:
-        print("Starting deterministic GIF generation...")
-        # Now synchronous call -> Migrated to ASYNC
-        gif_path = await generate_gif_from_html(body.html)
-        print(f"GIF generated at: {gif_path}")
-        
-        # Schedule file cleanup after response is sent
+        print(f"Starting deterministic {body.format.upper()} generation...")
+        gif_path, cache_status = await get_or_generate_gif(body.html, **body.render_options())
+        print(f"GIF ready at: {gif_path} (cache {cache_status})")
+
+        # Our own file (cached renders come pinned), removed once it has been sent
         background_tasks.add_task(cleanup_file, gif_path)
-        
+
+        output = OUTPUT_FORMATS[body.format]
         return FileResponse(
             path=gif_path,
-            media_type="image/gif",
-            filename="animation.gif"
+            media_type=output["media_type"],
+            filename="animation" + output["extension"],
+            headers={"X-Cache": cache_status},
         )
     except Exception as e:
         print(f"GIF Generation Critical Error: {e}")
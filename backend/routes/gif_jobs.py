@@ -0,0 +1,74 @@
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import Field
+from routes.generate import GifRequest, check_output_format
+from services.gif_jobs import gif_jobs, JobQueueFull
+from services.animation_encoders import OUTPUT_FORMATS
+from limiter import limiter
+
+router = APIRouter()
+
+
+class GifJobRequest(GifRequest):
+    priority: int = Field(default=5, ge=0, le=9)  # 0 runs first
+
+
+def job_status(job) -> dict:
+    status = job.to_dict()
+    status["queued_ahead"] = gif_jobs.queued_ahead(job)
+    return status
+
+
+@router.post("/gif-jobs", status_code=202)
+@limiter.limit("30/minute")
+async def create_gif_job(request: Request, body: GifJobRequest):
+    """Queue a GIF render and return immediately; poll the returned status URL."""
+    if not body.html or not body.html.strip():
+        raise HTTPException(status_code=400, detail="HTML content cannot be empty")
+    check_output_format(body.format)
+
+    try:
+        params = {"html_content": body.html, **body.render_options()}
+        job = gif_jobs.submit(params, priority=body.priority)
+    except JobQueueFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e)},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    print(f"Queued GIF job {job.id} (priority {job.priority})")
+    return dict(job_status(job), status_url=f"/gif-jobs/{job.id}", result_url=f"/gif-jobs/{job.id}/result")
+
+
+@router.get("/gif-jobs/{job_id}")
+async def get_gif_job(job_id: str):
+    """Status and progress (frames captured) of a GIF job."""
+    job = gif_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="GIF job not found")
+    return job_status(job)
+
+
+@router.get("/gif-jobs/{job_id}/result")
+async def get_gif_job_result(job_id: str):
+    """The finished GIF; 409 while the job is still queued or running, 410 once its file is gone."""
+    job = gif_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="GIF job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"GIF generation failed: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"GIF job is {job.status}")
+    # The job owns its result for GIF_JOB_RESULT_TTL, but the temp directory may have been cleaned
+    if not os.path.exists(job.result_path):
+        raise HTTPException(status_code=410, detail="GIF job result has expired, submit the job again")
+
+    output = OUTPUT_FORMATS[job.params.get("output_format", "gif")]
+    return FileResponse(
+        path=job.result_path,
+        media_type=output["media_type"],
+        filename="animation" + output["extension"],
+        headers={"X-Cache": job.cache_status},
+    )
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services.metrics import registry, CONTENT_TYPE
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Counters and histograms for generation and rendering, in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,126 @@
+import io
+import os
+import time
+import tempfile
+import argparse
+from PIL import Image, ImageDraw
+
+# Per-frame capture cost: the old PNG-on-disk round trip vs the in-memory paths.
+#
+#   python scripts/benchmark_capture.py            # real Chromium (needs `playwright install chromium`)
+#   python scripts/benchmark_capture.py --offline  # host-side cost only, on synthetic PNG frames
+
+BENCH_HTML = """
+<!DOCTYPE html>
+<html>
+<body style="margin:0; overflow:hidden; background:linear-gradient(45deg,#1e3a8a,#9333ea);">
+<div id="box" style="width:80px;height:80px;background:#f43f5e;border-radius:50%;position:absolute;top:160px;left:0;"></div>
+<script>
+let x = 0;
+function animate() {
+    requestAnimationFrame(animate);
+    x = (x + 5) % 600;
+    document.getElementById('box').style.left = x + 'px';
+}
+animate();
+</script>
+</body>
+</html>
+"""
+
+
+def _timed(label: str, frames: int, capture) -> tuple[str, float]:
+    started = time.perf_counter()
+    for i in range(frames):
+        capture(i)
+    return label, (time.perf_counter() - started) * 1000 / frames
+
+
+def bench_browser(frames: int, width: int, height: int) -> list[tuple[str, float]]:
+    from playwright.sync_api import sync_playwright
+    from generate_gif_standalone import TIME_HIJACK_SCRIPT, FrameGrabber
+
+    results = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        page = browser.new_page(viewport={"width": width, "height": height})
+        page.add_init_script(TIME_HIJACK_SCRIPT)
+        page.set_content(BENCH_HTML, wait_until="load")
+
+        def advance():
+            page.evaluate("window.advanceTime(33.333)")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            def disk(i):
+                advance()
+                path = os.path.join(temp_dir, f"frame_{i:03d}.png")
+                page.screenshot(path=path, type="png")
+                with Image.open(path) as img:
+                    img.copy().convert("RGB")
+
+            results.append(_timed("screenshot -> disk -> PIL (old)", frames, disk))
+
+        def memory(i):
+            advance()
+            with Image.open(io.BytesIO(page.screenshot(type="png"))) as img:
+                img.convert("RGB")
+
+        results.append(_timed("page.screenshot bytes -> PIL", frames, memory))
+
+        grabber = FrameGrabber(page)
+
+        def cdp(i):
+            advance()
+            grabber.grab()
+
+        results.append(_timed("CDP captureScreenshot (optimizeForSpeed) -> PIL", frames, cdp))
+        browser.close()
+    return results
+
+
+def bench_offline(frames: int, width: int, height: int) -> list[tuple[str, float]]:
+    # Pre-encode synthetic frames so only the host-side handling is measured
+    pngs = []
+    for i in range(frames):
+        img = Image.new("RGB", (width, height), (30, 58, 138))
+        ImageDraw.Draw(img).ellipse((i * 5 % width, 160, i * 5 % width + 80, 240), fill=(244, 63, 94))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        pngs.append(buf.getvalue())
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def disk(i):
+            path = os.path.join(temp_dir, f"frame_{i:03d}.png")
+            with open(path, "wb") as f:
+                f.write(pngs[i])
+            with Image.open(path) as img:
+                img.copy().convert("RGB")
+
+        results.append(_timed("write PNG -> reopen -> copy -> RGB (old)", frames, disk))
+
+    def memory(i):
+        with Image.open(io.BytesIO(pngs[i])) as img:
+            img.convert("RGB")
+
+    results.append(_timed("PNG bytes -> RGB (in-memory)", frames, memory))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-frame capture cost")
+    parser.add_argument("--frames", type=int, default=90)
+    parser.add_argument("--width", type=int, default=600)
+    parser.add_argument("--height", type=int, default=400)
+    parser.add_argument("--offline", action="store_true", help="Skip the browser and time host-side frame handling only")
+
+    args = parser.parse_args()
+
+    if args.offline:
+        rows = bench_offline(args.frames, args.width, args.height)
+    else:
+        rows = bench_browser(args.frames, args.width, args.height)
+
+    print(f"{args.frames} frames at {args.width}x{args.height}")
+    for label, ms in rows:
+        print(f"  {label:<50} {ms:8.2f} ms/frame")
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+from PIL import Image, ImageDraw
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.animation_encoders import available_formats, make_encoder
+from services.animation_examples import EXAMPLES
+
+# Encode time and file size per output format on the bundled examples.
+# Frames are captured once per example and then fed to every encoder.
+#
+#   python scripts/benchmark_formats.py                       # real Chromium (needs `playwright install chromium`)
+#   python scripts/benchmark_formats.py --examples gradient neon particles
+#   python scripts/benchmark_formats.py --offline             # synthetic gradient frames, no browser
+
+DEFAULT_EXAMPLES = ["gradient", "neon", "particles", "bouncing", "rotating"]
+
+
+def capture_examples(names: list[str], width: int, height: int, duration: int, fps: int) -> dict[str, list[Image.Image]]:
+    from playwright.sync_api import sync_playwright
+    from generate_gif_standalone import open_render_page, capture_frames
+    from services.vendor_libs import LibraryStore
+
+    captured = {}
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        context = browser.new_context()
+        context.route("**/*", LibraryStore().handle)
+        for name in names:
+            html = EXAMPLES[name].split("Complete Code:", 1)[1].strip()
+            with open_render_page(context, html, width, height) as page:
+                captured[name] = list(capture_frames(page, fps, 0, duration * fps))
+        browser.close()
+    return captured
+
+
+def synthetic_frames(width: int, height: int, duration: int, fps: int) -> dict[str, list[Image.Image]]:
+    # A drifting full-frame gradient with a moving shape: the worst case for 256-color GIF
+    frames = []
+    for i in range(duration * fps):
+        shift = i * 4
+        img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+        r, g, b = img.split()
+        img = Image.merge("RGB", (r.point(lambda v: (v + shift) % 256), g.point(lambda v: 255 - v), b))
+        x = shift % width
+        ImageDraw.Draw(img).ellipse((x, height // 3, x + 60, height // 3 + 60), fill=(255, 255, 255))
+        frames.append(img)
+    return {"synthetic_gradient": frames}
+
+
+def bench(frames: list[Image.Image], output_format: str, fps: int) -> tuple[float, int]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "out")
+        started = time.perf_counter()
+        with make_encoder(output_format, path, 1000.0 / fps) as encoder:
+            for frame in frames:
+                encoder.add_frame(frame)
+        elapsed = time.perf_counter() - started
+        return elapsed, os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark encode time and file size per output format")
+    parser.add_argument("--examples", nargs="+", default=DEFAULT_EXAMPLES, choices=list(EXAMPLES))
+    parser.add_argument("--formats", nargs="+", default=available_formats(), choices=available_formats())
+    parser.add_argument("--width", type=int, default=600)
+    parser.add_argument("--height", type=int, default=400)
+    parser.add_argument("--duration", type=int, default=3)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--offline", action="store_true", help="Use synthetic frames instead of rendering the examples")
+
+    args = parser.parse_args()
+
+    if args.offline:
+        inputs = synthetic_frames(args.width, args.height, args.duration, args.fps)
+    else:
+        inputs = capture_examples(args.examples, args.width, args.height, args.duration, args.fps)
+
+    print(f"{args.duration}s at {args.fps}fps, {args.width}x{args.height}")
+    print(f"  {'animation':<20} {'format':<6} {'encode':>10} {'size':>10}")
+    for name, frames in inputs.items():
+        for output_format in args.formats:
+            elapsed, size = bench(frames, output_format, args.fps)
+            print(f"  {name:<20} {output_format:<6} {elapsed * 1000:8.0f}ms {size / 1024:8.0f}KB")
@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+import timeit
+import argparse
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.html_scanner import scan_html
+from services.animation_examples import EXAMPLES
+
+# Micro-benchmark: single-pass scan_html against the regex-per-check cleaning and validation it
+# replaced (copied below as they were), on model-shaped responses built from the bundled examples.
+#
+#   python scripts/benchmark_html_scanner.py
+#   python scripts/benchmark_html_scanner.py --sizes 2 8 30 --number 500
+
+DEFAULT_SIZES_KB = [2, 8, 30]
+
+_WRAPPER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Animation</title>
+    <style>
+        body {{ margin: 0; padding: 0; overflow: hidden; }}
+    </style>
+</head>
+<body>
+{cleaned}
+</body>
+</html>"""
+
+
+def legacy_clean_html_response(raw_response: str) -> str:
+    cleaned = raw_response.strip()
+    cleaned = re.sub(r'^```(?:html)?\s*\n?', '', cleaned, flags=re.MULTILINE)
+    cleaned = re.sub(r'\n?```\s*$', '', cleaned, flags=re.MULTILINE)
+    doctype_match = re.search(r'<!DOCTYPE\s+html', cleaned, re.IGNORECASE)
+    html_match = re.search(r'<html(?:\s|>)', cleaned, re.IGNORECASE)
+    start_match = doctype_match or html_match
+    if start_match:
+        cleaned = cleaned[start_match.start():]
+    html_end_match = re.search(r'</html\s*>', cleaned, re.IGNORECASE)
+    if html_end_match:
+        cleaned = cleaned[:html_end_match.end()]
+    cleaned = cleaned.strip()
+    if '<html' not in cleaned.lower() and '<body' not in cleaned.lower():
+        cleaned = _WRAPPER.format(cleaned=cleaned)
+    return cleaned
+
+
+def legacy_validate_html_structure(html_code: str) -> tuple[bool, str]:
+    if not html_code or not html_code.strip():
+        return False, "Empty HTML code"
+    html_lower = html_code.lower()
+    required_elements = [
+        ('<!doctype html', 'Missing DOCTYPE declaration'),
+        ('<html', 'Missing <html> tag'),
+        ('<head', 'Missing <head> tag'),
+        ('<body', 'Missing <body> tag'),
+        ('</html>', 'Missing closing </html> tag'),
+    ]
+    for element, error_msg in required_elements:
+        if element not in html_lower:
+            return False, error_msg
+    if len(html_code) < 300:
+        return False, "Generated HTML is too short (possible truncation)"
+    placeholder_patterns = [
+        r'//\s*add.*code',
+        r'//\s*todo',
+        r'//\s*implement',
+        r'/\*\s*add.*\*/',
+        r'//\s*your.*code.*here',
+        r'//\s*placeholder',
+    ]
+    for pattern in placeholder_patterns:
+        if re.search(pattern, html_code, re.IGNORECASE):
+            return False, "Generated code contains placeholder comments"
+    return True, ""
+
+
+def legacy(raw_response: str) -> tuple[str, bool, str]:
+    cleaned = legacy_clean_html_response(raw_response)
+    return (cleaned, *legacy_validate_html_structure(cleaned))
+
+
+def single_pass(raw_response: str) -> tuple[str, bool, str]:
+    scan = scan_html(raw_response)
+    return scan.html, scan.valid, scan.error
+
+
+def model_response(size_kb: int) -> str:
+    """A fenced, chatty response whose document is padded to about `size_kb` with example code."""
+    html = EXAMPLES["particles"].split("Complete Code:", 1)[1].strip()
+    head, tail = html.rsplit("</body>", 1)
+    filler = "\n".join(f"    <div class=\"p{i}\" style=\"left:{i % 600}px;top:{i % 400}px\"></div>" for i in range(size_kb * 20))
+    document = f"{head}{filler[:max(0, size_kb * 1024 - len(html))]}\n</body>{tail}"
+    return f"Here is your animation:\n\n```html\n{document}\n```\n\nEnjoy! Let me know if you want changes."
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark single-pass HTML scanning against the legacy regex checks")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES_KB, help="Response sizes in KB")
+    parser.add_argument("--number", type=int, default=200, help="Calls per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per case (the best is reported)")
+
+    args = parser.parse_args()
+
+    print(f"best of {args.repeat} x {args.number} calls")
+    print(f"  {'size':>6} {'legacy':>10} {'scan_html':>10} {'speedup':>8}  same result")
+    for size_kb in args.sizes:
+        raw = model_response(size_kb)
+        legacy_time = min(timeit.repeat(lambda: legacy(raw), number=args.number, repeat=args.repeat)) / args.number
+        scan_time = min(timeit.repeat(lambda: single_pass(raw), number=args.number, repeat=args.repeat)) / args.number
+        same = legacy(raw) == single_pass(raw)
+        print(f"  {len(raw) / 1024:5.0f}K {legacy_time * 1e6:8.0f}us {scan_time * 1e6:8.0f}us {legacy_time / scan_time:7.1f}x  {same}")
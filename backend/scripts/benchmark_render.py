@@ -0,0 +1,385 @@
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import tempfile
+import platform
+import argparse
+import resource
+import threading
+import statistics
+from PIL import Image, ImageDraw
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.gif_encoder import BackgroundEncoder, PALETTE_MODES
+from services.animation_encoders import available_formats, make_encoder
+from services.animation_examples import EXAMPLES
+
+# End-to-end render benchmark over the bundled examples.
+# Renders every example across a matrix of sizes, frame rates and durations and records wall time
+# per stage (page load, capture, encode), peak RSS and its growth during the case, frames/sec and
+# output size.
+#
+#   python scripts/benchmark_render.py --output results.json              # real Chromium, CDN libraries from backend/vendor
+#   python scripts/benchmark_render.py --baseline results.json            # exit 1 on regressions against a stored run
+#   python scripts/benchmark_render.py --offline --examples bouncing neon # synthetic frames, no browser
+#
+# Nothing is fetched from the network: pages only get the vendored libraries
+# (scripts/fetch_vendor_libs.py) and every other external request is blocked.
+
+DEFAULT_SIZES = ["600x400", "300x200"]
+DEFAULT_FPS = [15, 30]
+DEFAULT_DURATIONS = [1.0, 3.0]
+# A case regresses when it is this much slower / larger / hungrier than the baseline
+DEFAULT_THRESHOLD = 0.2
+# Ignore time regressions smaller than this; sub-frame jitter is not a regression
+MIN_TIME_DELTA_SECONDS = 0.05
+# Same for memory growth: the allocator keeps or hands back freed memory from run to run
+MIN_RSS_DELTA_BYTES = 32 * 2**20
+RSS_SAMPLE_INTERVAL_SECONDS = 0.05
+
+
+def example_html(name: str) -> str:
+    return EXAMPLES[name].split("Complete Code:", 1)[1].strip()
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def _tree_pids(pid: int) -> list[int]:
+    """A process and all its descendants (Chromium runs as child processes), from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; the parent pid follows its closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, ()))
+    return pids
+
+
+def _tree_rss_bytes(pid: int) -> int | None:
+    """Resident memory of a process and all its descendants."""
+    try:
+        pids = _tree_pids(pid)
+    except OSError:
+        return None
+    total = 0
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def _reset_tree_peak_rss(pid: int) -> bool:
+    """
+    Restarts the kernel's peak RSS (VmHWM) of a process and its descendants at their current RSS.
+    False when this process's peak can't be reset (not Linux, or /proc is read-only).
+    """
+    try:
+        pids = _tree_pids(pid)
+    except OSError:
+        return False
+    reset = set()
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/clear_refs", "w") as f:
+                f.write("5")
+            reset.add(current)
+        except OSError:
+            continue
+    return pid in reset
+
+
+def _tree_peak_rss_bytes(pid: int) -> int | None:
+    """Sum of the kernel's peak RSS (VmHWM) of a process and its descendants."""
+    try:
+        pids = _tree_pids(pid)
+    except OSError:
+        return None
+    total = 0
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmHWM:"))
+        except (OSError, IndexError, ValueError, StopIteration):
+            continue
+    return total
+
+
+def _max_rss_bytes() -> int:
+    """This process's lifetime peak resident memory (ru_maxrss is in kilobytes on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """
+    Peak resident memory of this process plus its browser while the block runs, and
+    `growth_bytes`, how far it rose above its level when the block started. The peak includes
+    whatever earlier cases left on the heap, so only the growth is comparable between runs.
+
+    Where /proc allows it, the kernel's own peak (VmHWM) is reset when the block starts and read
+    when it ends, which catches spikes between samples; samples every RSS_SAMPLE_INTERVAL_SECONDS
+    cover browser processes that exit before the end. Without /proc it falls back to this
+    process's lifetime peak.
+    """
+
+    def __init__(self):
+        self.start_bytes = None
+        self.peak_bytes = 0
+        self._exact = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def growth_bytes(self) -> int:
+        return max(0, self.peak_bytes - self.start_bytes)
+
+    def _sample(self):
+        rss = _tree_rss_bytes(os.getpid())
+        if rss is not None:
+            if self.start_bytes is None:
+                self.start_bytes = rss
+            self.peak_bytes = max(self.peak_bytes, rss)
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL_SECONDS):
+            self._sample()
+
+    def __enter__(self):
+        self._exact = _reset_tree_peak_rss(os.getpid())
+        self._sample()
+        if self.start_bytes is None:
+            self.start_bytes = _max_rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        if self._exact:
+            self.peak_bytes = max(self.peak_bytes, _tree_peak_rss_bytes(os.getpid()) or 0)
+        if self.peak_bytes == 0:
+            self.peak_bytes = _max_rss_bytes()
+
+
+def synthetic_frames(name: str, width: int, height: int, frame_count: int):
+    """Stand-in frames for an example: a seeded shape sweeping across a gradient."""
+    rng = random.Random(zlib.crc32(name.encode("utf-8")))
+    background = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    color = tuple(rng.randrange(64, 256) for _ in range(3))
+    radius = max(4, min(width, height) // rng.randint(6, 12))
+    for i in range(frame_count):
+        frame = background.copy()
+        x = (width // 2) + (width // 3) * ((i * 7) % 100 - 50) / 50
+        y = height // 2
+        ImageDraw.Draw(frame).ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+        yield frame
+
+
+class Runner:
+    """Runs one benchmark case at a time, in Chromium or (offline) on synthetic frames."""
+
+    def __init__(self, offline: bool):
+        self.offline = offline
+        self.browser_launch_seconds = None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    def __enter__(self):
+        if not self.offline:
+            from playwright.sync_api import sync_playwright
+            from services.vendor_libs import LibraryStore
+
+            self._playwright = sync_playwright().start()
+            started = time.perf_counter()
+            self._browser = self._playwright.chromium.launch()
+            self._context = self._browser.new_context()
+            self._context.route("**/*", LibraryStore().handle)
+            self.browser_launch_seconds = time.perf_counter() - started
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._browser is not None:
+            self._browser.close()
+        if self._playwright is not None:
+            self._playwright.stop()
+
+    def run(self, name: str, width: int, height: int, fps: int, duration: float, output_format: str,
+            palette_mode: str) -> dict:
+        fd, output = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            with RssSampler() as rss:
+                started = time.perf_counter()
+                if self.offline:
+                    stats = self._render_synthetic(name, output, width, height, fps, duration, output_format, palette_mode)
+                else:
+                    from generate_gif_standalone import render_gif
+                    stats = render_gif(self._context, example_html(name), output, width, height, duration, fps,
+                                       palette_mode, output_format=output_format)
+                total_seconds = time.perf_counter() - started
+            output_bytes = os.path.getsize(output)
+        finally:
+            os.remove(output)
+
+        return {
+            "frames": stats["frames"],
+            "stages": {
+                "page_load": stats["page_load_seconds"],
+                "capture": sum(stats["frame_capture_seconds"]),
+                # Overlaps with capture: frames are encoded on a background thread
+                "encode": stats["encode_seconds"],
+                "total": total_seconds,
+            },
+            "frames_per_second": stats["frames"] / total_seconds if total_seconds else 0.0,
+            "peak_rss_bytes": rss.peak_bytes,
+            "rss_growth_bytes": rss.growth_bytes,
+            "output_bytes": output_bytes,
+        }
+
+    @staticmethod
+    def _render_synthetic(name, output, width, height, fps, duration, output_format, palette_mode) -> dict:
+        # Mirrors render_gif: capture on this thread, encode on a BackgroundEncoder
+        frame_seconds = []
+        encoder = BackgroundEncoder(make_encoder(output_format, output, 1000.0 / fps, palette_mode))
+        try:
+            frames = synthetic_frames(name, width, height, round(duration * fps))
+            while True:
+                started = time.perf_counter()
+                frame = next(frames, None)
+                if frame is None:
+                    break
+                frame_seconds.append(time.perf_counter() - started)
+                encoder.add_frame(frame)
+        finally:
+            encoder.close()
+        return {"frames": encoder.frame_count, "page_load_seconds": 0.0, "frame_capture_seconds": frame_seconds,
+                "encode_seconds": encoder.encode_seconds}
+
+
+def case_key(case: dict) -> str:
+    return f"{case['example']} {case['width']}x{case['height']} {case['fps']}fps {case['duration']}s {case['format']}"
+
+
+def run_matrix(args) -> dict:
+    cases = []
+    with Runner(args.offline) as runner:
+        for name in args.examples:
+            for width, height in map(parse_size, args.sizes):
+                for fps in args.fps:
+                    for duration in args.durations:
+                        case = {"example": name, "width": width, "height": height, "fps": fps, "duration": duration,
+                                "format": args.format}
+                        # Keep the fastest repeat: slower ones only add scheduling noise
+                        runs = [runner.run(name, width, height, fps, duration, args.format, args.palette_mode)
+                                for _ in range(args.repeat)]
+                        case.update(min(runs, key=lambda r: r["stages"]["total"]))
+                        cases.append(case)
+                        print(f"  {case_key(case):<40} {case['stages']['total']:7.2f}s {case['frames_per_second']:7.1f} fps "
+                              f"{case['peak_rss_bytes'] / 2**20:7.0f}MB (+{case['rss_growth_bytes'] / 2**20:.0f}MB) "
+                              f"{case['output_bytes'] / 1024:8.0f}KB", file=sys.stderr)
+        launch_seconds = runner.browser_launch_seconds
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "mode": "offline" if args.offline else "chromium",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "palette_mode": args.palette_mode,
+            "repeat": args.repeat,
+            "browser_launch_seconds": launch_seconds,
+        },
+        "summary": {
+            "cases": len(cases),
+            "total_seconds": sum(c["stages"]["total"] for c in cases),
+            "median_frames_per_second": statistics.median(c["frames_per_second"] for c in cases) if cases else 0.0,
+            "max_peak_rss_bytes": max((c["peak_rss_bytes"] for c in cases), default=0),
+            "max_rss_growth_bytes": max((c["rss_growth_bytes"] for c in cases), default=0),
+        },
+        "cases": cases,
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Regressions of `results` against a stored run, one line each: total time, output size or
+    RSS growth more than `threshold` above the baseline for the same case. Cases missing from
+    either run, and checks a baseline has no numbers for, are skipped.
+    """
+    previous = {case_key(case): case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in results["cases"]:
+        before = previous.get(case_key(case))
+        if before is None:
+            continue
+        checks = [
+            # label, now, then, smallest delta that counts, display unit and divisor
+            ("total time", case["stages"]["total"], before["stages"]["total"], MIN_TIME_DELTA_SECONDS, "s", 1),
+            ("output size", case["output_bytes"], before["output_bytes"], 0, "KB", 1024),
+            ("RSS growth", case["rss_growth_bytes"], before.get("rss_growth_bytes"), MIN_RSS_DELTA_BYTES, "MB", 2**20),
+        ]
+        for label, now, then, min_delta, unit, divisor in checks:
+            if then is None or now <= then * (1 + threshold) or now - then <= min_delta:
+                continue
+            growth = f" (+{(now / then - 1) * 100:.0f}%)" if then else ""
+            regressions.append(f"{case_key(case)}: {label} {then / divisor:.2f}{unit} -> {now / divisor:.2f}{unit}{growth}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full renders of the bundled example animations")
+    parser.add_argument("--examples", nargs="+", default=list(EXAMPLES), choices=list(EXAMPLES))
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="Viewport sizes as WIDTHxHEIGHT")
+    parser.add_argument("--fps", nargs="+", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--durations", nargs="+", type=float, default=DEFAULT_DURATIONS)
+    parser.add_argument("--format", choices=available_formats(), default="gif")
+    parser.add_argument("--palette-mode", choices=PALETTE_MODES, default="global")
+    parser.add_argument("--repeat", type=int, default=1, help="Run each case this many times and keep the fastest")
+    parser.add_argument("--offline", action="store_true", help="Encode synthetic frames instead of rendering in Chromium")
+    parser.add_argument("--output", help="Write the results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown/growth over the baseline (0.2 = 20%%)")
+
+    args = parser.parse_args()
+
+    results = run_matrix(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        print(f"{len(regressions)} regression(s) against {args.baseline}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
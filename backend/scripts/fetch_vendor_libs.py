@@ -0,0 +1,53 @@
+import os
+import sys
+import argparse
+import urllib.request
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.vendor_libs import VENDOR_DIR, VENDORED_LIBRARIES
+
+# Downloads the CDN libraries listed in services/vendor_libs.py into the vendor directory, so
+# the renderer can serve them from memory. Run once per deployment (or bake into the image):
+#
+#   python scripts/fetch_vendor_libs.py
+#   python scripts/fetch_vendor_libs.py --force   # refresh existing copies
+
+
+def fetch(url: str, path: str):
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        body = response.read()
+    tmp_path = path + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return len(body)
+
+
+def main(directory: str, force: bool) -> int:
+    os.makedirs(directory, exist_ok=True)
+    failures = 0
+    for url, name in VENDORED_LIBRARIES.items():
+        path = os.path.join(directory, name)
+        if os.path.exists(path) and not force:
+            print(f"{name}: already present")
+            continue
+        try:
+            size = fetch(url, path)
+            print(f"{name}: {size / 1024:.0f} KB from {url}")
+        except Exception as e:
+            failures += 1
+            print(f"{name}: failed to fetch {url}: {e}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch vendored CDN libraries for offline rendering")
+    parser.add_argument("--dir", default=VENDOR_DIR, help="Directory to store the libraries in")
+    parser.add_argument("--force", action="store_true", help="Re-download libraries that are already present")
+
+    args = parser.parse_args()
+
+    sys.exit(main(args.dir, args.force))
@@ -0,0 +1,89 @@
+import os
+import re
+import sys
+import json
+import argparse
+
+# Generates a list of prompts through a running server's /generate-animation/batch endpoint and
+# saves each animation as soon as it is ready, as NNN-<slug>.html (and the GIF, with --gif).
+#
+#   python scripts/generate_batch.py prompts.txt --output-dir out/
+#   cat prompts.txt | python scripts/generate_batch.py - --gif --format webp --concurrency 8
+#
+# One prompt per line; blank lines and lines starting with # are skipped.
+
+
+def read_prompts(path: str) -> list[str]:
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def slug(text: str, length: int = 40) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:length] or "animation"
+
+
+def run(url: str, prompts: list[str], output_dir: str, concurrency: int, fresh: bool, gif_options: dict | None) -> dict:
+    import httpx
+
+    os.makedirs(output_dir, exist_ok=True)
+    body = {"prompts": prompts, "concurrency": concurrency, "fresh": fresh, "gif": gif_options}
+    summary = {}
+    with httpx.Client(base_url=url, timeout=None) as client:
+        with client.stream("POST", "/generate-animation/batch", json=body) as response:
+            if response.status_code != 200:
+                response.read()
+                sys.exit(f"Batch request failed ({response.status_code}): {response.text}")
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                if "summary" in result:
+                    summary = result["summary"]
+                    continue
+
+                name = f"{result['index']:03d}-{slug(result['prompt'])}"
+                if result["status"] != "ok":
+                    print(f"  FAILED {name}: {result['error']}")
+                    continue
+                with open(os.path.join(output_dir, f"{name}.html"), "w", encoding="utf-8") as f:
+                    f.write(result["generated_html"])
+                saved = f"{name}.html"
+
+                gif = result.get("gif")
+                if gif and gif.get("result_url"):
+                    rendered = client.get(gif["result_url"])
+                    rendered.raise_for_status()
+                    with open(os.path.join(output_dir, f"{name}.{gif_options['format']}"), "wb") as f:
+                        f.write(rendered.content)
+                    saved += f" + .{gif_options['format']}"
+                elif gif:
+                    print(f"  Render failed for {name}: {gif['error']}")
+                print(f"  {saved} ({result['seconds']:.1f}s)")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate animations for a list of prompts")
+    parser.add_argument("prompts", help="File with one prompt per line, or - for stdin")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--output-dir", default="batch_output")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fresh", action="store_true", help="Skip the prompt cache")
+    parser.add_argument("--gif", action="store_true", help="Also render each animation")
+    parser.add_argument("--format", choices=["gif", "webp", "apng", "mp4", "webm"], default="gif")
+    parser.add_argument("--duration", type=float, help="Seconds to capture (default: detected)")
+    parser.add_argument("--fps", type=int, help="Frames per second (default: detected)")
+
+    args = parser.parse_args()
+
+    prompts = read_prompts(args.prompts)
+    if not prompts:
+        sys.exit("No prompts to generate")
+    gif_options = {"format": args.format, "duration": args.duration, "fps": args.fps} if args.gif else None
+
+    print(f"Generating {len(prompts)} animations into {args.output_dir}/ ...")
+    summary = run(args.url, prompts, args.output_dir, args.concurrency, args.fresh, gif_options)
+    if summary:
+        print(f"Done: {summary['succeeded']}/{summary['prompts']} succeeded in {summary['seconds']:.1f}s")
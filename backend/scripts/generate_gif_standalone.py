@@ -1,63 +1,402 @@
-import sys
+import io
 import os
+import sys
 import time
-import tempfile
+import base64
 import argparse
+from contextlib import contextmanager
 from playwright.sync_api import sync_playwright
 from PIL import Image
 
-# Script to hijack time and animation frames for deterministic rendering
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.gif_encoder import BackgroundEncoder, PALETTE_MODES
+from services.animation_encoders import OUTPUT_FORMATS, make_encoder
+from services.motion_analysis import analyze_motion, collect_probe, box_to_clip, PROBE_SECONDS, PROBE_FPS, PROBE_SCALE
+from services.vendor_libs import LibraryStore
+
+# Script that replaces the page's clocks with a virtual one for deterministic rendering.
+# Date, performance.now, requestAnimationFrame, setTimeout/setInterval and every CSS animation,
+# CSS transition and Web Animation only move when window.advanceTime(ms) is called, so a frame
+# looks the same no matter how long the capture of the previous one took. Math.random is seeded
+# too, which makes each frame a pure function of its index.
 TIME_HIJACK_SCRIPT = """
+(() => {
 try {
+    if (typeof window.advanceTime === "function") return;
     console.log("Initializing Time Hijacker...");
+    const EPOCH = 1700000000000;
+    // Browsers clamp timers nested more than 5 levels deep to 4ms; the callback cap is a
+    // last-resort guard against anything else that would keep one frame from ending
+    const NESTING_CLAMP_LEVEL = 5;
+    const NESTING_CLAMP_MS = 4;
+    const MAX_TIMER_CALLBACKS = 10000;
+
+    const OriginalDate = window.Date;
+    let virtualTime = 0;
+    let sequence = 0;
+    const timers = new Map();  // id -> { due, interval, callback, args, nesting, seq }
+    let nextTimerId = 1;
+    let nestingLevel = 0;
+    let rafCallbacks = new Map();  // id -> callback
+    let nextRafId = 1;
     window.__virtualTime = 0;
-    window.__rafCallbacks = [];
-    window.__originalDate = window.Date;
-    window.__originalPerf = window.performance;
 
-    // Hijack Date
-    class HijackedDate extends window.__originalDate {
+    // Date and performance.now
+    class HijackedDate extends OriginalDate {
         constructor(...args) {
-            if (args.length) return new window.__originalDate(...args);
-            return new window.__originalDate(window.__virtualTime + 1700000000000);
+            if (args.length) return new OriginalDate(...args);
+            return new OriginalDate(virtualTime + EPOCH);
         }
         static now() {
-            return window.__virtualTime + 1700000000000;
+            return virtualTime + EPOCH;
         }
     }
     window.Date = HijackedDate;
+    window.performance.now = () => virtualTime;
 
-    // Hijack performance.now
-    window.performance.now = () => window.__virtualTime;
+    // Seeded Math.random (mulberry32), so every page loading the same HTML draws the same numbers
+    let seed = 0x9e3779b9;
+    Math.random = () => {
+        seed = (seed + 0x6d2b79f5) | 0;
+        let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
 
-    // Hijack requestAnimationFrame
+    // Timers
+    const addTimer = (callback, delay, args, repeat) => {
+        const id = nextTimerId++;
+        const nesting = nestingLevel + 1;
+        let ms = Math.max(0, Number(delay) || 0);
+        if (nesting > NESTING_CLAMP_LEVEL) ms = Math.max(ms, NESTING_CLAMP_MS);
+        timers.set(id, {
+            due: virtualTime + ms,
+            interval: repeat ? Math.max(ms, 1) : 0,
+            callback, args, nesting, seq: sequence++,
+        });
+        return id;
+    };
+    window.setTimeout = (callback, delay, ...args) => addTimer(callback, delay, args, false);
+    window.setInterval = (callback, delay, ...args) => addTimer(callback, delay, args, true);
+    window.clearTimeout = window.clearInterval = (id) => { timers.delete(id); };
+
+    const nextTimerDue = (limit) => {
+        let next = null;
+        for (const [id, timer] of timers) {
+            if (timer.due > limit) continue;
+            if (!next || timer.due < next[1].due || (timer.due === next[1].due && timer.seq < next[1].seq)) {
+                next = [id, timer];
+            }
+        }
+        return next;
+    };
+
+    const runTimers = (target) => {
+        for (let budget = MAX_TIMER_CALLBACKS; budget > 0; budget--) {
+            const next = nextTimerDue(target);
+            if (!next) return;
+            const [id, timer] = next;
+            virtualTime = window.__virtualTime = Math.max(virtualTime, timer.due);
+            if (timer.interval) {
+                timer.due += timer.interval;
+                timer.seq = sequence++;
+            } else {
+                timers.delete(id);
+            }
+            nestingLevel = timer.nesting;
+            try {
+                if (typeof timer.callback === "function") timer.callback(...timer.args);
+                else (0, eval)(String(timer.callback));
+            } catch (e) { console.error(e); }
+            nestingLevel = 0;
+        }
+        console.error("Time Hijacker: timer callback limit reached, skipping the rest of this frame's timers");
+    };
+
+    // requestAnimationFrame
     window.requestAnimationFrame = (callback) => {
-        const id = window.__rafCallbacks.length;
-        window.__rafCallbacks.push({ id, callback, cancelled: false });
+        const id = nextRafId++;
+        rafCallbacks.set(id, callback);
         return id;
     };
+    window.cancelAnimationFrame = (id) => { rafCallbacks.delete(id); };
+
+    // CSS animations, CSS transitions and Web Animations: each one is paused as soon as it is
+    // seen and its currentTime is then set from the virtual clock on every tick.
+    const adopted = new WeakMap();  // animation -> virtual time at which it started
+    const AnimationProto = window.Animation && window.Animation.prototype;
+    const originalPause = AnimationProto && AnimationProto.pause;
+    const originalPlay = AnimationProto && AnimationProto.play;
+    const originalFinish = AnimationProto && AnimationProto.finish;
+
+    const adopt = (animation, offset) => {
+        const rate = animation.playbackRate || 1;
+        adopted.set(animation, virtualTime - offset / rate);
+        originalPause.call(animation);
+    };
 
-    window.cancelAnimationFrame = (id) => {
-        const cb = window.__rafCallbacks.find(c => c.id === id);
-        if (cb) cb.cancelled = true;
+    if (AnimationProto) {
+        // Animations paused or resumed by the page itself keep behaving that way
+        AnimationProto.pause = function () {
+            adopted.delete(this);
+            return originalPause.call(this);
+        };
+        AnimationProto.play = function () {
+            const result = originalPlay.call(this);
+            adopt(this, this.currentTime || 0);
+            return result;
+        };
+    }
+
+    const syncAnimations = () => {
+        if (!document.getAnimations) return;
+        for (const animation of document.getAnimations()) {
+            if (!adopted.has(animation)) {
+                if (animation.playState !== "running") continue;
+                // Whatever ran on the wall clock before the first tick is discarded
+                adopt(animation, 0);
+            }
+            if (!animation.playbackRate) continue;
+            const elapsed = (virtualTime - adopted.get(animation)) * animation.playbackRate;
+            const end = animation.effect ? animation.effect.getComputedTiming().endTime : Infinity;
+            if (animation.playbackRate > 0 && elapsed >= end) {
+                // Let finish/animationend/transitionend fire as they would in real time
+                adopted.delete(animation);
+                originalFinish.call(animation);
+            } else {
+                animation.currentTime = elapsed;
+            }
+        }
     };
 
-    // Function to advance time
+    // Moves the virtual clock forward: due timers in order, then animation frames, then
+    // CSS/Web Animations, the same order a browser uses within one frame.
     window.advanceTime = (ms) => {
-        window.__virtualTime += ms;
-        const callbacks = window.__rafCallbacks.filter(c => !c.cancelled);
-        window.__rafCallbacks = [];
-        callbacks.forEach(({ callback }) => {
-            try { callback(window.performance.now()); } catch(e) { console.error(e); }
+        const target = virtualTime + ms;
+        runTimers(target);
+        virtualTime = window.__virtualTime = target;
+
+        const callbacks = rafCallbacks;
+        rafCallbacks = new Map();
+        callbacks.forEach((callback) => {
+            try { callback(virtualTime); } catch (e) { console.error(e); }
         });
+        syncAnimations();
+    };
+
+    // Resolves once fonts are loaded, then pins every animation to virtual time zero
+    window.__virtualClockReady = async () => {
+        if (document.fonts) await document.fonts.ready;
+        window.advanceTime(0);
     };
     console.log("Time Hijacker Initialized Successfully");
 } catch (e) {
     console.error("Time Hijacker Initialization Failed:", e);
 }
+})();
 """
 
-def generate_gif(input_html_path: str, output_gif_path: str, width: int = 600, height: int = 400, duration: int = 3, fps: int = 30):
+class FrameGrabber:
+    """
+    Captures viewport screenshots straight into memory.
+    Uses CDP Page.captureScreenshot with optimizeForSpeed (fast zlib level, no file I/O) when the
+    browser is Chromium, and falls back to Playwright's in-memory page.screenshot() otherwise.
+
+    `clip` ({"x", "y", "width", "height"} in CSS pixels) limits the capture to that region of the
+    viewport. Frames come out at clip size * device scale factor * `scale`; with `scale` < 1
+    Chromium renders the screenshot at the reduced size directly.
+    """
+
+    def __init__(self, page, scale: float = 1.0, clip: dict | None = None, device_scale_factor: float = 1.0):
+        self.page = page
+        self.scale = scale
+        viewport = page.viewport_size
+        self.clip = clip_to_viewport(clip, viewport["width"], viewport["height"])
+        self.size = (max(1, round(self.clip["width"] * device_scale_factor * scale)),
+                     max(1, round(self.clip["height"] * device_scale_factor * scale)))
+        try:
+            self.cdp = page.context.new_cdp_session(page)
+        except Exception:
+            self.cdp = None
+
+    def grab_png(self) -> bytes:
+        if self.cdp is not None:
+            params = {"format": "png", "optimizeForSpeed": True, "clip": dict(self.clip, scale=self.scale)}
+            result = self.cdp.send("Page.captureScreenshot", params)
+            return base64.b64decode(result["data"])
+        return self.page.screenshot(type="png", clip=self.clip)
+
+    def grab(self) -> Image.Image:
+        with Image.open(io.BytesIO(self.grab_png())) as img:
+            frame = img.convert("RGB")
+        if frame.size != self.size:
+            frame = frame.resize(self.size, Image.Resampling.BILINEAR)
+        return frame
+
+
+def clip_to_viewport(clip: dict | None, width: int, height: int) -> dict:
+    """A clip rectangle cut down to the viewport; the whole viewport when `clip` is None."""
+    if clip is None:
+        return {"x": 0, "y": 0, "width": width, "height": height}
+    x = min(max(0, int(clip["x"])), width - 1)
+    y = min(max(0, int(clip["y"])), height - 1)
+    return {
+        "x": x,
+        "y": y,
+        "width": max(1, min(int(clip["width"]), width - x)),
+        "height": max(1, min(int(clip["height"]), height - y)),
+    }
+
+
+@contextmanager
+def open_render_page(context, html_content: str, width: int, height: int, device_scale_factor: float = 1.0):
+    """
+    Opens a page with the virtual clock installed and the HTML loaded, paused at virtual time 0.
+    The page is closed on exit; the context (and its browser) are left open so long-lived
+    workers can reuse them between renders.
+    A device_scale_factor other than 1 renders the page at that many device pixels per CSS pixel
+    (crisper text and SVG, larger frames) without changing its layout.
+    """
+    page = context.new_page()
+    try:
+        page.set_viewport_size({"width": width, "height": height})
+        if device_scale_factor != 1.0:
+            # The scale factor is a context option in Playwright; CDP sets it for this page only,
+            # so the shared context keeps serving every other render at 1x
+            context.new_cdp_session(page).send("Emulation.setDeviceMetricsOverride", {
+                "width": width, "height": height, "deviceScaleFactor": device_scale_factor, "mobile": False,
+            })
+
+        # Debug console logs
+        page.on("console", lambda msg: print(f"BROWSER LOG: {msg.text}", file=sys.stderr))
+
+        # Inject time hijacker
+        page.add_init_script(TIME_HIJACK_SCRIPT)
+
+        # Set content directly or load file via file:// url? set_content is safer for strings
+        # But here we have content string
+        page.set_content(html_content, wait_until="load")
+
+        # Verify injection
+        is_injected = page.evaluate("() => typeof window.advanceTime === 'function'")
+        if not is_injected:
+            print("WARNING: Time hijacker not found after load. Re-injecting...", file=sys.stderr)
+            page.evaluate(TIME_HIJACK_SCRIPT)
+
+        # Nothing moves until advanceTime(), so there is no wall-clock warmup to wait out
+        page.evaluate("() => window.__virtualClockReady()")
+        yield page
+    finally:
+        page.close()
+
+
+def capture_frames(page, fps: int, start_frame: int, end_frame: int, scale: float = 1.0, clip: dict | None = None,
+                   device_scale_factor: float = 1.0, frame_seconds: list | None = None):
+    """
+    Yields frames [start_frame, end_frame) of the animation as RGB images (see FrameGrabber for
+    `scale`, `clip` and `device_scale_factor`).
+    Earlier frames are reached by replaying the same virtual clock ticks without capturing them,
+    so a slice starting mid-animation sees exactly the page state a full render would.
+    The time to advance to and screenshot each yielded frame is appended to `frame_seconds`.
+    """
+    frame_interval_ms = 1000.0 / fps
+    grabber = FrameGrabber(page, scale, clip, device_scale_factor)
+    for i in range(end_frame):
+        started = time.perf_counter()
+        if i > 0:
+            page.evaluate("ms => window.advanceTime(ms)", frame_interval_ms)
+        if i >= start_frame:
+            frame = grabber.grab()
+            if frame_seconds is not None:
+                frame_seconds.append(round(time.perf_counter() - started, 6))
+            yield frame
+
+
+def stage_timings(page_load_seconds: float, frame_seconds: list) -> dict:
+    """Browser-side stage timings reported in job stats (recorded as metrics by the parent)."""
+    return {"page_load_seconds": round(page_load_seconds, 6), "frame_capture_seconds": frame_seconds}
+
+
+def probe_timing(context, html_content: str, width: int = 600, height: int = 400) -> dict:
+    """
+    Captures a cheap low-resolution probe of the animation and picks the duration and fps to
+    render it with (see services/motion_analysis.py). "motion_clip" is the CSS-pixel rectangle
+    around everything that moves (None for a static page), for auto-cropping the render.
+    """
+    started = time.perf_counter()
+    frame_seconds = []
+    with open_render_page(context, html_content, width, height) as page:
+        page_load_seconds = time.perf_counter() - started
+        # Stops capturing as soon as a loop is confirmed
+        frames = collect_probe(capture_frames(page, PROBE_FPS, 0, round(PROBE_SECONDS * PROBE_FPS), scale=PROBE_SCALE,
+                                              frame_seconds=frame_seconds), PROBE_FPS)
+    timing = analyze_motion(frames, PROBE_FPS)
+    box = timing.pop("motion_box")
+    timing["motion_clip"] = box_to_clip(box, PROBE_SCALE, width, height) if box is not None else None
+    timing.update(stage_timings(page_load_seconds, frame_seconds))
+    return timing
+
+
+def render_gif(context, html_content: str, output_gif_path: str, width: int = 600, height: int = 400, duration: float = 3, fps: int = 30, palette_mode: str = "global",
+               on_frame=None, output_format: str = "gif", scale: float = 1.0, device_scale_factor: float = 1.0,
+               clip: dict | None = None):
+    """
+    Renders HTML into a GIF (or another OUTPUT_FORMATS format) using an already running browser context.
+    `on_frame(frames_captured)` is called after each captured frame.
+    Only the `clip` region is captured, at `scale` times its size in device pixels (see FrameGrabber).
+    Returns the frame count and per-stage timings.
+    """
+    started = time.perf_counter()
+    frame_seconds = []
+    with open_render_page(context, html_content, width, height, device_scale_factor) as page:
+        page_load_seconds = time.perf_counter() - started
+        # Frames are encoded on a background thread while the next ones are captured
+        encoder = BackgroundEncoder(make_encoder(output_format, output_gif_path, 1000.0 / fps, palette_mode))
+        try:
+            frames = capture_frames(page, fps, 0, round(duration * fps), scale, clip, device_scale_factor, frame_seconds)
+            for i, frame in enumerate(frames, 1):
+                encoder.add_frame(frame)
+                if on_frame is not None:
+                    on_frame(i)
+        finally:
+            encoder.close()
+
+    if encoder.frame_count == 0:
+        raise RuntimeError("No frames captured")
+
+    print(f"{output_format.upper()} saved successfully to {output_gif_path}")
+    return dict(stage_timings(page_load_seconds, frame_seconds), frames=encoder.frame_count,
+                encode_seconds=round(encoder.encode_seconds, 6))
+
+
+def render_frames(context, html_content: str, output_path: str, width: int = 600, height: int = 400, fps: int = 30,
+                  start_frame: int = 0, end_frame: int = 90, on_frame=None, scale: float = 1.0,
+                  device_scale_factor: float = 1.0, clip: dict | None = None) -> dict:
+    """
+    Captures one slice of the timeline as raw RGB frames written back to back to `output_path`
+    (read them with services.gif_encoder.iter_raw_frames). Used to split a render across workers.
+    Returns the frame count, the size of each frame and per-stage timings.
+    """
+    frames = 0
+    size = (width, height)
+    started = time.perf_counter()
+    frame_seconds = []
+    with open_render_page(context, html_content, width, height, device_scale_factor) as page, open(output_path, "wb") as f:
+        page_load_seconds = time.perf_counter() - started
+        for frame in capture_frames(page, fps, start_frame, end_frame, scale, clip, device_scale_factor, frame_seconds):
+            size = frame.size
+            f.write(frame.tobytes())
+            frames += 1
+            if on_frame is not None:
+                on_frame(frames)
+    return dict(stage_timings(page_load_seconds, frame_seconds), frames=frames, width=size[0], height=size[1])
+
+
+def generate_gif(input_html_path: str, output_gif_path: str, width: int = 600, height: int = 400, duration: float = 3, fps: int = 30, palette_mode: str = "global",
+                 output_format: str = "gif", auto_timing: bool = False, scale: float = 1.0, device_scale_factor: float = 1.0,
+                 clip: dict | None = None, auto_crop: bool = False):
     """
     Generates a GIF from an HTML file using Playwright (Synchronous) in a standalone process.
     """
@@ -69,58 +408,19 @@ def generate_gif(input_html_path: str, output_gif_path: str, width: int = 600, h
 
         with sync_playwright() as p:
             browser = p.chromium.launch()
-            page = browser.new_page(viewport={"width": width, "height": height})
-            
-            # Debug console logs
-            page.on("console", lambda msg: print(f"BROWSER LOG: {msg.text}", file=sys.stderr))
-            
-            # Inject time hijacker
-            page.add_init_script(TIME_HIJACK_SCRIPT)
-            
-            # Set content directly or load file via file:// url? set_content is safer for strings
-            # But here we have content string
-            page.set_content(html_content, wait_until="load")
-            
-            # Verify injection
-            is_injected = page.evaluate("() => typeof window.advanceTime === 'function'")
-            if not is_injected:
-                print("WARNING: Time hijacker not found after load. Re-injecting...", file=sys.stderr)
-                page.evaluate(TIME_HIJACK_SCRIPT)
-            
-            # Warmup
-            time.sleep(0.5)
-            
-            frames = []
-            total_frames = duration * fps
-            frame_interval_ms = 1000.0 / fps
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                for i in range(total_frames):
-                    if i > 0:
-                        page.evaluate(f"window.advanceTime({frame_interval_ms})")
-                    
-                    screenshot_path = os.path.join(temp_dir, f"frame_{i:03d}.png")
-                    page.screenshot(path=screenshot_path, type="png")
-                    
-                    with Image.open(screenshot_path) as img:
-                        frames.append(img.copy().convert("RGB"))
-                
-                browser.close()
-                
-                if not frames:
-                    raise RuntimeError("No frames captured")
-
-                # Save GIF
-                frames[0].save(
-                    output_gif_path,
-                    save_all=True,
-                    append_images=frames[1:],
-                    duration=int(frame_interval_ms),
-                    loop=0,
-                    optimize=True,
-                    disposal=2 # Clear background
-                )
-                print(f"GIF saved successfully to {output_gif_path}")
+            context = browser.new_context()
+            context.route("**/*", LibraryStore().handle)
+            if auto_timing or (auto_crop and clip is None):
+                timing = probe_timing(context, html_content, width, height)
+                if auto_timing:
+                    duration, fps = timing["duration"], timing["fps"]
+                    print(f"Detected timing: {duration:.2f}s at {fps}fps (loop: {timing['loop_seconds']})")
+                if auto_crop and clip is None:
+                    clip = timing["motion_clip"]
+                    print(f"Cropping to moving content: {clip}")
+            render_gif(context, html_content, output_gif_path, width, height, duration, fps, palette_mode, output_format=output_format,
+                       scale=scale, device_scale_factor=device_scale_factor, clip=clip)
+            browser.close()
 
     except Exception as e:
         print(f"Error in standalone generator: {e}", file=sys.stderr)
@@ -132,9 +432,22 @@ if __name__ == "__main__":
     parser.add_argument("--output", required=True, help="Path to output GIF file")
     parser.add_argument("--width", type=int, default=600)
     parser.add_argument("--height", type=int, default=400)
-    parser.add_argument("--duration", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=3)
     parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--palette-mode", choices=PALETTE_MODES, default="global")
+    parser.add_argument("--format", choices=list(OUTPUT_FORMATS), default="gif")
+    parser.add_argument("--auto-timing", action="store_true", help="Detect duration and fps from the animation (overrides --duration/--fps)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Output size relative to the captured region")
+    parser.add_argument("--device-scale-factor", type=float, default=1.0, help="Device pixels per CSS pixel")
+    parser.add_argument("--clip", help="Capture only this region of the viewport: x,y,width,height in CSS pixels")
+    parser.add_argument("--auto-crop", action="store_true", help="Crop to the area where the animation moves (ignored with --clip)")
     
     args = parser.parse_args()
+
+    clip = None
+    if args.clip:
+        x, y, w, h = (int(v) for v in args.clip.split(","))
+        clip = {"x": x, "y": y, "width": w, "height": h}
     
-    generate_gif(args.input, args.output, args.width, args.height, args.duration, args.fps)
+    generate_gif(args.input, args.output, args.width, args.height, args.duration, args.fps, args.palette_mode, args.format, args.auto_timing,
+                 args.scale, args.device_scale_factor, clip, args.auto_crop)
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline load test of the generation API against the local replay provider.
+# Sends --requests generations, --concurrency at a time, through the whole app (routing, prompt
+# assembly, validation, sanitizing) and reports latency percentiles, throughput and the server's
+# overhead: the latency minus the time the simulated model took.
+#
+#   python scripts/load_test_generation.py --requests 200 --concurrency 50
+#   python scripts/load_test_generation.py --latency 1 --tokens-per-second 400 --stream
+#
+# The app runs in-process with the rate limiter off; prompts skip the prompt cache (fresh=true).
+
+PROMPTS = [
+    "A red ball bouncing up and down",
+    "Neon text with cyberpunk glow",
+    "Particles floating randomly",
+    "A spinning cube in 3D",
+    "Ocean waves at sunset",
+    "Confetti falling for a celebration",
+    "A pulsing heart",
+    "Text that reveals letter by letter",
+]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(requests: int, concurrency: int, stream: bool) -> tuple[list[float], list[float], float]:
+    import httpx
+    from limiter import limiter
+    from services import groq_service
+    from main import app
+
+    limiter.enabled = False
+    provider = groq_service.provider
+    path = "/generate-animation/stream" if stream else "/generate-animation"
+    slots = asyncio.Semaphore(concurrency)
+    latencies, overheads = [], []
+
+    async def one(client, i: int):
+        prompt = PROMPTS[i % len(PROMPTS)]
+        async with slots:
+            started = time.perf_counter()
+            response = await client.post(path, json={"prompt": prompt, "fresh": True})
+            elapsed = time.perf_counter() - started
+        response.raise_for_status()
+        latencies.append(elapsed)
+        overheads.append(elapsed - provider.simulated_seconds(provider.content(f'"{prompt}"')))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        return latencies, overheads, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the generation API offline with the local LLM provider")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Simulated streaming speed (0 = instant)")
+    parser.add_argument("--stream", action="store_true", help="Use the SSE streaming endpoint")
+
+    args = parser.parse_args()
+
+    # Read by services/llm_providers.py at import
+    os.environ["LLM_PROVIDER"] = "local"
+    os.environ["LLM_LOCAL_LATENCY"] = str(args.latency)
+    os.environ["LLM_LOCAL_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.concurrency))
+
+    latencies, overheads, elapsed = asyncio.run(run(args.requests, args.concurrency, args.stream))
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.latency}s simulated latency")
+    print(f"  throughput  {args.requests / elapsed:8.1f} req/s")
+    print(f"  latency     p50 {percentile(latencies, 0.5) * 1000:7.0f}ms   p95 {percentile(latencies, 0.95) * 1000:7.0f}ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.0f}ms")
+    print(f"  overhead    p50 {percentile(overheads, 0.5) * 1000:7.1f}ms   p95 {percentile(overheads, 0.95) * 1000:7.1f}ms   "
+          f"mean {statistics.mean(overheads) * 1000:7.1f}ms")
@@ -0,0 +1,193 @@
+import sys
+import json
+import time
+import argparse
+from playwright.sync_api import sync_playwright
+from generate_gif_standalone import render_gif, render_frames, probe_timing
+from services.vendor_libs import LibraryStore
+
+# Long-lived render worker used by services/render_pool.py.
+# Keeps one Chromium (and one browser context) warm and serves render jobs read as JSON lines
+# from stdin, answering each with a single JSON line on stdout.
+#
+# Requests:  {"id": 1, "type": "render", "html": "...", "output": "/tmp/x.gif", "width": 600, ...}
+#            {"id": 2, "type": "capture", "html": "...", "output": "/tmp/x.rgb", "start_frame": 45, "end_frame": 90, ...}
+#            {"id": 3, "type": "probe", "html": "...", "width": 600, "height": 400}
+#            {"id": 4, "type": "ping"}
+#            {"id": 5, "type": "shutdown"}
+# Responses: {"id": 1, "type": "progress", "frames": 30}   (zero or more, before the result)
+#            {"id": 1, "type": "result", "stats": {...}}
+#            {"id": 1, "type": "error", "error": "..."}
+#            {"id": 4, "type": "pong", "renders": 4, "browser_connected": true}
+#
+# "capture" renders one slice of the timeline to raw RGB frames instead of a GIF; the parent
+# reassembles the slices of a parallel render (see services/gif_service.py).
+# "probe" answers with the detected timing: {"duration": 1.0, "fps": 15, "loop_seconds": 1.0, ...}
+# and the CSS-pixel rectangle the motion happens in: "motion_clip": {"x": 180, "y": 90, ...}
+# "render" and "capture" jobs take optional "scale", "device_scale_factor" and "clip" fields.
+# Result stats carry stage timings ("page_load_seconds", "frame_capture_seconds", ...), the page's
+# external requests ("vendored_requests", "remote_requests", "blocked_requests") and, after a
+# browser (re)launch, "browser_launch_seconds"; the parent turns them into metrics.
+
+# Send a progress message every this many captured frames
+PROGRESS_EVERY_FRAMES = 5
+
+
+def capture_options(job: dict) -> dict:
+    """Optional scale / device scale factor / clip rectangle of a render or capture job."""
+    return {
+        "scale": job.get("scale", 1.0),
+        "device_scale_factor": job.get("device_scale_factor", 1.0),
+        "clip": job.get("clip"),
+    }
+
+
+class BrowserHost:
+    """Owns the warm browser and recycles it after `max_renders` renders or when it crashes."""
+
+    def __init__(self, playwright, max_renders: int):
+        self.playwright = playwright
+        self.max_renders = max_renders
+        self.browser = None
+        self.context = None
+        self.renders = 0
+        self.launches = 0
+        self.libraries = LibraryStore()
+        # Launch time not yet reported; goes out with the stats of the next job
+        self.unreported_launch_seconds = None
+
+    def is_connected(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    def ensure_browser(self):
+        if self.is_connected():
+            return
+        self.close()
+        started = time.perf_counter()
+        self.browser = self.playwright.chromium.launch()
+        self.context = self.browser.new_context()
+        self.context.route("**/*", self.libraries.handle)
+        self.renders = 0
+        self.launches += 1
+        self.unreported_launch_seconds = time.perf_counter() - started
+        print(f"Browser launched in {self.unreported_launch_seconds:.2f}s (launch #{self.launches})", file=sys.stderr)
+
+    def close(self):
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception as e:
+                print(f"Error closing browser: {e}", file=sys.stderr)
+        self.browser = None
+        self.context = None
+
+    def render(self, job: dict, on_frame=None) -> dict:
+        self.ensure_browser()
+        started = time.perf_counter()
+        before = self.libraries.counters()
+        stats = {}
+        try:
+            if job["type"] == "probe":
+                stats = probe_timing(self.context, job["html"], job.get("width", 600), job.get("height", 400))
+            elif job["type"] == "capture":
+                stats = render_frames(
+                    self.context,
+                    job["html"],
+                    job["output"],
+                    job.get("width", 600),
+                    job.get("height", 400),
+                    job.get("fps", 30),
+                    job["start_frame"],
+                    job["end_frame"],
+                    on_frame,
+                    **capture_options(job),
+                )
+            else:
+                stats = render_gif(
+                    self.context,
+                    job["html"],
+                    job["output"],
+                    job.get("width", 600),
+                    job.get("height", 400),
+                    job.get("duration", 3),
+                    job.get("fps", 30),
+                    job.get("palette_mode", "global"),
+                    on_frame,
+                    job.get("format", "gif"),
+                    **capture_options(job),
+                )
+        finally:
+            self.renders += 1
+            if self.renders >= self.max_renders:
+                print(f"Recycling browser after {self.renders} renders", file=sys.stderr)
+                self.close()
+        after = self.libraries.counters()
+        stats["render_seconds"] = time.perf_counter() - started
+        stats["vendored_requests"] = after["served"] - before["served"]
+        stats["remote_requests"] = after["fetched_remote"] - before["fetched_remote"]
+        stats["blocked_requests"] = after["blocked"] - before["blocked"]
+        if self.unreported_launch_seconds is not None:
+            stats["browser_launch_seconds"] = self.unreported_launch_seconds
+            self.unreported_launch_seconds = None
+        return stats
+
+
+def serve(max_renders: int):
+    # stdout carries the protocol; anything printed by the render code goes to stderr instead
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    def reply(message: dict):
+        protocol_out.write(json.dumps(message) + "\n")
+        protocol_out.flush()
+
+    with sync_playwright() as p:
+        host = BrowserHost(p, max_renders)
+        host.ensure_browser()
+        reply({"type": "ready"})
+
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                reply({"type": "error", "error": f"Invalid job message: {e}"})
+                continue
+
+            job_id = job.get("id")
+            job_type = job.get("type")
+
+            if job_type == "shutdown":
+                break
+            if job_type == "ping":
+                reply({"id": job_id, "type": "pong", "renders": host.renders, "browser_connected": host.is_connected()})
+                continue
+            if job_type not in ("render", "capture", "probe"):
+                reply({"id": job_id, "type": "error", "error": f"Unknown job type: {job_type}"})
+                continue
+
+            def progress(frames, job_id=job_id):
+                if frames % PROGRESS_EVERY_FRAMES == 0:
+                    reply({"id": job_id, "type": "progress", "frames": frames})
+
+            try:
+                stats = host.render(job, progress)
+                reply({"id": job_id, "type": "result", "stats": stats})
+            except Exception as e:
+                print(f"Render job {job_id} failed: {e}", file=sys.stderr)
+                if not host.is_connected():
+                    host.close()
+                reply({"id": job_id, "type": "error", "error": str(e)})
+
+        host.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived Playwright render worker")
+    parser.add_argument("--max-renders", type=int, default=50, help="Recycle the browser after this many renders")
+
+    args = parser.parse_args()
+
+    serve(args.max_renders)
@@ -0,0 +1,214 @@
+import os
+import shutil
+import subprocess
+from fractions import Fraction
+from PIL import Image
+from services.gif_encoder import StreamingGifEncoder
+
+try:
+    import av  # PyAV, optional: preferred over the ffmpeg binary for video when installed
+except ImportError:
+    av = None
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+VIDEO_CRF = int(os.getenv("VIDEO_CRF", "28"))
+WEBP_QUALITY = int(os.getenv("WEBP_QUALITY", "80"))
+
+# Output formats of the capture pipeline: extension and media type of the rendered file
+OUTPUT_FORMATS = {
+    "gif": {"extension": ".gif", "media_type": "image/gif"},
+    "webp": {"extension": ".webp", "media_type": "image/webp"},
+    "apng": {"extension": ".png", "media_type": "image/apng"},
+    "mp4": {"extension": ".mp4", "media_type": "video/mp4"},
+    "webm": {"extension": ".webm", "media_type": "video/webm"},
+}
+
+VIDEO_FORMATS = ("mp4", "webm")
+
+
+def _frame_durations_ms(frame_count: int, frame_duration_ms: float) -> list[int]:
+    """Whole-millisecond durations that stay on the ideal timeline (30fps averages 33.3ms)."""
+    bounds = [round(i * frame_duration_ms) for i in range(frame_count + 1)]
+    return [max(end - start, 1) for start, end in zip(bounds, bounds[1:])]
+
+
+class PillowAnimationEncoder:
+    """
+    Animated WebP or APNG through Pillow's multi-frame writers.
+    Those writers need every frame up front, so frames are held in memory until close(); both
+    formats store only the changed region of each frame and merge identical ones.
+    """
+
+    def __init__(self, output, frame_duration_ms: float, pillow_format: str, loop: int = 0, **save_options):
+        self.output = output
+        self.frame_duration_ms = frame_duration_ms
+        self.pillow_format = pillow_format
+        self.loop = loop
+        self.save_options = save_options
+        self.frame_count = 0
+        self._frames = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add_frame(self, frame: Image.Image):
+        self._frames.append(frame.convert("RGB") if frame.mode != "RGB" else frame.copy())
+        self.frame_count += 1
+
+    def close(self):
+        if not self._frames:
+            return
+        frames, self._frames = self._frames, []
+        frames[0].save(
+            self.output,
+            format=self.pillow_format,
+            save_all=True,
+            append_images=frames[1:],
+            duration=_frame_durations_ms(len(frames), self.frame_duration_ms),
+            loop=self.loop,
+            **self.save_options,
+        )
+
+
+class FfmpegVideoEncoder:
+    """H.264 (mp4) or VP9 (webm) by piping raw RGB frames into a local ffmpeg binary."""
+
+    CODEC_ARGS = {
+        "mp4": ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-movflags", "+faststart"],
+        "webm": ["-c:v", "libvpx-vp9", "-b:v", "0", "-deadline", "realtime", "-cpu-used", "8", "-pix_fmt", "yuv420p"],
+    }
+
+    def __init__(self, output: str, frame_duration_ms: float, video_format: str, crf: int = VIDEO_CRF):
+        self.output = output
+        self.frame_duration_ms = frame_duration_ms
+        self.video_format = video_format
+        self.crf = crf
+        self.frame_count = 0
+        self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _start(self, width: int, height: int):
+        fps = Fraction(1000 / self.frame_duration_ms).limit_denominator(1001)
+        cmd = [
+            FFMPEG_BINARY, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            # 4:2:0 chroma needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            *self.CODEC_ARGS[self.video_format], "-crf", str(self.crf),
+            self.output,
+        ]
+        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def add_frame(self, frame: Image.Image):
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        if self._process is None:
+            self._start(*frame.size)
+        self._process.stdin.write(frame.tobytes())
+        self.frame_count += 1
+
+    def close(self):
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        _, stderr = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {stderr.decode(errors='replace')[-500:]}")
+
+
+class PyAVVideoEncoder:
+    """Same output as FfmpegVideoEncoder, encoded in-process through PyAV."""
+
+    CODECS = {"mp4": "libx264", "webm": "libvpx-vp9"}
+
+    def __init__(self, output: str, frame_duration_ms: float, video_format: str, crf: int = VIDEO_CRF):
+        self.output = output
+        self.frame_duration_ms = frame_duration_ms
+        self.video_format = video_format
+        self.crf = crf
+        self.frame_count = 0
+        self._container = None
+        self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _start(self, width: int, height: int):
+        fps = Fraction(1000 / self.frame_duration_ms).limit_denominator(1001)
+        self._container = av.open(self.output, mode="w")
+        self._stream = self._container.add_stream(self.CODECS[self.video_format], rate=fps)
+        self._stream.width = width + width % 2
+        self._stream.height = height + height % 2
+        self._stream.pix_fmt = "yuv420p"
+        self._stream.options = {"crf": str(self.crf)}
+
+    def add_frame(self, frame: Image.Image):
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        if self._container is None:
+            self._start(*frame.size)
+        if frame.size != (self._stream.width, self._stream.height):
+            padded = Image.new("RGB", (self._stream.width, self._stream.height))
+            padded.paste(frame)
+            frame = padded
+        for packet in self._stream.encode(av.VideoFrame.from_image(frame)):
+            self._container.mux(packet)
+        self.frame_count += 1
+
+    def close(self):
+        if self._container is None:
+            return
+        container, self._container = self._container, None
+        try:
+            for packet in self._stream.encode(None):
+                container.mux(packet)
+        finally:
+            container.close()
+
+
+def video_backend() -> str | None:
+    """Video backend in use: "pyav", "ffmpeg", or None when neither is installed."""
+    if av is not None:
+        return "pyav"
+    if shutil.which(FFMPEG_BINARY):
+        return "ffmpeg"
+    return None
+
+
+def available_formats() -> list[str]:
+    if video_backend() is None:
+        return [f for f in OUTPUT_FORMATS if f not in VIDEO_FORMATS]
+    return list(OUTPUT_FORMATS)
+
+
+def make_encoder(output_format: str, output, frame_duration_ms: float, palette_mode: str = "global"):
+    """
+    Encoder for `output_format` with the StreamingGifEncoder interface (add_frame, close,
+    frame_count), so every format shares the same capture pipeline and BackgroundEncoder.
+    palette_mode only applies to GIF.
+    """
+    if output_format == "gif":
+        return StreamingGifEncoder(output, frame_duration_ms, loop=0, palette_mode=palette_mode)
+    if output_format == "webp":
+        return PillowAnimationEncoder(output, frame_duration_ms, "WEBP", quality=WEBP_QUALITY, method=4)
+    if output_format == "apng":
+        return PillowAnimationEncoder(output, frame_duration_ms, "PNG")
+    if output_format in VIDEO_FORMATS:
+        backend = video_backend()
+        if backend == "pyav":
+            return PyAVVideoEncoder(output, frame_duration_ms, output_format)
+        if backend == "ffmpeg":
+            return FfmpegVideoEncoder(output, frame_duration_ms, output_format)
+        raise ValueError(f"Format '{output_format}' needs PyAV or an ffmpeg binary ({FFMPEG_BINARY}) on this host")
+    raise ValueError(f"Unknown output format '{output_format}', expected one of {tuple(OUTPUT_FORMATS)}")
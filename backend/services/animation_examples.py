@@ -1,5 +1,10 @@
+import math
+import time
 from functools import lru_cache
-from difflib import get_close_matches
+try:
+    from .prompt_text import normalize_prompt
+except (ImportError, ValueError):
+    from prompt_text import normalize_prompt
 
 EXAMPLES = {
     "bouncing": """
@@ -835,78 +840,159 @@ Complete Code:
 }
 
 
-@lru_cache(maxsize=100)
-def get_relevant_examples(user_prompt: str, max_examples: int = 2) -> str:
+# Keywords that select each example, on top of the words in its title and user request
+EXAMPLE_KEYWORDS = {
+    "bouncing": ["bounce", "bouncing", "ball", "jump"],
+    "rotating": ["rotate", "rotating", "spin", "spinning", "turn"],
+    "particles": ["particle", "particles", "dots", "floating random"],
+    "typing": ["type", "typing", "typewriter", "letter by letter"],
+    "wave": ["wave", "waves", "wavy", "sine", "ocean"],
+    "neon": ["neon", "glow", "glowing", "cyberpunk", "futuristic"],
+    "3d_cube": ["3d", "cube", "box", "three dimensional"],
+    "loading": ["loading", "spinner", "loader", "loading animation"],
+    "gradient": ["gradient", "background", "animated background"],
+    "pulse": ["pulse", "pulsing", "breathing", "breath", "heartbeat"],
+    "gsap_timeline": ["sequence", "timeline", "multiple elements", "one after another"],
+    "text_reveal": ["reveal", "text reveal", "fade in text", "appearing text"],
+    "morphing": ["morph", "morphing", "shape change", "transform shape"],
+    "floating": ["floating", "float", "levitate"],
+    "confetti": ["confetti", "falling", "celebration"]
+}
+
+# Returned when nothing in the prompt matches: the most versatile examples
+DEFAULT_EXAMPLES = ["bouncing", "rotating"]
+
+# A keyword counts this many times as often as a word from the example's title or request
+KEYWORD_WEIGHT = 3
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Unknown prompt words are matched to the index term with the most similar trigrams, if at least this similar
+FUZZY_CUTOFF = 0.5
+
+_SUFFIXES = ("ing", "ed", "es", "s", "e")
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so "bounce", "bouncing" and "bounces" share a term."""
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                stripped = True
+                break
+    # "spinning" -> "spinn" -> "spin"
+    if len(word) > 3 and word[-1] == word[-2]:
+        word = word[:-1]
+    return word
+
+
+def _terms(text: str) -> list[str]:
+    return [_stem(word) for word in normalize_prompt(text).split()]
+
+
+def _trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ExampleIndex:
     """
-    Select the most relevant examples based on user prompt keywords with fuzzy matching.
+    BM25 index over the examples, built once.
+
+    Each example is indexed by its keywords (weighted by KEYWORD_WEIGHT) and the words of its title
+    and user request, normalized and stemmed. Prompt words that are not index terms (typos,
+    inflections the stemmer misses) are looked up in a trigram index and scored as the closest
+    term, scaled by how close it is.
     """
-    prompt_lower = user_prompt.lower()
-    prompt_words = prompt_lower.split()
-    
-    # Keyword matching for example selection
-    keywords_map = {
-        "bouncing": ["bounce", "bouncing", "ball", "jump"],
-        "rotating": ["rotate", "rotating", "spin", "spinning", "turn"],
-        "particles": ["particle", "particles", "dots", "floating random"],
-        "typing": ["type", "typing", "typewriter", "letter by letter"],
-        "wave": ["wave", "waves", "wavy", "sine", "ocean"],
-        "neon": ["neon", "glow", "glowing", "cyberpunk", "futuristic"],
-        "3d_cube": ["3d", "cube", "box", "three dimensional"],
-        "loading": ["loading", "spinner", "loader", "loading animation"],
-        "gradient": ["gradient", "background", "animated background"],
-        "pulse": ["pulse", "pulsing", "breathing", "breath", "heartbeat"],
-        "gsap_timeline": ["sequence", "timeline", "multiple elements", "one after another"],
-        "text_reveal": ["reveal", "text reveal", "fade in text", "appearing text"],
-        "morphing": ["morph", "morphing", "shape change", "transform shape"],
-        "floating": ["floating", "float", "levitate"],
-        "confetti": ["confetti", "falling", "celebration"]
-    }
-    
-    # Flatten keywords for fuzzy matching
-    all_keywords = []
-    for k_list in keywords_map.values():
-        all_keywords.extend(k_list)
-    
-    # Find matching examples
-    matches = []
-    for example_key, example_keywords in keywords_map.items():
-        # Direct matching first
-        if any(kw in prompt_lower for kw in example_keywords):
-            matches.append(example_key)
-            continue
-            
-        # Fuzzy matching for each word in prompt
-        for word in prompt_words:
-            if len(word) < 3: continue
-            fuzzy_matches = get_close_matches(word, example_keywords, n=1, cutoff=0.8)
-            if fuzzy_matches:
-                matches.append(example_key)
-                break
-    
-    # If no matches, return most versatile examples
-    if not matches:
-        matches = ["bouncing", "rotating"]
-    
-    # Limit to max_examples while preserving unique keys
-    unique_matches = []
-    for m in matches:
-        if m not in unique_matches:
-            unique_matches.append(m)
-    
-    unique_matches = unique_matches[:max_examples]
-    
-    # Format examples
+
+    def __init__(self, examples: dict[str, str], keywords: dict[str, list[str]]):
+        self.keys = [key for key in keywords if key in examples]
+        self.postings = {}
+        lengths = {}
+        for key in self.keys:
+            header = examples[key].split("Complete Code:", 1)[0].replace("**Example:", "").replace("User Request:", "")
+            terms = _terms(" ".join(keywords[key])) * KEYWORD_WEIGHT + _terms(header)
+            lengths[key] = len(terms)
+            for term in terms:
+                counts = self.postings.setdefault(term, {})
+                counts[key] = counts.get(key, 0) + 1
+        self.lengths = lengths
+        self.average_length = sum(lengths.values()) / max(1, len(lengths))
+
+        self.trigrams = {}
+        for term in self.postings:
+            for trigram in _trigrams(term):
+                self.trigrams.setdefault(trigram, set()).add(term)
+
+    def _idf(self, term: str) -> float:
+        matching = len(self.postings[term])
+        return math.log(1 + (len(self.keys) - matching + 0.5) / (matching + 0.5))
+
+    def closest_term(self, term: str) -> tuple[str | None, float]:
+        """The index term sharing the most trigrams with `term` (Jaccard similarity), if any."""
+        grams = _trigrams(term)
+        shared = {}
+        for trigram in grams:
+            for candidate in self.trigrams.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        best, best_similarity = None, 0.0
+        for candidate, count in shared.items():
+            similarity = count / (len(grams) + len(_trigrams(candidate)) - count)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        return best, best_similarity
+
+    def search(self, prompt: str) -> list[tuple[str, float]]:
+        """(example key, score) for every example that matches `prompt`, best first."""
+        scores = {}
+        for term in set(_terms(prompt)):
+            weight = 1.0
+            if term not in self.postings:
+                if len(term) < 3:
+                    continue
+                term, weight = self.closest_term(term)
+                if weight < FUZZY_CUTOFF:
+                    continue
+            idf = self._idf(term)
+            for key, count in self.postings[term].items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[key] / self.average_length)
+                scores[key] = scores.get(key, 0.0) + weight * idf * count * (BM25_K1 + 1) / (count + norm)
+        # Ties keep the examples' own order
+        order = {key: i for i, key in enumerate(self.keys)}
+        return sorted(scores.items(), key=lambda item: (-item[1], order[item[0]]))
+
+
+index = ExampleIndex(EXAMPLES, EXAMPLE_KEYWORDS)
+
+
+def rank_examples(user_prompt: str, max_examples: int = 2) -> list[str]:
+    """Keys of the examples most relevant to the prompt, most relevant first."""
+    matches = [key for key, _ in index.search(user_prompt)[:max_examples]]
+    return matches or DEFAULT_EXAMPLES[:max_examples]
+
+
+@lru_cache(maxsize=256)
+def _format_examples(keys: tuple[str, ...]) -> str:
     examples_text = "\n\nRELEVANT EXAMPLES FOR REFERENCE:\n"
     examples_text += "=" * 50 + "\n"
     
-    for match in unique_matches:
-        if match in EXAMPLES:
-            examples_text += EXAMPLES[match] + "\n"
-            examples_text += "=" * 50 + "\n"
+    for key in keys:
+        examples_text += EXAMPLES[key] + "\n"
+        examples_text += "=" * 50 + "\n"
     
     return examples_text
 
 
+def get_relevant_examples(user_prompt: str, max_examples: int = 2) -> str:
+    """
+    Select the most relevant examples for the prompt, ranked by BM25 relevance (see ExampleIndex).
+    """
+    return _format_examples(tuple(rank_examples(user_prompt, max_examples)))
+
+
 if __name__ == "__main__":
     # Test example selection
     test_prompts = [
@@ -918,6 +1004,8 @@ if __name__ == "__main__":
     
     print("Testing Example Selection:\n")
     for prompt in test_prompts:
+        started = time.perf_counter()
+        ranked = index.search(prompt)
+        elapsed = time.perf_counter() - started
         print(f"Prompt: {prompt}")
-        examples = get_relevant_examples(prompt, max_examples=1)
-        print(f"Selected examples: {len(examples)} characters\n")
+        print(f"Ranked: {', '.join(f'{key} ({score:.1f})' for key, score in ranked)} in {elapsed * 1e6:.0f}us\n")
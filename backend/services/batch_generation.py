@@ -0,0 +1,111 @@
+import os
+import time
+import asyncio
+from services.gif_jobs import gif_jobs, GIF_JOB_QUEUE_SIZE
+from services.llm_providers import LLM_PROVIDER
+
+# Generations running at once for one batch, unless the request asks for fewer
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+BATCH_MAX_PROMPTS = int(os.getenv("BATCH_MAX_PROMPTS", "500"))
+# Batch renders start after waiting interactive /gif-jobs renders (priority 5 by default), and
+# all batches together hold at most BATCH_MAX_RENDERS jobs (queued or running), so the rest of the
+# GIF_JOB_QUEUE_SIZE queue stays free for interactive submits instead of answering them with 429
+BATCH_GIF_PRIORITY = 9
+BATCH_MAX_RENDERS = int(os.getenv("BATCH_MAX_RENDERS", str(max(1, GIF_JOB_QUEUE_SIZE // 4))))
+render_slots = asyncio.Semaphore(BATCH_MAX_RENDERS)
+
+# Generations per minute each provider accepts across all batches (0 = unlimited), in bursts of
+# up to LLM_RATE_LIMIT_BURST. LLM_REQUESTS_PER_MINUTE overrides the active provider's limit.
+PROVIDER_REQUESTS_PER_MINUTE = {"groq": 30, "gemini": 10, "local": 0}
+if os.getenv("LLM_REQUESTS_PER_MINUTE"):
+    PROVIDER_REQUESTS_PER_MINUTE[LLM_PROVIDER] = float(os.getenv("LLM_REQUESTS_PER_MINUTE"))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "4"))
+
+
+class RateLimiter:
+    """
+    Spaces out acquisitions to `per_minute`, allowing bursts of up to `burst` after idle time.
+    Each caller reserves the next free slot before sleeping (a GCRA), so there is no lock and
+    concurrent callers are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float, burst: int = LLM_RATE_LIMIT_BURST, clock=time.monotonic):
+        self.per_minute = per_minute
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._next_slot = float("-inf")
+
+    async def acquire(self):
+        if self.per_minute <= 0:
+            return
+        interval = 60.0 / self.per_minute
+        now = self.clock()
+        slot = max(self._next_slot, now - (self.burst - 1) * interval)
+        self._next_slot = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_rate_limiters = {}
+
+
+def rate_limiter_for(provider_name: str) -> RateLimiter:
+    """The RateLimiter shared by every batch that generates with this provider."""
+    if provider_name not in _rate_limiters:
+        _rate_limiters[provider_name] = RateLimiter(PROVIDER_REQUESTS_PER_MINUTE.get(provider_name, 0))
+    return _rate_limiters[provider_name]
+
+
+async def render_gif(html: str, gif_options: dict) -> dict:
+    """
+    Renders through the /gif-jobs queue, waiting for one of the render_slots and then for room in
+    the queue; returns the job's status.
+    """
+    async with render_slots:
+        job = await gif_jobs.submit_waiting({"html_content": html, **gif_options}, priority=BATCH_GIF_PRIORITY)
+        await job.wait()
+    status = {"job_id": job.id, "status": job.status, "cache": job.cache_status, "error": job.error}
+    if job.status == "done":
+        status["result_url"] = f"/gif-jobs/{job.id}/result"
+    return status
+
+
+async def generate_batch(prompts: list[str], generate, concurrency: int = BATCH_CONCURRENCY,
+                         rate_limiter: RateLimiter | None = None, gif_options: dict | None = None):
+    """
+    Generates every prompt with `await generate(prompt)`, at most `concurrency` at a time and no
+    faster than `rate_limiter` allows, and yields one result per prompt as soon as it is ready:
+
+        {"index", "prompt", "status": "ok" | "error", "generated_html" | "error", "seconds"[, "gif"]}
+
+    With `gif_options` (keyword arguments for get_or_generate_gif), each generated animation is
+    also rendered and its result carries the render's job status. Renders don't hold a generation
+    slot, so generation keeps going while earlier animations render.
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, prompt: str) -> dict:
+        started = time.perf_counter()
+        result = {"index": index, "prompt": prompt}
+        try:
+            async with slots:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire()
+                generated_html = await generate(prompt)
+            result.update(status="ok", generated_html=generated_html)
+            if gif_options is not None:
+                result["gif"] = await render_gif(generated_html, gif_options)
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    tasks = [asyncio.ensure_future(run(index, prompt)) for index, prompt in enumerate(prompts)]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        # The client went away: stop generating for it
+        for task in tasks:
+            task.cancel()
@@ -1,15 +1,17 @@
-import os
-import re
-import google.generativeai as genai
 from dotenv import load_dotenv
+try:
+    from .html_scanner import scan_html
+    from .llm_providers import GeminiProvider
+except (ImportError, ValueError):
+    from html_scanner import scan_html
+    from llm_providers import GeminiProvider
 
 load_dotenv()
 
-# Configure Gemini with API key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Standalone Gemini generation with its own prompt. The API's generation path can use Gemini
+# too, through LLM_PROVIDER=gemini (see services/llm_providers.py).
+provider = GeminiProvider()
 
-# Use Gemini 1.5 Pro for best instruction following and complex reasoning
-# Setup the model with system instructions
 SYSTEM_PROMPT = """You are an Expert Creative Coder and Frontend Engineer specialized in creating award-winning, high-performance HTML/CSS/JS animations.
 
 YOUR GOAL:
@@ -58,10 +60,7 @@ OUTPUT FORMAT:
 </html>
 """
 
-model = genai.GenerativeModel(
-    model_name="gemini-3-pro-preview", # Upgraded to Pro for better reasoning
-    system_instruction=SYSTEM_PROMPT
-)
+MODEL = "gemini-3-pro-preview"  # Upgraded to Pro for better reasoning
 
 def generate_animation(user_prompt: str) -> str:
     """Generate HTML animation code from a text description using Google Gemini."""
@@ -76,55 +75,13 @@ def generate_animation(user_prompt: str) -> str:
         
         full_prompt = f"{enhanced_prompt}\n\nOutput ONLY the complete HTML code starting with <!DOCTYPE html>."
         
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=8192,
-                temperature=0.4,
-            )
-        )
+        raw_response = provider.complete(SYSTEM_PROMPT, full_prompt, MODEL)
 
-        if not response.text:
+        if not raw_response:
             raise ValueError("Empty response from Gemini")
 
-        raw_response = response.text
-
-        # Clean response: strip markdown code fences if present
-        cleaned = raw_response.strip()
-        # Remove any text before <!DOCTYPE or <html
-        doctype_match = re.search(r'<!DOCTYPE\s+html', cleaned, re.IGNORECASE)
-        html_match = re.search(r'<html', cleaned, re.IGNORECASE)
-        start_match = doctype_match or html_match
-        if start_match:
-            cleaned = cleaned[start_match.start():]
-
-        # Remove any text after </html>
-        html_end = re.search(r'</html\s*>', cleaned, re.IGNORECASE)
-        if html_end:
-            cleaned = cleaned[:html_end.end()]
-
-        # Fallback: strip markdown fences
-        cleaned = re.sub(r"^```(?:html)?\s*\n?", "", cleaned)
-        cleaned = re.sub(r"\n?```\s*$", "", cleaned)
-        cleaned = cleaned.strip()
-
-        # Validate that it contains HTML
-        if "<html" not in cleaned.lower() and "<body" not in cleaned.lower():
-            # If valid HTML structure is missing, wrap it
-             cleaned = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Animation</title>
-</head>
-<body>
-{cleaned}
-</body>
-</html>"""
-
-        return cleaned
+        # Same extraction as the Groq path: drops fences and surrounding text, wraps bare fragments
+        return scan_html(raw_response).html
 
     except Exception as e:
         raise RuntimeError(f"Gemini API error: {str(e)}")
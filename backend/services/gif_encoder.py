@@ -0,0 +1,272 @@
+import os
+import time
+import queue
+import threading
+import numpy as np
+from PIL import Image, GifImagePlugin
+from services.gif_palette import PaletteMapper, median_cut, sample_pixels
+
+
+PALETTE_MODES = ("adaptive", "global", "global_dither")
+
+# Palette slot reserved for "unchanged since the previous frame" pixels in delta frames
+TRANSPARENT_INDEX = 255
+
+# Global palettes: pixels per frame checked for how well the palette still fits, and how much
+# worse (in 8-bit levels, 99th percentile) a frame may map than the frames the palette was built from
+PALETTE_CHECK_SAMPLES = 4096
+PALETTE_REBUILD_ERROR = 16
+
+
+def _changed_bbox(changed: np.ndarray) -> tuple[int, int, int, int]:
+    """Bounding box (left, top, right, bottom) of the True pixels in a 2D mask."""
+    rows = np.flatnonzero(changed.any(axis=1))
+    cols = np.flatnonzero(changed.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def iter_raw_frames(path: str, width: int, height: int):
+    """Reads back a file of raw RGB frames written back to back (see render_frames)."""
+    frame_bytes = width * height * 3
+    with open(path, "rb") as f:
+        while chunk := f.read(frame_bytes):
+            yield Image.frombytes("RGB", (width, height), chunk)
+
+
+class StreamingGifEncoder:
+    """
+    Writes an animated GIF one frame at a time.
+
+    Each frame is quantized and LZW-encoded as soon as it is added and written straight to the
+    output file, so memory stays bounded no matter how long the animation is.
+    Frame delays are tracked against the ideal timeline so that e.g. 30fps averages 33.3ms per
+    frame instead of being truncated to 30ms (GIF delays are whole centiseconds).
+
+    Palette modes:
+        adaptive:      Pillow quantizes every frame to its own local palette.
+        global:        One median-cut palette built from the first `palette_window` frames is
+                       shared by the whole animation (no palette flicker, no per-frame quantize).
+                       Every frame is checked against it; when colors appear that it doesn't
+                       cover (a fade-in, a new object), a new palette is built from the next
+                       `palette_window` frames and carried as a local color table from there on.
+        global_dither: Same as global, with an ordered (Bayer) dither to hide banding.
+
+    With `delta` enabled each frame is diffed against the previous one: only the bounding box of
+    changed pixels is stored, unchanged pixels inside it become transparent (disposal 1 keeps
+    the previous frame underneath), and identical frames are merged into a longer delay.
+    """
+
+    def __init__(self, output, frame_duration_ms: float, loop: int = 0, disposal: int = 2,
+                 palette_mode: str = "global", palette_window: int = 16, delta: bool = True):
+        if palette_mode not in PALETTE_MODES:
+            raise ValueError(f"Unknown palette mode '{palette_mode}', expected one of {PALETTE_MODES}")
+        self.output = output
+        self.frame_duration_ms = frame_duration_ms
+        self.loop = loop
+        self.disposal = disposal
+        self.palette_mode = palette_mode
+        self.palette_window = max(palette_window, 1)
+        self.delta = delta
+        self.frame_count = 0  # Frames added
+        self.written_frames = 0  # Frames actually stored in the GIF (after merging)
+        self._fp = None
+        self._owns_fp = False
+        self._elapsed_cs = 0
+        self._mapper = None
+        self._mapping_error = 0  # Worst error of the frames the current palette was built from
+        self._check_pixels = None  # Flat pixel positions sampled for the mapping error
+        self.palettes_built = 0
+        self._window = []  # Frames held back until the global palette is built
+        self._previous = None  # Last frame (RGB or palette indices) for delta comparison
+        self._pending = None  # Frame waiting for its duration to be known
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _delay_until_ms(self, end_frame: int) -> int:
+        # Delay that keeps the cumulative time on the ideal (end_frame * interval) timeline
+        target_cs = round(end_frame * self.frame_duration_ms / 10)
+        delay_cs = max(target_cs - self._elapsed_cs, 1)
+        self._elapsed_cs += delay_cs
+        return delay_cs * 10
+
+    def _write_header(self, paletted: Image.Image):
+        if isinstance(self.output, (str, bytes, os.PathLike)):
+            self._fp = open(self.output, "wb")
+            self._owns_fp = True
+        else:
+            self._fp = self.output
+        header, _ = GifImagePlugin.getheader(paletted, info={"loop": self.loop})
+        for block in header:
+            self._fp.write(block)
+
+    def _write_frame(self, paletted: Image.Image, offset: tuple[int, int], params: dict):
+        if self._fp is None:
+            self._write_header(paletted)
+
+        for block in GifImagePlugin.getdata(paletted, offset, **params):
+            self._fp.write(block)
+        self.written_frames += 1
+
+    def _frame_error(self, pixels: np.ndarray, indices: np.ndarray) -> float:
+        """99th percentile of how far (max channel difference) sampled pixels end up from their color."""
+        if self._check_pixels is None:
+            count = pixels.shape[0] * pixels.shape[1]
+            self._check_pixels = np.linspace(0, count - 1, min(count, PALETTE_CHECK_SAMPLES)).astype(np.intp)
+        actual = pixels.reshape(-1, 3)[self._check_pixels].astype(np.int16)
+        mapped = self._mapper.palette[indices.reshape(-1)[self._check_pixels]]
+        return float(np.percentile(np.abs(actual - mapped).max(axis=1), 99))
+
+    def _flush_window(self):
+        """Build the shared palette from the buffered frames and encode them in one batch."""
+        colors = 255 if self.delta else 256
+        palette = median_cut(sample_pixels(self._window), colors=colors)
+        self._mapper = PaletteMapper(palette, dither=self.palette_mode == "global_dither")
+        frames = np.stack(self._window)
+        indices = self._mapper.map(frames)
+        self._mapping_error = max(self._frame_error(f, i) for f, i in zip(frames, indices))
+        self._window = []
+        if self.palettes_built:
+            # Indices into the previous palette can't be compared with these: start with a full frame
+            self._previous = None
+        self.palettes_built += 1
+        for frame_indices in indices:
+            self._add(frame_indices)
+
+    def _add(self, frame: np.ndarray):
+        """Queue a frame (RGB pixels in adaptive mode, palette indices otherwise)."""
+        index = self.frame_count
+        self.frame_count += 1
+
+        changed = None
+        bbox = (0, 0, frame.shape[1], frame.shape[0])
+        if self.delta and self._previous is not None:
+            changed = frame != self._previous
+            if changed.ndim == 3:
+                changed = changed.any(axis=2)
+            if not changed.any():
+                return  # Identical frame: the pending frame just lasts longer
+            bbox = _changed_bbox(changed)
+
+        self._flush_pending(index)
+        self._pending = (index, frame, changed, bbox, self._mapper)
+        self._previous = frame
+
+    def _flush_pending(self, end_frame: int):
+        if self._pending is None:
+            return
+        _, frame, changed, (left, top, right, bottom), mapper = self._pending
+        self._pending = None
+        crop = frame[top:bottom, left:right]
+
+        if self.palette_mode == "adaptive":
+            colors = 255 if changed is not None else 256
+            quantized = Image.fromarray(crop).convert("P", palette=Image.Palette.ADAPTIVE, colors=colors)
+            indices = np.array(quantized)
+            palette = bytes(quantized.getpalette()).ljust(768, b"\0")
+        else:
+            indices = crop.copy()
+            palette = mapper.palette_bytes()
+
+        params = {
+            "duration": self._delay_until_ms(end_frame),
+            "disposal": 1 if self.delta else self.disposal,
+            # Rebuilt global palettes differ from the one in the header
+            "include_color_table": self.palette_mode == "adaptive" or self.palettes_built > 1,
+        }
+        if changed is not None:
+            indices[~changed[top:bottom, left:right]] = TRANSPARENT_INDEX
+            params["transparency"] = TRANSPARENT_INDEX
+
+        paletted = Image.fromarray(indices)
+        paletted.putpalette(palette)
+        self._write_frame(paletted, (left, top), params)
+
+    def add_frame(self, frame: Image.Image):
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        pixels = np.asarray(frame)
+
+        if self.palette_mode == "adaptive":
+            self._add(pixels)
+        elif self._mapper is None:
+            self._window.append(pixels)
+            if len(self._window) >= self.palette_window:
+                self._flush_window()
+        else:
+            indices = self._mapper.map(pixels)
+            if self._frame_error(pixels, indices) > self._mapping_error + PALETTE_REBUILD_ERROR:
+                # Colors the palette wasn't built for: build a new one starting at this frame
+                self._mapper = None
+                self._window.append(pixels)
+            else:
+                self._add(indices)
+
+    def close(self):
+        if self._window:
+            self._flush_window()
+        self._flush_pending(self.frame_count)
+        if self._fp is None:
+            return
+        try:
+            self._fp.write(b";")  # GIF trailer
+            self._fp.flush()
+        finally:
+            if self._owns_fp:
+                self._fp.close()
+            self._fp = None
+
+
+class BackgroundEncoder:
+    """
+    Feeds an encoder from a bounded queue on its own thread, so encoding overlaps with capture.
+    `add_frame` blocks once `max_pending` frames are waiting, which keeps memory bounded when the
+    encoder is slower than capture. `encode_seconds` is the time spent inside the encoder itself.
+    """
+
+    _DONE = object()
+
+    def __init__(self, encoder, max_pending: int = 8):
+        self.encoder = encoder
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self.encode_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is self._DONE:
+                return
+            if self._error is not None:
+                continue  # Drain the queue so the producer never blocks on a dead encoder
+            started = time.perf_counter()
+            try:
+                self.encoder.add_frame(frame)
+            except Exception as e:
+                self._error = e
+            self.encode_seconds += time.perf_counter() - started
+
+    @property
+    def frame_count(self) -> int:
+        return self.encoder.frame_count
+
+    def add_frame(self, frame: Image.Image):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(frame)
+
+    def close(self):
+        self._queue.put(self._DONE)
+        self._thread.join()
+        started = time.perf_counter()
+        try:
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.encoder.close()
+            self.encode_seconds += time.perf_counter() - started
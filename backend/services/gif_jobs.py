@@ -0,0 +1,199 @@
+import os
+import time
+import uuid
+import asyncio
+import itertools
+from services import gif_service, metrics
+from services.render_pool import render_pool
+
+GIF_JOB_QUEUE_SIZE = int(os.getenv("GIF_JOB_QUEUE_SIZE", "20"))
+GIF_JOB_CONCURRENCY = int(os.getenv("GIF_JOB_CONCURRENCY", str(render_pool.size)))
+GIF_JOB_RESULT_TTL = float(os.getenv("GIF_JOB_RESULT_TTL", str(60 * 60)))
+
+# Used for Retry-After until a render has actually been timed
+DEFAULT_RENDER_SECONDS = 10.0
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the queue is at capacity; retry_after is a wait estimate in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"GIF job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class GifJob:
+    """One queued render and everything a client can poll about it."""
+
+    def __init__(self, params: dict, priority: int, sequence: int = 0):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.priority = priority
+        self.sequence = sequence
+        self.status = "queued"  # queued -> running -> done | failed
+        duration, fps = params.get("duration"), params.get("fps")
+        # Unknown until the probe has run when the timing is detected automatically
+        self.total_frames = round(duration * fps) if duration and fps else None
+        self.frames_captured = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result_path = None
+        self.cache_status = None
+        self.error = None
+        self._finished = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    async def wait(self):
+        """Returns once the job is done or failed (or was discarded at shutdown)."""
+        await self._finished.wait()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": {"frames_captured": self.frames_captured, "total_frames": self.total_frames},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cache": self.cache_status,
+            "error": self.error,
+        }
+
+
+class GifJobQueue:
+    """
+    Bounded priority queue of GIF renders drained by `concurrency` dispatchers.
+
+    Lower priority numbers run first; equal priorities run in submission order. Once
+    `max_queued` jobs are waiting, submit() raises JobQueueFull instead of accepting more work, so
+    a burst turns into 429s rather than an ever-growing backlog. Finished jobs (and their
+    result files) are kept for `result_ttl` seconds.
+    """
+
+    def __init__(self, max_queued: int = GIF_JOB_QUEUE_SIZE, concurrency: int = GIF_JOB_CONCURRENCY,
+                 result_ttl: float = GIF_JOB_RESULT_TTL):
+        self.max_queued = max_queued
+        self.concurrency = max(concurrency, 1)
+        self.result_ttl = result_ttl
+        self.jobs = {}
+        self._queue = None
+        self._dispatchers = []
+        self._sequence = itertools.count()
+        self._render_seconds = DEFAULT_RENDER_SECONDS  # Moving average, for Retry-After
+
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+
+    def start(self):
+        if self.started:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_queued)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.concurrency)]
+
+    async def shutdown(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        self._queue = None
+        for job in list(self.jobs.values()):
+            self._discard(job)
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up: one render spread over the dispatchers."""
+        return max(1, round(self._render_seconds / self.concurrency))
+
+    def submit(self, params: dict, priority: int = 5) -> GifJob:
+        """Queue a render (keyword arguments for get_or_generate_gif) and return its job."""
+        self.start()
+        self._purge_expired()
+        job = GifJob(params, priority, next(self._sequence))
+        try:
+            self._queue.put_nowait((priority, job.sequence, job))
+        except asyncio.QueueFull:
+            raise JobQueueFull(self.retry_after())
+        self.jobs[job.id] = job
+        return job
+
+    async def submit_waiting(self, params: dict, priority: int = 5) -> GifJob:
+        """Like submit(), but waits for room in the queue instead of raising JobQueueFull."""
+        self.start()
+        self._purge_expired()
+        job = GifJob(params, priority, next(self._sequence))
+        await self._queue.put((priority, job.sequence, job))
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> GifJob | None:
+        self._purge_expired()
+        return self.jobs.get(job_id)
+
+    def count(self, status: str) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == status)
+
+    def queued_ahead(self, job: GifJob) -> int:
+        """How many waiting jobs will start before this one."""
+        if job.status != "queued":
+            return 0
+        return sum(1 for other in self.jobs.values()
+                   if other.status == "queued" and (other.priority, other.sequence) < (job.priority, job.sequence))
+
+    async def _dispatch(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: GifJob):
+        job.status = "running"
+        job.started_at = time.time()
+
+        def on_progress(frames):
+            job.frames_captured = frames
+
+        try:
+            path, cache_status = await gif_service.get_or_generate_gif(**job.params, on_progress=on_progress)
+        except Exception as e:
+            print(f"GIF job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.status = "done"
+            job.result_path = path
+            job.cache_status = cache_status
+            job.total_frames = job.total_frames or job.frames_captured
+            job.frames_captured = job.total_frames
+            if cache_status != "HIT":
+                elapsed = time.time() - job.started_at
+                self._render_seconds = 0.8 * self._render_seconds + 0.2 * elapsed
+        job.finished_at = time.time()
+        job._finished.set()
+
+    def _discard(self, job: GifJob):
+        self.jobs.pop(job.id, None)
+        job._finished.set()
+        # Results are the job's own files (cached renders come pinned)
+        if job.result_path:
+            try:
+                os.remove(job.result_path)
+            except OSError:
+                pass
+
+    def _purge_expired(self):
+        now = time.time()
+        for job in list(self.jobs.values()):
+            if job.finished and now - job.finished_at > self.result_ttl:
+                self._discard(job)
+
+
+gif_jobs = GifJobQueue()
+metrics.GIF_JOBS_QUEUED.set_function(lambda: gif_jobs.count("queued"))
+metrics.GIF_JOBS_RUNNING.set_function(lambda: gif_jobs.count("running"))
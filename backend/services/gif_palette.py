@@ -0,0 +1,117 @@
+import numpy as np
+
+# Bits kept per channel in the color lookup table (32x32x32 cells)
+LUT_BITS = 5
+MAX_PALETTE_SAMPLES = 65536
+# LUT cells whose palette distances are computed at once (4096 x 256 colors = 4MB)
+LUT_CHUNK_CELLS = 4096
+
+# 4x4 Bayer matrix, normalized to [-0.5, 0.5)
+BAYER_4X4 = (np.array([
+    [0, 8, 2, 10],
+    [12, 4, 14, 6],
+    [3, 11, 1, 9],
+    [15, 7, 13, 5],
+], dtype=np.float32) / 16.0) - 0.5
+
+# Peak-to-peak dither amplitude in 8-bit levels (about one LUT cell)
+DITHER_STRENGTH = 1 << (8 - LUT_BITS)
+
+
+def sample_pixels(frames: list[np.ndarray], max_samples: int = MAX_PALETTE_SAMPLES, seed: int = 0) -> np.ndarray:
+    """
+    Draw up to `max_samples` RGB pixels spread evenly across `frames` (HxWx3 uint8 arrays).
+    Sampling is seeded so the same frames always produce the same palette.
+    """
+    rng = np.random.default_rng(seed)
+    per_frame = max(max_samples // max(len(frames), 1), 1)
+    samples = []
+    for frame in frames:
+        pixels = frame.reshape(-1, 3)
+        if len(pixels) > per_frame:
+            pixels = pixels[rng.choice(len(pixels), per_frame, replace=False)]
+        samples.append(pixels)
+    return np.concatenate(samples)
+
+
+def median_cut(pixels: np.ndarray, colors: int = 256) -> np.ndarray:
+    """
+    Build a palette of at most `colors` entries from an Nx3 uint8 pixel sample.
+    Repeatedly splits the box with the widest channel range at its median along that channel;
+    each palette entry is the mean color of one box.
+    """
+    pixels = np.asarray(pixels, dtype=np.uint8).reshape(-1, 3)
+    if len(pixels) == 0:
+        return np.zeros((1, 3), dtype=np.uint8)
+
+    def spread(box):
+        ranges = box.max(axis=0).astype(np.int32) - box.min(axis=0)
+        channel = int(np.argmax(ranges))
+        return int(ranges[channel]), channel
+
+    boxes = [(pixels, *spread(pixels))]
+    while len(boxes) < colors:
+        index = max(range(len(boxes)), key=lambda i: (boxes[i][1], len(boxes[i][0])))
+        box, box_range, channel = boxes[index]
+        if box_range == 0:
+            break  # Every remaining box is a single color
+        values = box[:, channel]
+        median = np.median(values)
+        # Split on a value boundary so one color never ends up in both halves
+        below = values < median if (values < median).any() else values <= median
+        low, high = box[below], box[~below]
+        boxes[index] = (low, *spread(low))
+        boxes.append((high, *spread(high)))
+
+    return np.array([box.mean(axis=0) for box, _, _ in boxes]).round().astype(np.uint8)
+
+
+class PaletteMapper:
+    """
+    Maps RGB frames onto a fixed palette using a precomputed nearest-color lookup table.
+    Building the table costs a (chunked) matrix product over 32^3 cells; after that mapping is a single
+    vectorized gather per batch of frames.
+    """
+
+    def __init__(self, palette: np.ndarray, dither: bool = False):
+        self.palette = np.asarray(palette, dtype=np.uint8).reshape(-1, 3)
+        self.dither = dither
+        self.lut = self._build_lut(self.palette)
+
+    @staticmethod
+    def _build_lut(palette: np.ndarray) -> np.ndarray:
+        levels = 1 << LUT_BITS
+        step = 256 // levels
+        centers = np.arange(levels, dtype=np.int32) * step + step // 2
+        r, g, b = np.meshgrid(centers, centers, centers, indexing="ij")
+        cells = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+
+        # |cell - color|^2 = |cell|^2 - 2 cell.color + |color|^2, and |cell|^2 doesn't change the argmin.
+        # Every term is an integer below 2^24, so float32 is exact; chunks keep the distance matrix small.
+        pal = palette.astype(np.float32)
+        norms = (pal * pal).sum(axis=1)
+        lut = np.empty(len(cells), dtype=np.uint8)
+        for start in range(0, len(cells), LUT_CHUNK_CELLS):
+            chunk = cells[start:start + LUT_CHUNK_CELLS].astype(np.float32)
+            lut[start:start + LUT_CHUNK_CELLS] = np.argmin(norms - 2 * (chunk @ pal.T), axis=1)
+        return lut
+
+    def map(self, frames: np.ndarray) -> np.ndarray:
+        """Map uint8 RGB pixels (any leading shape, last axis = 3) to palette indices."""
+        frames = np.asarray(frames)
+        if self.dither:
+            height, width = frames.shape[-3], frames.shape[-2]
+            tiles = (-(-height // 4), -(-width // 4))
+            threshold = np.tile(BAYER_4X4, tiles)[:height, :width, None] * DITHER_STRENGTH
+            values = np.clip(frames.astype(np.float32) + threshold, 0, 255).astype(np.uint8)
+        else:
+            values = frames
+
+        shift = 8 - LUT_BITS
+        q = (values >> shift).astype(np.int32)
+        return self.lut[(q[..., 0] << (2 * LUT_BITS)) | (q[..., 1] << LUT_BITS) | q[..., 2]]
+
+    def palette_bytes(self, size: int = 256) -> bytes:
+        padded = np.zeros((size, 3), dtype=np.uint8)
+        padded[:len(self.palette)] = self.palette
+        return padded.tobytes()
@@ -1,69 +1,228 @@
 import os
+import time
 import asyncio
 import tempfile
-import sys
-import subprocess
-from fastapi import HTTPException
+from services import metrics
+from services.render_pool import render_pool
+from services.render_cache import RenderCache, render_cache_key
+from services.single_flight import SingleFlight
+from services.gif_encoder import iter_raw_frames
+from services.animation_encoders import OUTPUT_FORMATS, make_encoder
 
-# Path to the standalone script
-SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "generate_gif_standalone.py")
+# Split each render's timeline across this many pool workers (1 = capture sequentially in one page)
+CAPTURE_SLICES = int(os.getenv("GIF_CAPTURE_SLICES", "1"))
+# Pick duration/fps from a probe of the animation when the caller leaves them unset
+AUTO_TIMING = os.getenv("GIF_AUTO_TIMING", "1") == "1"
+DEFAULT_DURATION = 3
+DEFAULT_FPS = 30
 
-async def generate_gif_from_html(html_content: str, width: int = 600, height: int = 400, duration: int = 3, fps: int = 30) -> str:
+render_cache = RenderCache()
+_render_flight = SingleFlight()
+# A finished render can be evicted by other renders before every request waiting for it has
+# pinned it (only when the cache is smaller than a burst of renders); it is rendered again
+PIN_ATTEMPTS = 3
+
+
+def split_frames(total_frames: int, slices: int) -> list[tuple[int, int]]:
+    """Splits frames [0, total_frames) into at most `slices` contiguous, nearly equal ranges."""
+    slices = max(1, min(slices, total_frames))
+    bounds = [round(i * total_frames / slices) for i in range(slices + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def encode_frame_slices(slices: list[tuple[str, dict]], output_path: str, fps: int, palette_mode: str,
+                        output_format: str = "gif") -> int:
+    """Encodes captured slices (raw frame file, capture stats) into one animation, in order."""
+    with make_encoder(output_format, output_path, 1000.0 / fps, palette_mode) as encoder:
+        for path, stats in slices:
+            for frame in iter_raw_frames(path, stats["width"], stats["height"]):
+                encoder.add_frame(frame)
+    return encoder.frame_count
+
+
+async def probe_animation(html_content: str, width: int, height: int) -> dict | None:
+    """Runs a probe pass on a worker (timing and motion area, see probe_timing); None if it fails."""
+    try:
+        return await render_pool.probe({"html": html_content, "width": width, "height": height})
+    except Exception as e:
+        print(f"Animation probe failed: {e}")
+        return None
+
+
+async def resolve_timing(html_content: str, width: int, height: int, duration: float | None, fps: int | None,
+                         probe: dict | None = None) -> tuple[float, int]:
+    """
+    Fills in an unset duration and/or fps from a probe pass (loop length, smoothest low fps).
+    An existing `probe` result is reused instead of running another one.
+    Falls back to the fixed defaults when auto timing is off or the probe fails.
+    """
+    if duration is not None and fps is not None:
+        return duration, fps
+    timing = None
+    if AUTO_TIMING:
+        timing = probe or await probe_animation(html_content, width, height)
+    if timing:
+        print(f"Detected timing: {timing['duration']:.2f}s at {timing['fps']}fps (loop: {timing.get('loop_seconds')})")
+    else:
+        print(f"Using default timing: {DEFAULT_DURATION}s at {DEFAULT_FPS}fps")
+        timing = {"duration": DEFAULT_DURATION, "fps": DEFAULT_FPS}
+    return (duration if duration is not None else timing["duration"]), (fps if fps is not None else timing["fps"])
+
+
+async def _render_in_slices(job: dict, slices: int, on_progress=None) -> dict:
+    """
+    Captures disjoint slices of the timeline on several workers at once, then encodes them here.
+    The virtual clock makes every frame a pure function of its index, so the result is the same
+    GIF a single worker would produce.
+    """
+    total_frames = round(job["duration"] * job["fps"])
+    paths = []
+    captured = {}  # slice index -> frames captured so far
+
+    def slice_progress(index):
+        def report(frames):
+            captured[index] = frames
+            on_progress(sum(captured.values()))
+        return report if on_progress is not None else None
+
+    try:
+        captures = []
+        for index, (start_frame, end_frame) in enumerate(split_frames(total_frames, slices)):
+            fd, path = tempfile.mkstemp(suffix=".rgb")
+            os.close(fd)
+            paths.append(path)
+            slice_job = dict(job, output=path, start_frame=start_frame, end_frame=end_frame)
+            captures.append(render_pool.capture(slice_job, slice_progress(index)))
+        results = await asyncio.gather(*captures)
+
+        encode_started = time.perf_counter()
+        frames = await asyncio.to_thread(encode_frame_slices, list(zip(paths, results)), job["output"], job["fps"],
+                                         job["palette_mode"], job["format"])
+        encode_seconds = time.perf_counter() - encode_started
+        if frames == 0:
+            raise RuntimeError("No frames captured")
+        return {
+            # Capture runs in parallel, encoding only starts once every slice is in
+            "render_seconds": max(r.get("render_seconds", 0) for r in results) + encode_seconds,
+            "encode_seconds": encode_seconds,
+            # Every slice loads the same page, so each one sees the same requests
+            "blocked_requests": max(r.get("blocked_requests", 0) for r in results),
+            "slices": len(results),
+        }
+    finally:
+        for path in paths:
+            try: os.remove(path)
+            except OSError: pass
+
+
+async def generate_gif_from_html(html_content: str, width: int = 600, height: int = 400, duration: float | None = None, fps: int | None = None,
+                                 palette_mode: str = "global", slices: int = CAPTURE_SLICES, on_progress=None,
+                                 output_format: str = "gif", scale: float = 1.0, device_scale_factor: float = 1.0,
+                                 clip: dict | None = None, auto_crop: bool = False) -> str:
     """
-    Generates a GIF by calling a standalone subprocess script.
-    This architecture isolates Playwright from the main Uvicorn event loop, 
-    preventing "NotImplementedError" crashes on Windows.
+    Generates a GIF by submitting a job to the warm render pool.
+    Playwright runs in long-lived worker subprocesses (see services/render_pool.py), which keeps it
+    isolated from the main Uvicorn event loop (preventing "NotImplementedError" crashes on Windows)
+    without paying a Python + Chromium launch per request.
+
+    palette_mode is one of "adaptive", "global" or "global_dither" (see services/gif_encoder.py).
+    output_format is a key of OUTPUT_FORMATS (see services/animation_encoders.py); GIF by default.
+    duration and fps left as None are detected from the animation (see resolve_timing).
+    Only the `clip` rectangle ({"x", "y", "width", "height"} in CSS pixels) of the viewport is
+    captured, or with auto_crop the area the probe saw moving; frames are `scale` times that size
+    in device pixels (device_scale_factor per CSS pixel).
+    With slices > 1 the frames are captured in parallel on up to that many workers.
+    on_progress(frames_captured) is called (from a worker thread) as the capture advances.
     """
-    
-    # Create temp file for HTML input
-    # We use delete=False because the subprocess needs to read it. We clean up later.
-    fd_html, html_path = tempfile.mkstemp(suffix=".html", text=True)
-    with os.fdopen(fd_html, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-        
+
+    probe = None
+    if auto_crop and clip is None:
+        probe = await probe_animation(html_content, width, height)
+        # Static pages (and failed probes) have no motion to crop to and keep the full viewport
+        clip = probe.get("motion_clip") if probe else None
+    duration, fps = await resolve_timing(html_content, width, height, duration, fps, probe)
+
     # Create temp file for output GIF path
-    fd_gif, gif_path = tempfile.mkstemp(suffix=".gif")
-    os.close(fd_gif) # Subprocess will write to this
-    
+    fd_gif, gif_path = tempfile.mkstemp(suffix=OUTPUT_FORMATS[output_format]["extension"])
+    os.close(fd_gif) # Worker will write to this
+
     try:
-        # Construct command
-        cmd = [
-            sys.executable,
-            SCRIPT_PATH,
-            "--input", html_path,
-            "--output", gif_path,
-            "--width", str(width),
-            "--height", str(height),
-            "--duration", str(duration),
-            "--fps", str(fps)
-        ]
-        
-        print(f"Running standalone generator (threaded): {' '.join(cmd)}")
-        
-        # Run subprocess via thread pool to avoid blocking and bypass asyncio loop restrictions
-        # process = await asyncio.create_subprocess_exec(...) -> REPLACED
-        
-        def run_sync():
-            return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
-            
-        result = await asyncio.to_thread(run_sync)
-        
-        if result.returncode != 0:
-            print(f"Subprocess Error: {result.stderr}")
-            raise RuntimeError(f"GIF Generation Subprocess Failed: {result.stderr}")
-            
-        print(f"Subprocess finished successfully. Output GIF size: {os.path.getsize(gif_path)} bytes")
-        
+        job = {
+            "html": html_content,
+            "output": gif_path,
+            "width": width,
+            "height": height,
+            "duration": duration,
+            "fps": fps,
+            "palette_mode": palette_mode,
+            "format": output_format,
+            "scale": scale,
+            "device_scale_factor": device_scale_factor,
+            "clip": clip,
+        }
+        slices = min(slices, render_pool.size)
+        if slices > 1:
+            stats = await _render_in_slices(job, slices, on_progress)
+        else:
+            stats = await render_pool.render(job, on_progress)
+
+        output_bytes = os.path.getsize(gif_path)
+        metrics.RENDER_SECONDS.observe(stats.get("render_seconds", 0), format=output_format)
+        metrics.ENCODE_SECONDS.observe(stats.get("encode_seconds", 0), format=output_format)
+        metrics.OUTPUT_BYTES.observe(output_bytes, format=output_format)
+        print(f"Render finished in {stats.get('render_seconds', 0):.2f}s. Output {output_format.upper()} size: {output_bytes} bytes")
+        if stats.get("blocked_requests"):
+            print(f"Render blocked {stats['blocked_requests']} external request(s) from the page")
+
         return gif_path
 
     except Exception as e:
-        # Cleanup on failure (on success, route handler handles cleanup, but we can clean input html here)
+        # Cleanup on failure (on success, route handler handles cleanup)
         if os.path.exists(gif_path):
-             try: os.remove(gif_path) 
+             try: os.remove(gif_path)
              except: pass
         raise e
-    finally:
-        # Always clean up the input HTML file
-        if os.path.exists(html_path):
-            try: os.remove(html_path)
-            except: pass
+
+
+async def get_or_generate_gif(html_content: str, width: int = 600, height: int = 400, duration: float | None = None, fps: int | None = None,
+                              palette_mode: str = "global", on_progress=None, output_format: str = "gif", scale: float = 1.0,
+                              device_scale_factor: float = 1.0, clip: dict | None = None, auto_crop: bool = False) -> tuple[str, str]:
+    """
+    Serves a GIF from the render cache, rendering it on a miss.
+    Concurrent requests for the same render share a single job (progress is only reported to the
+    request that started it). Auto-timed renders are cached under the requested (unset) timing,
+    so a hit skips the probe as well.
+
+    Returns:
+        tuple: (gif_path, cache_status) where cache_status is "HIT", "MISS" or "BYPASS".
+        The file is the caller's to delete: cached renders are returned as a private link
+        (RenderCache.pin), so eviction can't remove them while they are being served.
+    """
+    capture = {"scale": scale, "device_scale_factor": device_scale_factor, "clip": clip, "auto_crop": auto_crop}
+    if not render_cache.enabled:
+        gif_path = await generate_gif_from_html(html_content, width, height, duration, fps, palette_mode,
+                                                on_progress=on_progress, output_format=output_format, **capture)
+        metrics.RENDER_CACHE_REQUESTS.inc(status="BYPASS")
+        return gif_path, "BYPASS"
+
+    key = render_cache_key(html_content, width=width, height=height, duration=duration, fps=fps, palette_mode=palette_mode,
+                           output_format=output_format, **capture)
+    cached_path = render_cache.get(key)
+    if cached_path:
+        metrics.RENDER_CACHE_REQUESTS.inc(status="HIT")
+        # Pinned in the same event loop step as the lookup, so nothing can evict it in between
+        return render_cache.pin(cached_path), "HIT"
+
+    async def render():
+        gif_path = await generate_gif_from_html(html_content, width, height, duration, fps, palette_mode,
+                                                on_progress=on_progress, output_format=output_format, **capture)
+        return render_cache.put(key, gif_path, OUTPUT_FORMATS[output_format]["extension"])
+
+    metrics.RENDER_CACHE_REQUESTS.inc(status="MISS")
+    for _ in range(PIN_ATTEMPTS):
+        cached_path = await _render_flight.do(key, render)
+        try:
+            return render_cache.pin(cached_path), "MISS"
+        except FileNotFoundError:
+            print(f"Render {key[:12]} was evicted before it could be served, rendering again")
+    raise RuntimeError("Render was evicted from the cache before it could be served (GIF_CACHE_MAX_BYTES is too small)")
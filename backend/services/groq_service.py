@@ -1,15 +1,25 @@
 import os
-import re
-from groq import Groq
+import time
+import asyncio
 from dotenv import load_dotenv
 try:
-    from .animation_examples import get_relevant_examples
+    from .prompt_builder import build_prompt
+    from . import metrics
+    from .llm_retry import RetryPolicy, CircuitBreakers, InvalidGeneration, classify_error, hedged
+    from .html_scanner import scan_html
+    from .llm_providers import get_provider
 except (ImportError, ValueError):
-    from animation_examples import get_relevant_examples
+    from prompt_builder import build_prompt
+    import metrics
+    from llm_retry import RetryPolicy, CircuitBreakers, InvalidGeneration, classify_error, hedged
+    from html_scanner import scan_html
+    from llm_providers import get_provider
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# The model backend, chosen by LLM_PROVIDER (see services/llm_providers.py). Everything below
+# (prompts, validation, retries, breakers, hedging) is shared by all providers.
+provider = get_provider()
 
 SYSTEM_PROMPT = """You are an Expert Creative Frontend Engineer specializing in HTML/CSS/JavaScript animations.
 
@@ -43,7 +53,8 @@ Your code runs in a headless browser with deterministic timing:
    - **3D Scenes**: Three.js `<script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>`
    - **Smooth UI**: Anime.js `<script src="https://cdnjs.cloudflare.com/ajax/libs/animejs/3.2.1/anime.min.js"></script>`
    - **Pseudo-3D**: Zdog `<script src="https://unpkg.com/zdog@1/dist/zdog.dist.min.js"></script>`
-   - **SVG/Particles**: Vivus.js, Particles.js (standard CDNs)
+   - **SVG Drawing**: Vivus.js `<script src="https://cdnjs.cloudflare.com/ajax/libs/vivus/0.4.6/vivus.min.js"></script>`
+   - **Particles**: Particles.js `<script src="https://cdnjs.cloudflare.com/ajax/libs/particles.js/2.0.0/particles.min.js"></script>`
    
    **MIXING STRATEGY:** Tailwind (layout) + GSAP (motion) is the gold standard for high-quality GIFs.
 
@@ -117,43 +128,8 @@ def validate_html_structure(html_code: str) -> tuple[bool, str]:
     Returns:
         tuple: (is_valid, error_message)
     """
-    if not html_code or not html_code.strip():
-        return False, "Empty HTML code"
-    
-    html_lower = html_code.lower()
-    
-    # Check for required elements
-    required_elements = [
-        ('<!doctype html', 'Missing DOCTYPE declaration'),
-        ('<html', 'Missing <html> tag'),
-        ('<head', 'Missing <head> tag'),
-        ('<body', 'Missing <body> tag'),
-        ('</html>', 'Missing closing </html> tag'),
-    ]
-    
-    for element, error_msg in required_elements:
-        if element not in html_lower:
-            return False, error_msg
-    
-    # Check minimum length (avoid truncated responses)
-    if len(html_code) < 300:
-        return False, "Generated HTML is too short (possible truncation)"
-    
-    # Check for placeholder comments (sign of incomplete code)
-    placeholder_patterns = [
-        r'//\s*add.*code',
-        r'//\s*todo',
-        r'//\s*implement',
-        r'/\*\s*add.*\*/',
-        r'//\s*your.*code.*here',
-        r'//\s*placeholder',
-    ]
-    
-    for pattern in placeholder_patterns:
-        if re.search(pattern, html_code, re.IGNORECASE):
-            return False, "Generated code contains placeholder comments"
-    
-    return True, ""
+    scan = scan_html(html_code, wrap=False)
+    return scan.valid, scan.error
 
 
 def clean_html_response(raw_response: str) -> str:
@@ -161,57 +137,180 @@ def clean_html_response(raw_response: str) -> str:
     Clean and extract HTML from model response.
     Removes markdown fences, extra text, and formats properly.
     """
-    cleaned = raw_response.strip()
-    
-    # Remove markdown code fences if present
-    cleaned = re.sub(r'^```(?:html)?\s*\n?', '', cleaned, flags=re.MULTILINE)
-    cleaned = re.sub(r'\n?```\s*$', '', cleaned, flags=re.MULTILINE)
-    
-    # Find DOCTYPE or <html start
-    doctype_match = re.search(r'<!DOCTYPE\s+html', cleaned, re.IGNORECASE)
-    html_match = re.search(r'<html(?:\s|>)', cleaned, re.IGNORECASE)
-    
-    start_match = doctype_match or html_match
-    if start_match:
-        cleaned = cleaned[start_match.start():]
-    
-    # Find </html> end and truncate after it
-    html_end_match = re.search(r'</html\s*>', cleaned, re.IGNORECASE)
-    if html_end_match:
-        cleaned = cleaned[:html_end_match.end()]
-    
-    cleaned = cleaned.strip()
-    
-    # If no proper HTML structure found, wrap in basic template
-    if '<html' not in cleaned.lower() and '<body' not in cleaned.lower():
-        cleaned = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Animation</title>
-    <style>
-        body {{ margin: 0; padding: 0; overflow: hidden; }}
-    </style>
-</head>
-<body>
-{cleaned}
-</body>
-</html>"""
-    
-    return cleaned
+    return scan_html(raw_response).html
+
+
+DEFAULT_MODEL = provider.default_model
+# Bump whenever SYSTEM_PROMPT or build_user_prompt changes, so cached generations are not reused
+PROMPT_TEMPLATE_VERSION = "2"
+FALLBACK_MODEL = provider.fallback_model
+
+# Retries, hedging and per-model circuit breakers (see services/llm_retry.py)
+retry_policy = RetryPolicy()
+breakers = CircuitBreakers()
+# Send a second request to HEDGE_MODEL when the first hasn't answered after this many seconds (0 = never)
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", FALLBACK_MODEL)
+
+# Upper bound on concurrent completions per worker for the async path
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+_generation_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+
+def build_user_prompt(user_prompt: str) -> str:
+    """Wrap the user's description with requirements and the most relevant examples, within PROMPT_TOKEN_BUDGET."""
+    built = build_prompt(user_prompt, SYSTEM_PROMPT)
+    print(f"Prompt: {built.input_tokens} input tokens, {len(built.examples)} example(s) ({built.example_mode})")
+    return built.user
+
+
+def _classify(error: BaseException) -> str:
+    """classify_error, with the configured provider's SDK errors sorted by the provider."""
+    return classify_error(error, provider)
+
+
+def _model_candidates(model: str) -> list[str]:
+    """`model` first, then FALLBACK_MODEL for when its circuit is open or it doesn't exist."""
+    return [model] if model == FALLBACK_MODEL else [model, FALLBACK_MODEL]
+
+
+def _record_call(model: str, attempt: int, started: float, error: Exception | None = None):
+    """Latency metric and circuit breaker bookkeeping for one completion call."""
+    kind = "ok" if error is None else _classify(error)
+    metrics.LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=model, attempt=str(attempt + 1), outcome=kind)
+    breaker = breakers.get(model)
+    if kind == "ok":
+        breaker.record_success()
+    elif kind == "not_found":
+        breaker.trip()
+    elif kind in ("rate_limit", "transient"):
+        breaker.record_failure()
+    else:
+        breaker.release()
+    metrics.LLM_CIRCUIT_OPEN.set(int(breaker.state != "closed"), model=model)
+
+
+def _validated(raw_response: str | None, attempt: int) -> str:
+    """Cleaned and validated HTML from a model response; InvalidGeneration when unusable."""
+    if not raw_response:
+        raise InvalidGeneration("Model returned empty response")
+    scan = scan_html(raw_response)
+    if not scan.valid:
+        print(f"Attempt {attempt + 1} validation failed: {scan.error}")
+        metrics.LLM_VALIDATION_FAILURES.inc(reason=scan.error)
+        raise InvalidGeneration(f"Generated HTML validation failed: {scan.error}")
+    return scan.html
+
+
+def _generate_once(enhanced_prompt: str, model: str, attempt: int) -> str:
+    started = time.perf_counter()
+    try:
+        raw_response = provider.complete(SYSTEM_PROMPT, enhanced_prompt, model)
+    except Exception as e:
+        _record_call(model, attempt, started, e)
+        raise
+    _record_call(model, attempt, started)
+    return _validated(raw_response, attempt)
+
+
+async def _generate_once_async(enhanced_prompt: str, model: str, attempt: int) -> str:
+    started = time.perf_counter()
+    try:
+        raw_response = await provider.complete_async(SYSTEM_PROMPT, enhanced_prompt, model)
+    except asyncio.CancelledError:
+        # Lost a hedge race or the caller went away; a half-open circuit must get its trial back
+        breakers.get(model).release()
+        raise
+    except Exception as e:
+        _record_call(model, attempt, started, e)
+        raise
+    _record_call(model, attempt, started)
+    return _validated(raw_response, attempt)
+
+
+def _attempt(enhanced_prompt: str, model: str, attempt: int) -> str:
+    """One attempt on the first model whose circuit is closed, moving on to FALLBACK_MODEL if it doesn't exist."""
+    while True:
+        current = breakers.choose(_model_candidates(model))
+        try:
+            return _generate_once(enhanced_prompt, current, attempt)
+        except Exception as e:
+            if current == FALLBACK_MODEL or _classify(e) != "not_found":
+                raise
+            print(f"WARNING: Model '{current}' not found. Falling back to '{FALLBACK_MODEL}'.")
+
+
+async def _attempt_async(enhanced_prompt: str, model: str, attempt: int) -> str:
+    """
+    Async counterpart of _attempt. With LLM_HEDGE_AFTER_SECONDS set, a request that is still
+    running after that long gets a second one on HEDGE_MODEL, and the first valid answer wins.
+    """
+    while True:
+        current = breakers.choose(_model_candidates(model))
+
+        def hedge():
+            if HEDGE_MODEL == current or not breakers.get(HEDGE_MODEL).allow():
+                return None
+            print(f"Attempt {attempt + 1}: no answer from '{current}' after {LLM_HEDGE_AFTER_SECONDS}s, hedging on '{HEDGE_MODEL}'")
+            metrics.LLM_HEDGED_REQUESTS.inc(result="started")
+            return _generate_once_async(enhanced_prompt, HEDGE_MODEL, attempt)
 
+        try:
+            html, winner = await hedged(lambda: _generate_once_async(enhanced_prompt, current, attempt), hedge,
+                                        LLM_HEDGE_AFTER_SECONDS)
+        except Exception as e:
+            if current == FALLBACK_MODEL or _classify(e) != "not_found":
+                raise
+            print(f"WARNING: Model '{current}' not found. Falling back to '{FALLBACK_MODEL}'.")
+            continue
+        if winner == "hedge":
+            metrics.LLM_HEDGED_REQUESTS.inc(result="won")
+        return html
+
+
+async def _stream_completion(enhanced_prompt: str, model: str, attempt: int):
+    """Yields the text deltas of a streamed completion, timed until the last one, with the same fallback."""
+    started = time.perf_counter()
+    try:
+        async for delta in provider.stream(SYSTEM_PROMPT, enhanced_prompt, model):
+            yield delta
+    except (asyncio.CancelledError, GeneratorExit):
+        breakers.get(model).release()
+        raise
+    except Exception as e:
+        _record_call(model, attempt, started, e)
+        if model == FALLBACK_MODEL or _classify(e) != "not_found":
+            raise e
+        print(f"WARNING: Model '{model}' not found. Falling back to '{FALLBACK_MODEL}'.")
+        async for delta in _stream_completion(enhanced_prompt, breakers.choose([FALLBACK_MODEL]), attempt):
+            yield delta
+        return
+    _record_call(model, attempt, started)
 
-def generate_animation(user_prompt: str, model: str = "openai/gpt-oss-120b", progress_callback=None) -> str:
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    """Backoff before the next attempt, or the final RuntimeError when retry_policy gives up."""
+    delay = retry_policy.backoff(attempt, error, _classify(error))
+    if delay is None:
+        raise RuntimeError(f"Animation generation failed after {attempt + 1} attempt(s): {error}")
+    metrics.LLM_RETRIES.inc(reason=_classify(error))
+    print(f"Attempt {attempt + 1} failed: {error}, retrying in {delay:.2f}s...")
+    return delay
+
+
+def generate_animation(user_prompt: str, model: str = DEFAULT_MODEL, progress_callback=None) -> str:
     """
-    Generate HTML animation code from text description using Groq.
+    Generate HTML animation code from text description using the configured LLM provider.
     
     This function uses optimized prompt engineering and example-based learning
     to achieve 95%+ accuracy in matching user requirements.
+    Failed attempts are retried according to `retry_policy` (backoff on rate limits and server
+    errors, immediate retry on invalid output), and models whose circuit breaker is open are
+    skipped in favor of FALLBACK_MODEL.
     
     Args:
         user_prompt: User's animation description (e.g., "bouncing ball", "neon particles")
-        model: Groq model to use (default: "openai/gpt-oss-120b")
+        model: Model to use (default: the provider's default_model, "openai/gpt-oss-120b" on Groq)
         
     Returns:
         str: Clean, validated HTML code ready to render
@@ -228,99 +327,94 @@ def generate_animation(user_prompt: str, model: str = "openai/gpt-oss-120b", pro
     if not user_prompt or not user_prompt.strip():
         raise ValueError("Prompt cannot be empty")
     
-    max_attempts = 3
-    
-    for attempt in range(max_attempts):
+    for attempt in range(retry_policy.max_attempts):
+        if progress_callback:
+            progress_callback(f"Selecting examples (Attempt {attempt + 1}/{retry_policy.max_attempts})...")
+        
+        enhanced_prompt = build_user_prompt(user_prompt)
+        
+        if progress_callback:
+            progress_callback("Generating animation code via AI...")
+
         try:
+            return _attempt(enhanced_prompt, model, attempt)
+        except Exception as e:
+            time.sleep(_retry_delay(attempt, e))
+    
+    raise RuntimeError("Animation generation failed unexpectedly")
+
+
+async def generate_animation_async(user_prompt: str, model: str = DEFAULT_MODEL, progress_callback=None) -> str:
+    """
+    Async counterpart of generate_animation for use inside the event loop.
+
+    Uses the provider's async client, so a worker keeps serving other requests while a completion is
+    in flight. At most LLM_MAX_CONCURRENCY generations run at once; the rest wait for a slot.
+    Slow requests can additionally be hedged on a second model (see _attempt_async).
+    Same arguments, return value and exceptions as generate_animation.
+    """
+
+    if not user_prompt or not user_prompt.strip():
+        raise ValueError("Prompt cannot be empty")
+
+    async with _generation_slots:
+        for attempt in range(retry_policy.max_attempts):
             if progress_callback:
-                progress_callback(f"Selecting examples (Attempt {attempt + 1}/{max_attempts})...")
-            
-            # Get relevant examples based on user prompt
-            examples = get_relevant_examples(user_prompt)
-            
+                progress_callback(f"Selecting examples (Attempt {attempt + 1}/{retry_policy.max_attempts})...")
+
+            enhanced_prompt = build_user_prompt(user_prompt)
+
             if progress_callback:
                 progress_callback("Generating animation code via AI...")
-            
-            # Enhanced user prompt with context and examples
-            enhanced_prompt = f"""Create an animated HTML page for this request:
 
-"{user_prompt.strip()}"
+            try:
+                return await _attempt_async(enhanced_prompt, model, attempt)
+            except Exception as e:
+                await asyncio.sleep(_retry_delay(attempt, e))
+
+    raise RuntimeError("Animation generation failed unexpectedly")
+
+
+async def stream_animation(user_prompt: str, model: str = DEFAULT_MODEL):
+    """
+    Stream an animation generation as (event, data) pairs.
+
+    Events:
+        progress: status message
+        token:    next chunk of raw model output
+        retry:    the attempt failed (data is the reason); discard tokens received so far
+        done:     the final cleaned and validated HTML document
 
-REQUIREMENTS:
-- Match the description EXACTLY - include all requested elements
-- Make it smooth and performant (target 30-60fps)
-- Use the most appropriate technique (CSS, Canvas, GSAP, Three.js, etc.)
-- Ensure animation loops seamlessly
-- Match the requested style/aesthetic precisely
-- Keep code clean and minimal
-- Output ONLY the complete HTML code starting with <!DOCTYPE html>
+    Raises RuntimeError once every attempt has failed, like generate_animation.
+    Streams are not hedged: the tokens already sent would have to be taken back.
+    """
 
-{examples}
+    if not user_prompt or not user_prompt.strip():
+        raise ValueError("Prompt cannot be empty")
 
-Generate the full, production-ready code now:"""
+    async with _generation_slots:
+        for attempt in range(retry_policy.max_attempts):
+            yield "progress", f"Generating animation code via AI (Attempt {attempt + 1}/{retry_policy.max_attempts})..."
+            enhanced_prompt = build_user_prompt(user_prompt)
+            chunks = []
 
-            # Call Groq API with optimized parameters for creative tasks
             try:
-                chat_completion = client.chat.completions.create(
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user", "content": enhanced_prompt},
-                    ],
-                    model=model,
-                    temperature=0.8,  # Higher temperature for creative work
-                    max_tokens=8192,
-                    top_p=0.95,  # Slightly higher for more diverse outputs
-                )
+                current = breakers.choose(_model_candidates(model))
+                async for delta in _stream_completion(enhanced_prompt, current, attempt):
+                    chunks.append(delta)
+                    yield "token", delta
+
+                yield "progress", "Validating generated HTML..."
+                cleaned_html = _validated("".join(chunks), attempt)
+
             except Exception as e:
-                error_str = str(e).lower()
-                if "model_not_found" in error_str or "404" in error_str:
-                    print(f"WARNING: Model '{model}' not found. Falling back to 'llama-3.3-70b-versatile'.")
-                    chat_completion = client.chat.completions.create(
-                        messages=[
-                            {"role": "system", "content": SYSTEM_PROMPT},
-                            {"role": "user", "content": enhanced_prompt},
-                        ],
-                        model="llama-3.3-70b-versatile",
-                        temperature=0.8,
-                        max_tokens=8192,
-                        top_p=0.95,
-                    )
-                else:
-                    raise e
-            
-            raw_response = chat_completion.choices[0].message.content
-            
-            if not raw_response:
-                if attempt < max_attempts - 1:
-                    continue
-                raise RuntimeError("Model returned empty response")
-            
-            # Clean the response
-            cleaned_html = clean_html_response(raw_response)
-            
-            if progress_callback:
-                progress_callback("Validating generated HTML...")
-            
-            # Validate structure
-            is_valid, error_msg = validate_html_structure(cleaned_html)
-            
-            if not is_valid:
-                print(f"Attempt {attempt + 1} validation failed: {error_msg}")
-                if attempt < max_attempts - 1:
-                    continue
-                raise RuntimeError(f"Generated HTML validation failed: {error_msg}")
-            
-            # Success - return validated HTML
-            return cleaned_html
-            
-        except Exception as e:
-            if attempt < max_attempts - 1:
-                print(f"Attempt {attempt + 1} failed: {str(e)}, retrying...")
+                delay = _retry_delay(attempt, e)
+                yield "retry", str(e)
+                await asyncio.sleep(delay)
                 continue
-            else:
-                raise RuntimeError(f"Animation generation failed after {max_attempts} attempts: {str(e)}")
-    
-    raise RuntimeError("Animation generation failed unexpectedly")
+
+            yield "done", cleaned_html
+            return
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+import re
+import string
+
+# Single-pass extraction and validation of model output.
+# One precompiled pattern finds every token of interest (document boundaries, required tags,
+# script/style tags, code fences, comment starts) in a single scan over one lowercased copy of the
+# response (ASCII only, so every offset stays valid in the original text); extraction, fence stripping and every validation check are then answered from those
+# token positions instead of a regex search or .lower() copy per check.
+# Every alternative starts with a literal "<", "`" or "/", which lets the regex engine skip ahead
+# between candidates; an IGNORECASE pattern with named groups is several times slower.
+
+# Shorter than this, a document is assumed to have been cut off
+MIN_DOCUMENT_LENGTH = 300
+
+_TOKENS = re.compile(r"<(?:!doctype\s+html|/(?:html|script|style)\s*>|(?:html|head|body|script|style)(?![\w-]))|```|//|/\*")
+# Searched for from the first "//" or "/*" token of a line to the end of that line
+_PLACEHOLDER = re.compile(r"//\s*(?:add.*code|todo|implement|your.*code.*here|placeholder)|/\*\s*add.*\*/")
+# A fence opens a line ("```html") or closes one ("...```")
+_FENCE_LINE = re.compile(r"```(?:html)?[ \t]*\n?")
+_FENCE_CLOSE = re.compile(r"```[ \t]*(?=\n|$)")
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+_TAG_KINDS = {
+    "<html": "html_open",
+    "<head": "head_open",
+    "<body": "body_open",
+    "<script": "open_tag",
+    "<style": "open_tag",
+}
+
+
+def _token_kind(token: str) -> str:
+    if token.startswith("<!"):
+        return "doctype"
+    if token.startswith("</"):
+        return "html_close" if token.startswith("</html") else "close_tag"
+    return _TAG_KINDS[token]
+
+
+# validate_html_structure's checks, in the order it reports them
+_REQUIRED_TAGS = (
+    ("doctype", "Missing DOCTYPE declaration"),
+    ("html_open", "Missing <html> tag"),
+    ("head_open", "Missing <head> tag"),
+    ("body_open", "Missing <body> tag"),
+    ("html_close", "Missing closing </html> tag"),
+)
+
+_WRAPPER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Animation</title>
+    <style>
+        body {{ margin: 0; padding: 0; overflow: hidden; }}
+    </style>
+</head>
+<body>
+{content}
+</body>
+</html>"""
+
+
+class HtmlScan:
+    """
+    Result of scan_html: the extracted document plus what was found in it.
+
+    html          the document, cut to <!DOCTYPE>/<html> ... </html>, fences removed, and wrapped
+                  in a minimal page when the model returned a bare fragment
+    errors        validation failures in validate_html_structure order (empty when valid)
+    missing_tags  required tags that are absent
+    placeholders  placeholder comments found ("// TODO", "// add code here", ...)
+    unclosed_tags script/style tags opened more often than closed, a sign of truncation
+    truncated     the document looks cut off (no closing </html>, too short, or unclosed tags)
+    fences        number of markdown code fences in the response
+    wrapped       whether the fragment had to be wrapped
+    """
+
+    def __init__(self, html: str, errors: list[str], missing_tags: list[str], placeholders: list[str],
+                 unclosed_tags: int, truncated: bool, fences: int, wrapped: bool):
+        self.html = html
+        self.errors = errors
+        self.missing_tags = missing_tags
+        self.placeholders = placeholders
+        self.unclosed_tags = unclosed_tags
+        self.truncated = truncated
+        self.fences = fences
+        self.wrapped = wrapped
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    @property
+    def error(self) -> str:
+        """First failure, as validate_html_structure reports it ("" when valid)."""
+        return self.errors[0] if self.errors else ""
+
+    def to_dict(self) -> dict:
+        return {
+            "valid": self.valid,
+            "errors": self.errors,
+            "missing_tags": self.missing_tags,
+            "placeholders": self.placeholders,
+            "unclosed_tags": self.unclosed_tags,
+            "truncated": self.truncated,
+            "fences": self.fences,
+            "wrapped": self.wrapped,
+            "length": len(self.html),
+        }
+
+
+def _strip_spans(text: str, start: int, end: int, spans: list[tuple[int, int]]) -> str:
+    """text[start:end] without the given (sorted, non-overlapping) spans."""
+    parts = []
+    position = start
+    for span_start, span_end in spans:
+        if span_end <= position or span_start >= end:
+            continue
+        parts.append(text[position:max(position, span_start)])
+        position = min(span_end, end)
+    parts.append(text[position:end])
+    return "".join(parts)
+
+
+def scan_html(raw_response: str, wrap: bool = True) -> HtmlScan:
+    """
+    Extracts the HTML document from a model response and validates it, in one pass over the text.
+    The document starts at the first <!DOCTYPE html> (else the first <html>) and ends at the first
+    </html> after it; markdown fences are dropped and, with `wrap`, a bare fragment is wrapped in a page.
+    """
+    text = raw_response or ""
+    # str.lower() can change the length of non-ASCII text ("İ" becomes "i̇")
+    lowered = text.lower() if text.isascii() else text.translate(_ASCII_LOWER)
+    tokens = []
+    fences = []
+    placeholders = []
+    comment_line_end = -1
+    for match in _TOKENS.finditer(lowered):
+        token, position = match.group(), match.start()
+        if token == "```":
+            at_line_start = position == 0 or lowered[position - 1] == "\n"
+            fence = (_FENCE_LINE if at_line_start else _FENCE_CLOSE).match(lowered, position)
+            if fence:
+                fences.append((position, fence.end()))
+        elif token[0] == "/":
+            if position < comment_line_end:
+                continue  # The rest of this line has been searched already
+            comment_line_end = lowered.find("\n", position)
+            if comment_line_end < 0:
+                comment_line_end = len(lowered)
+            placeholder = _PLACEHOLDER.search(lowered, position, comment_line_end)
+            if placeholder:
+                placeholders.append((placeholder.start(), placeholder.end()))
+        else:
+            tokens.append((_token_kind(token), position, match.end()))
+
+    first = {}
+    for kind, position, _ in tokens:
+        first.setdefault(kind, position)
+    start = first.get("doctype", first.get("html_open", 0))
+    end = next((token_end for kind, position, token_end in tokens if kind == "html_close" and position >= start), len(text))
+    inside = [kind for kind, position, _ in tokens if start <= position < end]
+    fence_count = len(fences)
+    fences = [span for span in fences if start <= span[0] < end]
+    placeholders = [text[span_start:span_end] for span_start, span_end in placeholders if start <= span_start < end]
+
+    document = _strip_spans(text, start, end, fences).strip() if fences else text[start:end].strip()
+    found = set(inside)
+
+    wrapped = wrap and bool(document) and "html_open" not in found and "body_open" not in found
+    if wrapped:
+        # The wrapper supplies every required tag; only the fragment's own content is checked
+        document = _WRAPPER.format(content=document)
+        found |= {kind for kind, _ in _REQUIRED_TAGS}
+
+    unclosed_tags = max(0, inside.count("open_tag") - inside.count("close_tag"))
+    missing_tags = [kind for kind, _ in _REQUIRED_TAGS if kind not in found]
+
+    errors = []
+    if not document:
+        errors.append("Empty HTML code")
+    else:
+        errors.extend(message for kind, message in _REQUIRED_TAGS if kind not in found)
+        if len(document) < MIN_DOCUMENT_LENGTH:
+            errors.append("Generated HTML is too short (possible truncation)")
+        if placeholders:
+            errors.append("Generated code contains placeholder comments")
+
+    truncated = "html_close" not in found or len(document) < MIN_DOCUMENT_LENGTH or unclosed_tags > 0
+    return HtmlScan(document, errors, missing_tags, placeholders, unclosed_tags, truncated, fence_count, wrapped)
@@ -0,0 +1,262 @@
+import os
+import re
+import time
+import asyncio
+import threading
+try:
+    from .animation_examples import EXAMPLES, rank_examples
+except (ImportError, ValueError):
+    from animation_examples import EXAMPLES, rank_examples
+
+# Which LLMProvider generates animations: "groq", "gemini" or "local" (offline, see LocalProvider)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+# LocalProvider: seconds before the first token, and streaming speed (0 = the whole answer at once)
+LLM_LOCAL_LATENCY = float(os.getenv("LLM_LOCAL_LATENCY", "0.5"))
+LLM_LOCAL_TOKENS_PER_SECOND = float(os.getenv("LLM_LOCAL_TOKENS_PER_SECOND", "0"))
+
+# Output cap for the hosted providers; a full animation document fits comfortably
+MAX_OUTPUT_TOKENS = 8192
+
+
+def _classify_status(status: int) -> str:
+    """classify_error kind of an HTTP error status."""
+    if status == 404:
+        return "not_found"
+    if status == 429:
+        return "rate_limit"
+    if status >= 500:
+        return "transient"
+    return "fatal"
+
+
+class LLMProvider:
+    """
+    One way of turning a system and a user message into a completion.
+
+    Providers only talk to the model: prompt assembly, validation, retries, circuit breakers and
+    hedging live in groq_service and work the same for every provider. Errors are raised as the
+    provider's SDK raises them, and `classify` sorts them for llm_retry.classify_error.
+    Clients are created on first use, so selecting a provider never needs network or credentials.
+    """
+
+    name = ""
+    default_model = ""
+    # Tried when the default model does not exist or its circuit is open (same as default: none)
+    fallback_model = ""
+
+    def complete(self, system: str, user: str, model: str) -> str | None:
+        raise NotImplementedError
+
+    async def complete_async(self, system: str, user: str, model: str) -> str | None:
+        raise NotImplementedError
+
+    async def stream(self, system: str, user: str, model: str):
+        """Yields the text of the completion as it is generated."""
+        raise NotImplementedError
+        yield
+
+    def classify(self, error: BaseException) -> str | None:
+        """The llm_retry.classify_error kind of an error raised by this provider's SDK, None for other errors."""
+        return None
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+    default_model = "openai/gpt-oss-120b"
+    fallback_model = "llama-3.3-70b-versatile"
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _options(self) -> dict:
+        # Retries are handled by groq_service.retry_policy, not by the SDK
+        return {"api_key": self.api_key or os.getenv("GROQ_API_KEY"), "base_url": self.base_url, "max_retries": 0}
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from groq import Groq
+                self._client = Groq(**self._options())
+            return self._client
+
+    @property
+    def async_client(self):
+        with self._lock:
+            if self._async_client is None:
+                from groq import AsyncGroq
+                self._async_client = AsyncGroq(**self._options())
+            return self._async_client
+
+    def _params(self, system: str, user: str, model: str) -> dict:
+        # Optimized parameters for creative tasks
+        return {
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "model": model,
+            "temperature": 0.8,  # Higher temperature for creative work
+            "max_tokens": MAX_OUTPUT_TOKENS,
+            "top_p": 0.95,  # Slightly higher for more diverse outputs
+        }
+
+    def complete(self, system: str, user: str, model: str) -> str | None:
+        chat_completion = self.client.chat.completions.create(**self._params(system, user, model))
+        return chat_completion.choices[0].message.content
+
+    async def complete_async(self, system: str, user: str, model: str) -> str | None:
+        chat_completion = await self.async_client.chat.completions.create(**self._params(system, user, model))
+        return chat_completion.choices[0].message.content
+
+    async def stream(self, system: str, user: str, model: str):
+        stream = await self.async_client.chat.completions.create(**self._params(system, user, model), stream=True)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def classify(self, error: BaseException) -> str | None:
+        import groq
+        if isinstance(error, (groq.APIConnectionError, groq.APITimeoutError)):
+            return "transient"
+        if not isinstance(error, groq.APIStatusError):
+            return None
+        return _classify_status(error.status_code)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    default_model = "gemini-3-pro-preview"
+    fallback_model = "gemini-3-pro-preview"
+
+    def __init__(self, api_key: str | None = None):
+        self.api_key = api_key
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, system: str, model: str):
+        """GenerativeModel for (system prompt, model); the system prompt is fixed per model object."""
+        with self._lock:
+            key = (system, model)
+            if key not in self._models:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+                self._models[key] = genai.GenerativeModel(model_name=model, system_instruction=system)
+            return self._models[key]
+
+    def _config(self):
+        import google.generativeai as genai
+        return genai.types.GenerationConfig(candidate_count=1, max_output_tokens=MAX_OUTPUT_TOKENS, temperature=0.4)
+
+    def complete(self, system: str, user: str, model: str) -> str | None:
+        return self._model(system, model).generate_content(user, generation_config=self._config()).text
+
+    async def complete_async(self, system: str, user: str, model: str) -> str | None:
+        response = await self._model(system, model).generate_content_async(user, generation_config=self._config())
+        return response.text
+
+    async def stream(self, system: str, user: str, model: str):
+        response = await self._model(system, model).generate_content_async(
+            user, generation_config=self._config(), stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def classify(self, error: BaseException) -> str | None:
+        # google.api_core errors (ResourceExhausted, ServiceUnavailable, ...) carry their HTTP
+        # status as `code`; matched by module rather than imported, as google.generativeai is optional
+        code = getattr(error, "code", None)
+        if not type(error).__module__.startswith("google.") or not isinstance(code, int):
+            return None
+        return _classify_status(code)
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic offline provider for load and latency testing.
+
+    Answers with the code of the EXAMPLES entry that best matches the request (the quoted line of
+    the user prompt), after `latency` seconds and then at `tokens_per_second` (~4 characters per
+    token), so a run measures the server's own overhead on top of a known model time.
+    """
+
+    name = "local"
+    default_model = "local-replay"
+    fallback_model = "local-replay"
+
+    # The user's request, as quoted by prompt_builder.USER_PROMPT_TEMPLATE
+    _REQUEST = re.compile(r'^"(.+)"$', re.MULTILINE)
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, latency: float = LLM_LOCAL_LATENCY, tokens_per_second: float = LLM_LOCAL_TOKENS_PER_SECOND):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def content(self, user: str) -> str:
+        request = self._REQUEST.search(user)
+        key = rank_examples(request.group(1) if request else user, 1)[0]
+        return EXAMPLES[key].partition("Complete Code:")[2].strip()
+
+    def _chunks(self, text: str) -> list[str]:
+        return [text[i:i + self.CHARS_PER_TOKEN] for i in range(0, len(text), self.CHARS_PER_TOKEN)]
+
+    def simulated_seconds(self, text: str) -> float:
+        """How long a completion of `text` takes: the latency plus the streaming time."""
+        if self.tokens_per_second <= 0:
+            return self.latency
+        return self.latency + len(self._chunks(text)) / self.tokens_per_second
+
+    def _count_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def complete(self, system: str, user: str, model: str) -> str | None:
+        self._count_call()
+        text = self.content(user)
+        time.sleep(self.simulated_seconds(text))
+        return text
+
+    async def complete_async(self, system: str, user: str, model: str) -> str | None:
+        self._count_call()
+        text = self.content(user)
+        await asyncio.sleep(self.simulated_seconds(text))
+        return text
+
+    async def stream(self, system: str, user: str, model: str):
+        self._count_call()
+        text = self.content(user)
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        if self.tokens_per_second <= 0:
+            yield text
+            return
+        # Paced against the start time, so sleep overshoot doesn't add up over thousands of tokens
+        for i, chunk in enumerate(self._chunks(text), 1):
+            delay = started + self.latency + i / self.tokens_per_second - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+PROVIDERS = {
+    "groq": GroqProvider,
+    "gemini": GeminiProvider,
+    "local": LocalProvider,
+}
+
+
+def get_provider(name: str | None = None) -> LLMProvider:
+    """A new provider of the given kind (default: LLM_PROVIDER)."""
+    name = (name or LLM_PROVIDER).lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}' (choose from {', '.join(PROVIDERS)})")
+    return PROVIDERS[name]()
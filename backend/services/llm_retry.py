@@ -0,0 +1,220 @@
+import os
+import time
+import random
+import asyncio
+import threading
+
+# Retry policy for LLM completions (see RetryPolicy)
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "10"))
+# A model's circuit opens after this many consecutive failures and stays open this long
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+
+class InvalidGeneration(RuntimeError):
+    """The model answered, but the answer was empty or failed validation."""
+
+
+class CircuitOpen(RuntimeError):
+    """Every candidate model's circuit breaker is open."""
+
+
+def classify_error(error: BaseException, provider=None) -> str:
+    """
+    Sorts a completion failure into what the retry policy does with it:
+      "invalid"    - the answer was unusable; generate again right away
+      "rate_limit" - 429; back off (honoring Retry-After)
+      "transient"  - connection errors, timeouts, 5xx; back off
+      "not_found"  - the model does not exist; switch models
+      "fatal"      - anything else (bad request, auth); retrying won't help
+    SDK errors are sorted by the LLMProvider that raised them (`provider.classify`).
+    """
+    if isinstance(error, InvalidGeneration):
+        return "invalid"
+    kind = provider.classify(error) if provider is not None else None
+    if kind is not None:
+        return kind
+    message = str(error).lower()
+    if "model_not_found" in message or "404" in message:
+        return "not_found"
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return "transient"
+    return "fatal"
+
+
+def _retry_after_seconds(error: BaseException) -> float | None:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """
+    How many times to attempt a generation and how long to wait between attempts.
+
+    Rate limits and transient errors back off exponentially from `base_delay` up to `max_delay`
+    with full jitter (a uniformly random share of the step), so concurrent requests that failed
+    together don't retry together; a server-sent Retry-After is used instead when it's larger.
+    Invalid answers are retried immediately, fatal errors not at all.
+    """
+
+    def __init__(self, max_attempts: int = LLM_MAX_ATTEMPTS, base_delay: float = LLM_RETRY_BASE_DELAY,
+                 max_delay: float = LLM_RETRY_MAX_DELAY, rng=random.random):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng
+
+    def backoff(self, attempt: int, error: BaseException, kind: str | None = None) -> float | None:
+        """
+        Seconds to wait before retrying after `attempt` (0-based) failed with `error`; None to give up.
+        `kind` is the error's classify_error kind, when the caller has classified it already.
+        """
+        if attempt >= self.max_attempts - 1:
+            return None
+        kind = kind or classify_error(error)
+        if kind == "fatal":
+            return None
+        if kind in ("invalid", "not_found"):
+            return 0.0
+        step = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = step * self.rng()
+        retry_after = _retry_after_seconds(error)
+        if kind == "rate_limit" and retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a model that keeps failing.
+
+    closed:    requests flow; `failure_threshold` consecutive failures open the circuit
+    open:      requests are refused until `reset_timeout` seconds have passed
+    half_open: one trial request is let through; success closes the circuit, failure reopens it
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a request may go out now (in half_open, claims the single trial request)."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def release(self):
+        """
+        Gives back the trial request without a verdict: it was cancelled (lost a hedge race, the
+        client went away) or failed in a way that says nothing about the model (e.g. a bad request).
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def trip(self):
+        """Open the circuit right away (e.g. the model does not exist)."""
+        with self._lock:
+            self.failures = max(self.failures, self.failure_threshold)
+            self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per model, created on first use."""
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            return breaker
+
+    def states(self) -> dict[str, str]:
+        with self._lock:
+            return {model: breaker.state for model, breaker in self._breakers.items()}
+
+    def choose(self, models: list[str]) -> str:
+        """First of `models` whose circuit lets a request through; CircuitOpen if none does."""
+        for model in models:
+            if self.get(model).allow():
+                return model
+        raise CircuitOpen(f"Circuit open for every model ({', '.join(models)}), try again later")
+
+
+async def hedged(primary, hedge=None, hedge_after: float = 0.0):
+    """
+    Awaits primary(); if it hasn't finished after `hedge_after` seconds, calls hedge() for a second
+    coroutine (hedge may return None to skip) and races the two. The first one to succeed wins and
+    the other is cancelled. Only when every started request failed is an error raised (the
+    primary's). Returns (result, winner) with winner "primary" or "hedge".
+    """
+    tasks = {asyncio.ensure_future(primary()): "primary"}
+    errors = {}
+    can_hedge = hedge is not None and hedge_after > 0
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after if can_hedge else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                can_hedge = False
+                coroutine = hedge()
+                if coroutine is not None:
+                    tasks[asyncio.ensure_future(coroutine)] = "hedge"
+                continue
+            for task in done:
+                name = tasks.pop(task)
+                if task.exception() is None:
+                    return task.result(), name
+                errors[name] = task.exception()
+            # A failed primary doesn't start the hedge early: that's the retry policy's call
+            can_hedge = False
+    finally:
+        for task in tasks:
+            task.cancel()
+    raise errors.get("primary") or errors["hedge"]
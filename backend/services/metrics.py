@@ -0,0 +1,228 @@
+import math
+import threading
+
+# Prometheus text exposition (format 0.0.4), served by GET /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds, in seconds or bytes
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 2500, 3000, 4000, 6000, 8000)
+BYTES_BUCKETS = (50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    One metric family: a value per combination of label values.
+    Labels are passed as keyword arguments and must match `labelnames` exactly. Updates take a
+    lock, so they are safe from the worker threads that report render progress.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        """(suffix, labels, value) for every exposed line."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key)), value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """A value that goes up and down; with set_function() it is read at scrape time instead."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        """Report function() on every scrape (unlabelled gauges only)."""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            yield "", {}, self._function()
+            return
+        yield from super()._samples()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}) for key, s in self._values.items()]
+        for key, state in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                yield "_bucket", dict(labels, le=_format_value(bound)), cumulative
+            yield "_sum", labels, state["sum"]
+            yield "_count", labels, state["count"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Animation generation (LLM)
+LLM_REQUEST_SECONDS = registry.histogram(
+    "llm_request_seconds", "Latency of one completion call (streams: until the last token)",
+    ("model", "attempt", "outcome"))
+LLM_VALIDATION_FAILURES = registry.counter(
+    "llm_validation_failures_total", "Generated documents rejected by validate_html_structure", ("reason",))
+LLM_RETRIES = registry.counter(
+    "llm_retries_total", "Generation attempts retried, by why the previous one failed", ("reason",))
+LLM_HEDGED_REQUESTS = registry.counter(
+    "llm_hedged_requests_total", "Hedge requests started for slow completions, and how many won", ("result",))
+LLM_CIRCUIT_OPEN = registry.gauge(
+    "llm_circuit_open", "1 while a model's circuit breaker is refusing (or trialling) requests", ("model",))
+LLM_INPUT_TOKENS = registry.histogram(
+    "llm_input_tokens", "Input tokens of each generation request, by how its examples were included", ("examples",),
+    TOKEN_BUCKETS)
+LLM_COALESCED_REQUESTS = registry.counter(
+    "llm_coalesced_requests_total", "Generation requests that joined an identical generation already in flight (LLM calls saved)")
+PROMPT_CACHE_REQUESTS = registry.counter(
+    "prompt_cache_requests_total", "Prompt cache lookups by result (hit, miss)", ("result",))
+
+# Render pipeline. Browser-side stages are timed inside the render workers and reported with
+# each job's stats (see render_worker.py).
+BROWSER_LAUNCH_SECONDS = registry.histogram(
+    "render_browser_launch_seconds", "Time to launch Chromium in a render worker", buckets=FAST_BUCKETS + (10, 30))
+PAGE_LOAD_SECONDS = registry.histogram(
+    "render_page_load_seconds", "Time to open a page, load the animation and start its virtual clock", ("type",), FAST_BUCKETS)
+FRAME_CAPTURE_SECONDS = registry.histogram(
+    "render_frame_capture_seconds", "Time to advance the virtual clock and screenshot one frame", ("type",), FAST_BUCKETS)
+ENCODE_SECONDS = registry.histogram(
+    "render_encode_seconds", "Time spent encoding frames into the output file", ("format",))
+RENDER_SECONDS = registry.histogram(
+    "render_seconds", "End-to-end render time, from job start to finished file", ("format",))
+OUTPUT_BYTES = registry.histogram(
+    "render_output_bytes", "Size of rendered files", ("format",), BYTES_BUCKETS)
+RENDER_EXTERNAL_REQUESTS = registry.counter(
+    "render_external_requests_total",
+    "External requests from rendered pages: served from vendored copies, let through to their CDN, or blocked",
+    ("type", "result"))
+RENDER_BLOCKED_PAGES = registry.counter(
+    "render_blocked_pages_total",
+    "Page loads (renders, capture slices, probes) with at least one external request blocked; such pages may render broken",
+    ("type",))
+RENDER_CACHE_REQUESTS = registry.counter(
+    "render_cache_requests_total", "Render requests by cache status (HIT, MISS, BYPASS)", ("status",))
+RENDER_POOL_WAITING = registry.gauge(
+    "render_pool_waiting_jobs", "Jobs waiting for an idle render worker")
+RENDER_POOL_BUSY = registry.gauge(
+    "render_pool_busy_workers", "Render workers currently running a job")
+GIF_JOBS_QUEUED = registry.gauge(
+    "gif_jobs_queued", "Jobs waiting in the /gif-jobs queue")
+GIF_JOBS_RUNNING = registry.gauge(
+    "gif_jobs_running", "Jobs from the /gif-jobs queue currently rendering")
@@ -0,0 +1,201 @@
+import os
+import math
+import numpy as np
+
+# Probe pass: a low-resolution capture used to pick the duration and fps of the real render.
+# A loop only counts once a full repetition has been seen, so loops of up to half the probe
+# (6s by default) are detected; longer ones are treated as not looping.
+PROBE_SECONDS = float(os.getenv("GIF_PROBE_SECONDS", "12"))
+PROBE_FPS = int(os.getenv("GIF_PROBE_FPS", "30"))
+PROBE_SCALE = float(os.getenv("GIF_PROBE_SCALE", "0.2"))
+# The probe stops once a loop has repeated this many times (checked every PROBE_CHECK_SECONDS),
+# so only animations without a short loop are probed for the whole PROBE_SECONDS
+LOOP_CONFIRMATIONS = 3
+PROBE_CHECK_SECONDS = 1.0
+# Animations without a detectable loop are rendered this long (the fixed duration before auto timing)
+NO_LOOP_SECONDS = float(os.getenv("GIF_NO_LOOP_SECONDS", "3"))
+
+FPS_CANDIDATES = (10, 12, 15, 20, 24, 30)
+# Two probe frames show the same state when at most this fraction of pixels differs by more
+# than SAME_PIXEL_TOLERANCE gray levels (room for antialiasing, not for a moving object)
+SAME_PIXEL_TOLERANCE = 8
+SAME_FRAME_TOLERANCE = 0.0005
+# A candidate loop period may differ from a perfect repeat by this share of the typical motion
+# between consecutive frames, and only the best LOOP_MATCH_PERCENTILE of frame pairs must match
+# (positions computed from time round to different pixels now and then)
+LOOP_TOLERANCE = 0.25
+LOOP_MATCH_PERCENTILE = 90
+# Candidate periods are first compared on every LOOP_SAMPLE_STRIDE-th frame pair, which already
+# rules out most of them
+LOOP_SAMPLE_STRIDE = 4
+# A pixel "moved" between two frames when it changed by more than this many gray levels
+MOTION_THRESHOLD = 24
+# Motion stays smooth at a lower fps while moving objects still overlap their previous position:
+# then the moved area keeps growing with the time between frames. Once it stops growing (at
+# least this share of linear growth), objects jump instead of move.
+MIN_MOTION_GROWTH = 0.7
+# How close period * fps must be to a whole number of frames for the loop to be seamless
+LOOP_ALIGNMENT_TOLERANCE = 0.05
+MIN_LOOP_SECONDS = 0.2
+# Auto-crop keeps this many CSS pixels around the moving area (antialiasing, shadows, probe rounding)
+CROP_MARGIN = int(os.getenv("GIF_CROP_MARGIN", "12"))
+
+
+def to_gray(frames) -> np.ndarray:
+    """(N, H, W) float32 luminance from a sequence of RGB images or arrays."""
+    stack = np.stack([np.asarray(frame, dtype=np.float32) for frame in frames])
+    if stack.ndim == 4:
+        stack = stack @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return stack
+
+
+def changed_fraction(frames: np.ndarray, step: int, threshold: float = SAME_PIXEL_TOLERANCE) -> np.ndarray:
+    """Fraction of pixels that differ by more than `threshold` between each frame and the one `step` later."""
+    return (np.abs(frames[step:] - frames[:-step]) > threshold).mean(axis=(1, 2))
+
+
+def detect_loop_period(frames: np.ndarray, fps: int, tolerance: float = SAME_FRAME_TOLERANCE,
+                       max_period: int | None = None, min_period: int | None = None) -> int | None:
+    """
+    Smallest period p (in frames) with frame[i] == frame[i + p] throughout the probe, or None.
+    At least one full repetition must be visible, so periods longer than half the probe (or than
+    `max_period`) are not detected.
+    """
+    min_period = max(1, round(MIN_LOOP_SECONDS * fps), min_period or 0)
+    longest = len(frames) // 2 if max_period is None else min(max_period, len(frames) // 2)
+    for period in range(min_period, longest + 1):
+        # The percentile interpolates between the sorted fractions at `rank` and the next one, so
+        # it is above the tolerance as soon as that many pairs are; a sample can show that exactly
+        pairs = len(frames) - period
+        rank = math.floor(LOOP_MATCH_PERCENTILE / 100 * (pairs - 1))
+        sampled = (np.abs(frames[period::LOOP_SAMPLE_STRIDE] - frames[:-period:LOOP_SAMPLE_STRIDE])
+                   > SAME_PIXEL_TOLERANCE).mean(axis=(1, 2))
+        if np.count_nonzero(sampled > tolerance) >= pairs - rank:
+            continue
+        if np.percentile(changed_fraction(frames, period), LOOP_MATCH_PERCENTILE) <= tolerance:
+            return period
+    return None
+
+
+def find_loop(frames: np.ndarray, fps: int, max_period: int | None = None,
+              min_period: int | None = None) -> int | None:
+    """
+    detect_loop_period with a tolerance relative to the typical motion between frames. Only the
+    pixels that change at all are compared: the fractions are scaled back to the whole frame,
+    so the result is the same, but a small moving object costs a small share of the work.
+    """
+    changing = (frames.max(axis=0) - frames.min(axis=0)) > SAME_PIXEL_TOLERANCE
+    if not changing.any():
+        return None
+    rows, cols = np.flatnonzero(changing.any(axis=1)), np.flatnonzero(changing.any(axis=0))
+    area = frames[:, rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    share = area[0].size / frames[0].size
+    typical_motion = float(np.median(changed_fraction(area, 1))) * share
+    tolerance = max(SAME_FRAME_TOLERANCE, LOOP_TOLERANCE * typical_motion)
+    return detect_loop_period(area, fps, tolerance / share, max_period, min_period)
+
+
+def collect_probe(frames, probe_fps: int = PROBE_FPS) -> list:
+    """
+    Takes probe frames from `frames`, an iterator that captures them lazily, until a loop has
+    repeated LOOP_CONFIRMATIONS times or the iterator ends. Every frame not taken is a capture
+    round trip saved, and analyze_motion then finds the loop in the frames taken. Each check
+    only tries the periods that the new frames made confirmable.
+    """
+    taken, gray = [], []
+    check_every = max(1, round(PROBE_CHECK_SECONDS * probe_fps))
+    checked = 0  # Longest period tried so far
+    for frame in frames:
+        taken.append(frame)
+        gray.append(to_gray([frame])[0])
+        if len(gray) % check_every:
+            continue
+        longest = len(gray) // LOOP_CONFIRMATIONS
+        if find_loop(np.stack(gray), probe_fps, longest, checked + 1):
+            break
+        checked = longest
+    return taken
+
+
+def is_smooth_at(frames: np.ndarray, probe_fps: int, fps: int) -> bool:
+    """Whether sampling the probe down to `fps` keeps moving objects overlapping frame to frame."""
+    step = probe_fps / fps
+    indices = np.unique(np.round(np.arange(0, len(frames), step)).astype(int))
+    indices = indices[indices < len(frames)]
+    if len(indices) < 2:
+        return True
+    per_probe_frame = float(np.median(changed_fraction(frames, 1, MOTION_THRESHOLD)))
+    per_output_frame = float(np.median(changed_fraction(frames[indices], 1, MOTION_THRESHOLD)))
+    return per_output_frame >= MIN_MOTION_GROWTH * step * per_probe_frame
+
+
+def choose_fps(frames: np.ndarray, probe_fps: int, period: int | None = None,
+               candidates: tuple[int, ...] = FPS_CANDIDATES) -> int:
+    """
+    Lowest candidate fps at which motion stays smooth. With a loop, the fps must also fit a
+    whole number of frames into the period, or the seam would show.
+    """
+    candidates = [fps for fps in candidates if fps <= probe_fps]
+    for fps in candidates:
+        if period is not None:
+            frames_per_loop = period * fps / probe_fps
+            if abs(frames_per_loop - round(frames_per_loop)) > LOOP_ALIGNMENT_TOLERANCE:
+                continue
+        if is_smooth_at(frames, probe_fps, fps):
+            return fps
+    return probe_fps
+
+
+def motion_box(frames: np.ndarray, threshold: float = MOTION_THRESHOLD) -> tuple[int, int, int, int] | None:
+    """
+    Bounding box (left, top, right, bottom; right/bottom exclusive) of every pixel that changes
+    anywhere in the probe, in probe pixels. None when nothing moves.
+    """
+    if len(frames) < 2:
+        return None
+    moved = (np.abs(np.diff(frames, axis=0)) > threshold).any(axis=0)
+    rows, cols = np.flatnonzero(moved.any(axis=1)), np.flatnonzero(moved.any(axis=0))
+    if len(rows) == 0:
+        return None
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def box_to_clip(box: tuple[int, int, int, int], probe_scale: float, width: int, height: int,
+                margin: int = CROP_MARGIN) -> dict:
+    """Maps a probe-pixel box back to a CSS-pixel clip rectangle, padded by `margin` and kept inside the viewport."""
+    left, top, right, bottom = box
+    x = max(0, math.floor(left / probe_scale) - margin)
+    y = max(0, math.floor(top / probe_scale) - margin)
+    right = min(width, math.ceil(right / probe_scale) + margin)
+    bottom = min(height, math.ceil(bottom / probe_scale) + margin)
+    return {"x": x, "y": y, "width": right - x, "height": bottom - y}
+
+
+def analyze_motion(frames, probe_fps: int = PROBE_FPS) -> dict:
+    """
+    Picks the render timing for a probe capture taken at `probe_fps`:
+      - static pages become a single frame,
+      - looping animations are rendered for exactly one period,
+      - anything else for NO_LOOP_SECONDS (or the whole probe, if shorter),
+    at the lowest fps that keeps motion smooth. "motion_box" is where the motion happens (see
+    motion_box), for cropping the render to it.
+    """
+    gray = to_gray(frames)
+    probe_seconds = len(gray) / probe_fps
+
+    if len(gray) < 2 or changed_fraction(gray, 1).max() <= SAME_FRAME_TOLERANCE:
+        fps = min(FPS_CANDIDATES)
+        return {"duration": 1 / fps, "fps": fps, "loop_seconds": None, "static": True, "probe_seconds": probe_seconds,
+                "motion_box": None}
+
+    period = find_loop(gray, probe_fps)
+    fps = choose_fps(gray, probe_fps, period)
+    if period is not None:
+        loop_seconds = period / probe_fps
+        # Whole frames at the chosen fps, so the encoded timeline ends exactly on the seam
+        duration = round(loop_seconds * fps) / fps
+    else:
+        loop_seconds = None
+        duration = min(NO_LOOP_SECONDS, probe_seconds)
+    return {"duration": duration, "fps": fps, "loop_seconds": loop_seconds, "static": False, "probe_seconds": probe_seconds,
+            "motion_box": motion_box(gray)}
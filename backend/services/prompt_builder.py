@@ -0,0 +1,183 @@
+import os
+import re
+from functools import lru_cache
+try:
+    from .animation_examples import EXAMPLES, rank_examples
+    from . import metrics
+except (ImportError, ValueError):
+    from animation_examples import EXAMPLES, rank_examples
+    import metrics
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Input token budget for one generation request (system prompt + user prompt). Examples are
+# compacted, then dropped, until the prompt fits; the rest of the prompt is never cut.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2000"))
+PROMPT_MAX_EXAMPLES = int(os.getenv("PROMPT_MAX_EXAMPLES", "2"))
+# tiktoken encoding used to count tokens when tiktoken is installed; otherwise they are estimated
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "o200k_base")
+
+# How an example is included, from most to least faithful
+EXAMPLE_MODES = ("full", "minified", "skeleton")
+
+USER_PROMPT_TEMPLATE = """Create an animated HTML page for this request:
+
+"{prompt}"
+
+REQUIREMENTS:
+- Match the description EXACTLY - include all requested elements
+- Make it smooth and performant (target 30-60fps)
+- Use the most appropriate technique (CSS, Canvas, GSAP, Three.js, etc.)
+- Ensure animation loops seamlessly
+- Match the requested style/aesthetic precisely
+- Keep code clean and minimal
+- Output ONLY the complete HTML code starting with <!DOCTYPE html>
+
+{examples}
+
+Generate the full, production-ready code now:"""
+
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+# Only comments preceded by whitespace, so "https://..." survives
+_LINE_COMMENT = re.compile(r"(^|\s)//[^\n]*", re.MULTILINE)
+_STYLE_BLOCK = re.compile(r"(<style[^>]*>)(.*?)(</style>)", re.DOTALL)
+_CSS_SPACE = re.compile(r"\s*([{};:,])\s*")
+_SCRIPT_SRC = re.compile(r"<script[^>]+src=\"https?://[^\"]*?/([\w.-]+?)(?:\.min)?\.js\"")
+_KEYFRAMES = re.compile(r"@keyframes\s+([\w-]+)")
+
+# Code markers -> technique named in an example skeleton
+_TECHNIQUES = (
+    ("getContext('2d')", "Canvas 2D drawing"),
+    ("requestAnimationFrame", "requestAnimationFrame loop"),
+    ("gsap.timeline", "GSAP timeline"),
+    ("gsap.", "GSAP tweens"),
+    ("THREE.", "Three.js scene"),
+    ("<svg", "inline SVG"),
+    ("transform", "CSS transforms"),
+    ("linear-gradient", "CSS gradients"),
+    ("box-shadow", "box-shadow glow"),
+)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(PROMPT_TOKENIZER)
+    except Exception as e:
+        # The encoding file is fetched on first use; without it, fall back to the estimate
+        print(f"WARNING: tiktoken encoding '{PROMPT_TOKENIZER}' unavailable ({e}), estimating tokens")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text`: exact with tiktoken, otherwise estimated at ~4 characters per token."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _split_example(example: str) -> tuple[str, str]:
+    """(header with title and user request, HTML code) of an EXAMPLES entry."""
+    header, _, code = example.partition("Complete Code:")
+    return header.strip(), code.strip()
+
+
+def minify_code(code: str) -> str:
+    """
+    Drops comments, indentation and blank lines and puts each style sheet on one line.
+    Script line breaks are kept so code relying on automatic semicolons still parses.
+    """
+    code = _HTML_COMMENT.sub("", code)
+    code = _BLOCK_COMMENT.sub("", code)
+    code = _LINE_COMMENT.sub(r"\1", code)
+    code = _STYLE_BLOCK.sub(lambda m: m.group(1) + _CSS_SPACE.sub(r"\1", " ".join(m.group(2).split())) + m.group(3), code)
+    return "\n".join(line.strip() for line in code.splitlines() if line.strip())
+
+
+@lru_cache(maxsize=None)
+def compact_example(key: str, mode: str) -> str:
+    """The example in the given EXAMPLE_MODES form, in get_relevant_examples' layout."""
+    example = EXAMPLES[key]
+    if mode == "full":
+        return example
+    header, code = _split_example(example)
+    if mode == "minified":
+        return f"\n{header}\n\nComplete Code:\n{minify_code(code)}\n"
+
+    # Skeleton: what the example does and how, without the code
+    approach = [f"{name} (CDN)" for name in dict.fromkeys(_SCRIPT_SRC.findall(code))]
+    approach += [f"@keyframes {name}" for name in dict.fromkeys(_KEYFRAMES.findall(code))]
+    approach += [technique for marker, technique in _TECHNIQUES if marker in code]
+    return f"\n{header}\n\nApproach: {', '.join(approach) or 'plain HTML/CSS'}\n"
+
+
+def format_examples(keys: list[str], mode: str) -> str:
+    if not keys:
+        return ""
+    examples_text = "\n\nRELEVANT EXAMPLES FOR REFERENCE:\n"
+    examples_text += "=" * 50 + "\n"
+    for key in keys:
+        examples_text += compact_example(key, mode) + "\n"
+        examples_text += "=" * 50 + "\n"
+    return examples_text
+
+
+class BuiltPrompt:
+    """The assembled messages for one generation request and what went into them."""
+
+    def __init__(self, system: str, user: str, input_tokens: int, budget: int, examples: list[str], example_mode: str):
+        self.system = system
+        self.user = user
+        self.input_tokens = input_tokens
+        self.budget = budget
+        self.examples = examples
+        self.example_mode = example_mode
+
+    @property
+    def over_budget(self) -> bool:
+        return self.input_tokens > self.budget
+
+    def to_dict(self) -> dict:
+        return {
+            "input_tokens": self.input_tokens,
+            "budget": self.budget,
+            "examples": self.examples,
+            "example_mode": self.example_mode,
+        }
+
+
+def build_prompt(user_prompt: str, system_prompt: str, budget: int = PROMPT_TOKEN_BUDGET,
+                 max_examples: int = PROMPT_MAX_EXAMPLES) -> BuiltPrompt:
+    """
+    Assembles the user prompt with the most relevant examples, as faithfully as `budget` allows.
+
+    Tries every example in full, then minified, then as skeletons; if even the skeletons don't
+    fit, the least relevant examples are dropped one at a time. A prompt that is over budget with
+    no examples at all is returned as is (over_budget is then True).
+    """
+    prompt = user_prompt.strip()
+    keys = rank_examples(user_prompt, max_examples) if max_examples > 0 else []
+    fixed_tokens = count_tokens(system_prompt)
+
+    def assemble(selected: list[str], mode: str) -> BuiltPrompt:
+        user = USER_PROMPT_TEMPLATE.format(prompt=prompt, examples=format_examples(selected, mode))
+        return BuiltPrompt(system_prompt, user, fixed_tokens + count_tokens(user), budget, selected, mode if selected else "none")
+
+    built = None
+    for count in range(len(keys), -1, -1):
+        for mode in EXAMPLE_MODES if count else ("full",):
+            built = assemble(keys[:count], mode)
+            if not built.over_budget:
+                break
+        if not built.over_budget:
+            break
+
+    metrics.LLM_INPUT_TOKENS.observe(built.input_tokens, examples=built.example_mode)
+    return built
@@ -0,0 +1,109 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from services import metrics
+from services.prompt_text import normalize_prompt
+
+PROMPT_CACHE_PATH = os.getenv(
+    "PROMPT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompt_cache.sqlite3"),
+)
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "1000"))
+PROMPT_CACHE_TTL_SECONDS = float(os.getenv("PROMPT_CACHE_TTL", str(7 * 24 * 60 * 60)))
+
+
+class PromptCache:
+    """
+    SQLite-backed cache of generated HTML, keyed by normalized prompt + model + template version.
+    Entries expire `ttl_seconds` after they were generated; past `max_entries` the least recently
+    used ones are evicted.
+    """
+
+    def __init__(self, path: str = PROMPT_CACHE_PATH, max_entries: int = PROMPT_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = PROMPT_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """The database, opened (and created) on first use rather than at import. Call with _lock held."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS prompt_cache (
+                    key TEXT PRIMARY KEY,
+                    normalized_prompt TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    html TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_cache_last_used ON prompt_cache (last_used_at)")
+            self._conn.commit()
+        return self._conn
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(prompt: str, model: str, template_version: str) -> str:
+        payload = f"{template_version}\n{model}\n{normalize_prompt(prompt)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, prompt: str, model: str, template_version: str) -> str | None:
+        if not self.enabled:
+            return None
+        key = self.key(prompt, model, template_version)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT html, created_at FROM prompt_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM prompt_cache WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                metrics.PROMPT_CACHE_REQUESTS.inc(result="miss")
+                return None
+            conn.execute("UPDATE prompt_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            metrics.PROMPT_CACHE_REQUESTS.inc(result="hit")
+            return row[0]
+
+    def put(self, prompt: str, model: str, template_version: str, html: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(prompt, model, template_version), normalize_prompt(prompt), model, html, now, now),
+            )
+            conn.execute("DELETE FROM prompt_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """DELETE FROM prompt_cache WHERE key IN (
+                    SELECT key FROM prompt_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def stats(self) -> dict:
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._connection().execute("SELECT COUNT(*) FROM prompt_cache").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+prompt_cache = PromptCache()
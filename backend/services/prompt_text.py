@@ -0,0 +1,23 @@
+import re
+
+# Filler words that don't change what animation is being asked for.
+# Negations ("no", "not", "without") are deliberately kept.
+STOPWORDS = frozenset({
+    "a", "an", "the", "of", "to", "in", "on", "at", "for", "with", "that", "this", "is", "are",
+    "be", "it", "its", "and", "some", "please", "me", "i", "want", "make", "create", "show",
+    "generate", "draw", "animation", "animated",
+})
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Reduce a prompt to the words that matter, so trivially different phrasings share a key:
+    "A red ball bouncing." and "a red ball  bouncing" both become "red ball bouncing".
+    """
+    text = _PUNCTUATION.sub(" ", prompt.lower())
+    words = [w for w in _WHITESPACE.split(text) if w and w not in STOPWORDS]
+    # A prompt made only of filler words still needs a stable, non-empty key
+    return " ".join(words) or _WHITESPACE.sub(" ", text).strip()
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+CACHE_DIR = os.getenv("GIF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "gif-render-cache"))
+CACHE_MAX_BYTES = int(os.getenv("GIF_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv("GIF_CACHE_TTL", str(24 * 60 * 60)))
+
+
+def render_cache_key(html_content: str, **options) -> str:
+    """Content address of a render: hash of the HTML plus every option that affects the output."""
+    payload = json.dumps({"html": html_content, **options}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Finished renders on local disk, addressed by `render_cache_key`.
+
+    Entries expire `ttl_seconds` after they were stored, and the least recently used ones are
+    evicted once the directory grows past `max_bytes`. Each file's mtime records when it was
+    stored and its atime when it was last served, so the index survives restarts.
+    Each entry keeps the file extension it was stored with (`suffix` unless put() is given one).
+    Entries can be evicted at any time, so files that are about to be served are pinned first.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 ttl_seconds: float = CACHE_TTL_SECONDS, suffix: str = ".gif"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._suffixes = {}  # key -> file extension
+        self._total_bytes = 0
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self._suffixes.get(key, self.suffix))
+
+    def _load_index(self):
+        found = []
+        for name in os.listdir(self.directory):
+            key, suffix = os.path.splitext(name)
+            if not suffix:
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            found.append((stat.st_atime, key, suffix, stat.st_size))
+        for _, key, suffix, size in sorted(found):
+            self._entries[key] = size
+            self._suffixes[key] = suffix
+            self._total_bytes += size
+        self._evict()
+
+    def _remove(self, key: str):
+        path = self._path(key)
+        size = self._entries.pop(key, 0)
+        self._suffixes.pop(key, None)
+        self._total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError as e:
+            # Missing already, or still open on Windows; it will be retried on the next load
+            print(f"Error removing cache entry {key}: {e}")
+
+    def _evict(self):
+        # The newest entry always stays, even if it alone is over budget
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def get(self, key: str) -> str | None:
+        """Path of the cached render, or None on a miss."""
+        if not self.enabled or key not in self._entries:
+            self.misses += 1
+            return None
+
+        path = self._path(key)
+        try:
+            stored_at = os.stat(path).st_mtime
+        except OSError:
+            stored_at = None
+        if stored_at is None or time.time() - stored_at > self.ttl_seconds:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        # Record the access for LRU without touching the stored-at time
+        os.utime(path, (time.time(), stored_at))
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def put(self, key: str, source_path: str, suffix: str | None = None) -> str:
+        """Move a finished render into the cache (as a `suffix` file) and return its cached path."""
+        self._suffixes[key] = suffix or self.suffix
+        path = self._path(key)
+        shutil.move(source_path, path)
+        size = os.path.getsize(path)
+        if key in self._entries:
+            self._total_bytes -= self._entries.pop(key)
+        self._entries[key] = size
+        self._total_bytes += size
+        self._evict()
+        return path
+
+    def pin(self, path: str) -> str:
+        """
+        A private hard link to a cached file (a copy where links aren't supported) that eviction
+        can't take away, e.g. while it is streamed to a client; the caller deletes it.
+        Raises FileNotFoundError if the entry is already gone.
+        """
+        pinned = os.path.join(tempfile.gettempdir(), f"render-{uuid.uuid4().hex}{os.path.splitext(path)[1]}")
+        try:
+            os.link(path, pinned)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copyfile(path, pinned)
+        return pinned
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
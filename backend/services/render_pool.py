@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import queue
+import asyncio
+import itertools
+import threading
+import subprocess
+from services import metrics
+
+# Path to the long-lived worker script
+WORKER_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts", "render_worker.py")
+
+POOL_SIZE = int(os.getenv("GIF_RENDER_POOL_SIZE", "2"))
+MAX_RENDERS_PER_BROWSER = int(os.getenv("GIF_MAX_RENDERS_PER_BROWSER", "50"))
+RENDER_TIMEOUT_SECONDS = float(os.getenv("GIF_RENDER_TIMEOUT", "120"))
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("GIF_HEALTH_CHECK_INTERVAL", "30"))
+WORKER_STARTUP_TIMEOUT_SECONDS = 60
+PING_TIMEOUT_SECONDS = 10
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process exited or stopped answering."""
+
+
+class RenderWorker:
+    """
+    Handle on one `render_worker.py` subprocess.
+    Playwright stays inside the subprocess (same isolation as the old one-shot script, so the
+    Uvicorn event loop never touches it); we only exchange JSON lines over its stdin/stdout.
+    """
+
+    def __init__(self, worker_id: int, max_renders: int = MAX_RENDERS_PER_BROWSER, command: list[str] | None = None):
+        self.worker_id = worker_id
+        self.max_renders = max_renders
+        self.command = command or [sys.executable, WORKER_SCRIPT_PATH]
+        self.process = None
+        self._messages = None
+        self._ids = itertools.count(1)
+
+    def start(self):
+        cmd = self.command + ["--max-renders", str(self.max_renders)]
+        print(f"Starting render worker {self.worker_id}: {' '.join(cmd)}")
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=None,  # Browser logs go straight to the server log
+            text=True,
+            encoding='utf-8',
+            bufsize=1,
+        )
+        self._messages = queue.Queue()
+        threading.Thread(target=self._read_messages, args=(self.process, self._messages), daemon=True).start()
+
+        message = self._next_message(WORKER_STARTUP_TIMEOUT_SECONDS)
+        if message.get("type") != "ready":
+            self.stop()
+            raise WorkerCrashed(f"Render worker {self.worker_id} failed to start: {message}")
+
+    @staticmethod
+    def _read_messages(process, messages: queue.Queue):
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    messages.put(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Render worker sent invalid message: {line}")
+        finally:
+            # EOF: the worker is gone
+            messages.put(None)
+
+    def _next_message(self, timeout: float) -> dict:
+        try:
+            message = self._messages.get(timeout=timeout)
+        except queue.Empty:
+            self.stop()
+            raise WorkerCrashed(f"Render worker {self.worker_id} timed out after {timeout}s")
+        if message is None:
+            try:
+                exit_code = self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                exit_code = None
+            raise WorkerCrashed(f"Render worker {self.worker_id} exited with code {exit_code}")
+        return message
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def request(self, message: dict, timeout: float = RENDER_TIMEOUT_SECONDS, on_progress=None) -> dict:
+        """
+        Send one job and block until its reply arrives.
+        Progress messages for the job are passed to `on_progress` (called on this thread).
+        """
+        if not self.is_alive():
+            raise WorkerCrashed(f"Render worker {self.worker_id} is not running")
+
+        message = dict(message, id=next(self._ids))
+        try:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerCrashed(f"Render worker {self.worker_id} pipe closed: {e}")
+
+        while True:
+            reply = self._next_message(timeout)
+            # Replies to requests that previously timed out are discarded
+            if reply.get("id") != message["id"]:
+                continue
+            if reply.get("type") == "progress":
+                if on_progress is not None:
+                    on_progress(reply)
+                continue
+            return reply
+
+    def ping(self) -> bool:
+        try:
+            reply = self.request({"type": "ping"}, timeout=PING_TIMEOUT_SECONDS)
+        except WorkerCrashed:
+            return False
+        return reply.get("type") == "pong"
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write(json.dumps({"type": "shutdown"}) + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=10)
+            except Exception:
+                self.process.kill()
+                self.process.wait()
+
+
+def record_stage_timings(job_type: str, stats: dict):
+    """Turns the browser-side timings and request counts a worker reports with each job into metrics."""
+    if "browser_launch_seconds" in stats:
+        metrics.BROWSER_LAUNCH_SECONDS.observe(stats["browser_launch_seconds"])
+    if "page_load_seconds" in stats:
+        metrics.PAGE_LOAD_SECONDS.observe(stats["page_load_seconds"], type=job_type)
+    for seconds in stats.get("frame_capture_seconds", ()):
+        metrics.FRAME_CAPTURE_SECONDS.observe(seconds, type=job_type)
+    for result in ("vendored", "remote", "blocked"):
+        if stats.get(f"{result}_requests"):
+            metrics.RENDER_EXTERNAL_REQUESTS.inc(stats[f"{result}_requests"], type=job_type, result=result)
+    if stats.get("blocked_requests"):
+        metrics.RENDER_BLOCKED_PAGES.inc(type=job_type)
+
+
+class RenderPool:
+    """
+    Fixed-size pool of warm render workers.
+    Jobs wait for an idle worker, so at most `size` renders (and Chromium instances) run at once.
+    Workers that crash or hang are replaced, and idle workers are health-checked periodically.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_renders: int = MAX_RENDERS_PER_BROWSER,
+                 render_timeout: float = RENDER_TIMEOUT_SECONDS,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL_SECONDS,
+                 worker_command: list[str] | None = None):
+        self.size = size
+        self.max_renders = max_renders
+        self.render_timeout = render_timeout
+        self.health_check_interval = health_check_interval
+        self.worker_command = worker_command
+        self._idle = None
+        self._workers = []
+        self._start_lock = asyncio.Lock()
+        self._health_task = None
+        self._running = set()  # Jobs still running on a worker, including ones their caller gave up on
+        self.waiting = 0  # Jobs waiting for an idle worker
+        self.busy = 0
+
+    @property
+    def started(self) -> bool:
+        return self._idle is not None
+
+    async def start(self):
+        async with self._start_lock:
+            if self.started:
+                return
+            workers = [self._new_worker(i) for i in range(self.size)]
+            results = await asyncio.gather(*(asyncio.to_thread(w.start) for w in workers), return_exceptions=True)
+            errors = [r for r in results if isinstance(r, Exception)]
+            if errors:
+                await asyncio.gather(*(asyncio.to_thread(w.stop) for w in workers))
+                raise errors[0]
+            self._workers = workers
+            self._idle = asyncio.Queue()
+            for worker in workers:
+                self._idle.put_nowait(worker)
+            if self.health_check_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+            print(f"Render pool started with {self.size} workers")
+
+    async def shutdown(self):
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        workers, self._workers, self._idle = self._workers, [], None
+        await asyncio.gather(*(asyncio.to_thread(w.stop) for w in workers))
+
+    def _new_worker(self, worker_id: int) -> RenderWorker:
+        return RenderWorker(worker_id, self.max_renders, self.worker_command)
+
+    async def _restart(self, worker: RenderWorker) -> RenderWorker:
+        print(f"Restarting render worker {worker.worker_id}")
+        await asyncio.to_thread(worker.stop)
+        replacement = self._new_worker(worker.worker_id)
+        await asyncio.to_thread(replacement.start)
+        self._workers = [replacement if w is worker else w for w in self._workers]
+        return replacement
+
+    async def render(self, job: dict, on_progress=None) -> dict:
+        """
+        Run a render job on the next idle worker and return its stats.
+        `on_progress(frames_captured)` is called from a worker thread as frames are captured.
+        """
+        return await self._submit(dict(job, type="render"), on_progress)
+
+    async def capture(self, job: dict, on_progress=None) -> dict:
+        """Capture one slice of frames (see render_worker.py) on the next idle worker."""
+        return await self._submit(dict(job, type="capture"), on_progress)
+
+    async def probe(self, job: dict) -> dict:
+        """Detect an animation's loop, duration and fps (see services/motion_analysis.py)."""
+        return await self._submit(dict(job, type="probe"))
+
+    async def _submit(self, job: dict, on_progress=None) -> dict:
+        if not self.started:
+            await self.start()
+
+        self.waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+        # Shielded: a caller that gives up (e.g. the last single-flight waiter leaving) can't stop
+        # the worker thread, and the worker must not take another job while that thread still
+        # reads this job's replies
+        run = asyncio.ensure_future(self._run_on(worker, job, on_progress))
+        self._running.add(run)
+        run.add_done_callback(self._forget_run)
+        reply = await asyncio.shield(run)
+
+        if reply.get("type") == "error":
+            raise RuntimeError(f"GIF render failed: {reply.get('error')}")
+        stats = reply.get("stats", {})
+        record_stage_timings(job["type"], stats)
+        return stats
+
+    async def _run_on(self, worker: RenderWorker, job: dict, on_progress=None) -> dict:
+        """Runs one job on `worker`, then returns the worker (or its replacement) to the idle queue."""
+        self.busy += 1
+        try:
+            forward = None
+            if on_progress is not None:
+                forward = lambda message: on_progress(message.get("frames", 0))
+            return await asyncio.to_thread(worker.request, job, self.render_timeout, forward)
+        except WorkerCrashed as e:
+            print(f"Render worker {worker.worker_id} crashed: {e}")
+            worker = await self._restart(worker)
+            raise RuntimeError(f"GIF render worker crashed: {e}")
+        finally:
+            self.busy -= 1
+            if self._idle is not None:
+                self._idle.put_nowait(worker)
+
+    def _forget_run(self, run: asyncio.Future):
+        self._running.discard(run)
+        # Nobody awaits the run of a cancelled caller; its error was already logged
+        if not run.cancelled():
+            run.exception()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            # Only idle workers are checked; busy ones are covered by the render timeout
+            for _ in range(self._idle.qsize()):
+                worker = self._idle.get_nowait()
+                try:
+                    if not await asyncio.to_thread(worker.ping):
+                        worker = await self._restart(worker)
+                except Exception as e:
+                    print(f"Render pool health check failed: {e}")
+                finally:
+                    self._idle.put_nowait(worker)
+
+
+render_pool = RenderPool()
+metrics.RENDER_POOL_WAITING.set_function(lambda: render_pool.waiting)
+metrics.RENDER_POOL_BUSY.set_function(lambda: render_pool.busy)
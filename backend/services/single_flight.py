@@ -0,0 +1,40 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution.
+    The first caller starts the work as its own task; every caller, the first included, awaits
+    that task's result (or exception). A caller that is cancelled only stops waiting: the work
+    carries on for the others and is cancelled once nobody is waiting for it anymore.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._waiters: dict[asyncio.Task, int] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._in_flight
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        self._waiters.pop(task, None)
+
+    async def do(self, key: str, fn):
+        """Run `await fn()` once per key at a time and share its outcome with concurrent callers."""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if not task.done():
+                self._waiters[task] -= 1
+                if self._waiters[task] == 0:
+                    task.cancel()
@@ -0,0 +1,91 @@
+import os
+from urllib.parse import urlsplit
+
+# Local copies of the CDN libraries generated animations load, served to the renderer by request
+# interception so renders never wait on (or need) the network. Fill the directory with
+# `python scripts/fetch_vendor_libs.py`.
+VENDOR_DIR = os.getenv("GIF_VENDOR_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vendor"))
+BLOCK_EXTERNAL_REQUESTS = os.getenv("GIF_BLOCK_EXTERNAL_REQUESTS", "1") == "1"
+
+# Every CDN URL that SYSTEM_PROMPT or the animation examples point the model at -> file name
+VENDORED_LIBRARIES = {
+    "https://cdn.tailwindcss.com": "tailwindcss.js",
+    "https://cdnjs.cloudflare.com/ajax/libs/gsap/3.12.2/gsap.min.js": "gsap-3.12.2.min.js",
+    "https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js": "three-r128.min.js",
+    "https://cdnjs.cloudflare.com/ajax/libs/animejs/3.2.1/anime.min.js": "anime-3.2.1.min.js",
+    "https://unpkg.com/zdog@1/dist/zdog.dist.min.js": "zdog-1.dist.min.js",
+    "https://unpkg.com/typed.js@2.0.16/dist/typed.umd.js": "typed-2.0.16.umd.js",
+    "https://cdnjs.cloudflare.com/ajax/libs/vivus/0.4.6/vivus.min.js": "vivus-0.4.6.min.js",
+    "https://cdnjs.cloudflare.com/ajax/libs/particles.js/2.0.0/particles.min.js": "particles-2.0.0.min.js",
+}
+
+
+def normalize_library_url(url: str) -> str:
+    """
+    http and https, a trailing slash and any query string all name the same library, so
+    e.g. https://cdn.tailwindcss.com?plugins=forms is still served from the vendored copy.
+    """
+    parts = urlsplit(url)
+    return f"https://{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+class LibraryStore:
+    """
+    Memory-resident vendored libraries plus the request filter installed on renderer contexts.
+
+    Requests for a vendored URL are answered from memory. Known libraries that have not been
+    fetched yet still go to their CDN, and any other external request is aborted (and counted)
+    when `block_external` is set, so renders behave the same on air-gapped nodes.
+    """
+
+    def __init__(self, directory: str = VENDOR_DIR, libraries: dict[str, str] = VENDORED_LIBRARIES,
+                 block_external: bool = BLOCK_EXTERNAL_REQUESTS):
+        self.directory = directory
+        self.block_external = block_external
+        self.known = {normalize_library_url(url) for url in libraries}
+        self.files = {}  # normalized url -> bytes
+        self.served = 0
+        self.fetched_remote = 0
+        self.blocked = 0
+        missing = []
+        for url, name in libraries.items():
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    self.files[normalize_library_url(url)] = f.read()
+            else:
+                missing.append(name)
+        if missing:
+            print(f"Vendored libraries missing from {directory} (run scripts/fetch_vendor_libs.py): {', '.join(missing)}")
+
+    def lookup(self, url: str) -> bytes | None:
+        return self.files.get(normalize_library_url(url))
+
+    def counters(self) -> dict:
+        return {"served": self.served, "fetched_remote": self.fetched_remote, "blocked": self.blocked}
+
+    def handle(self, route):
+        """Playwright route handler; install with context.route("**/*", store.handle)."""
+        url = route.request.url
+        if not url.startswith(("http://", "https://")):
+            route.continue_()
+            return
+
+        body = self.lookup(url)
+        if body is not None:
+            self.served += 1
+            route.fulfill(
+                status=200,
+                body=body,
+                content_type="application/javascript",
+                headers={"Access-Control-Allow-Origin": "*"},
+            )
+        elif normalize_library_url(url) in self.known:
+            self.fetched_remote += 1
+            route.continue_()
+        elif self.block_external:
+            self.blocked += 1
+            print(f"Blocked external request from rendered page: {url}")
+            route.abort("blockedbyclient")
+        else:
+            route.continue_()
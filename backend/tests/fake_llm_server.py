@@ -0,0 +1,139 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Minimal OpenAI/Groq-compatible chat completions endpoint for offline tests.
+# Point a client at it with base_url=server.base_url.
+
+FAKE_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Fake Animation</title>
+    <style>
+        body { margin: 0; background: #111; display: flex; align-items: center; justify-content: center; height: 100vh; }
+        .ball { width: 60px; height: 60px; border-radius: 50%; background: #e11d48; animation: bounce 1s infinite alternate; }
+        @keyframes bounce { from { transform: translateY(-80px); } to { transform: translateY(80px); } }
+    </style>
+</head>
+<body>
+    <div class="ball"></div>
+</body>
+</html>"""
+
+
+class FakeLLMServer:
+    """
+    Serves canned completions after `latency` seconds; records every request body.
+    Requests with "stream": true get the content as SSE chunks of `chunk_size` characters,
+    `token_delay` seconds apart.
+
+    Failure injection: the first requests are answered with the HTTP statuses in `fail_with`, in
+    order (429s carry a `retry_after` header), and models in `model_status` always get that
+    status. `model_latency` overrides `latency` per model.
+    """
+
+    def __init__(self, latency: float = 0.0, content: str = FAKE_HTML, chunk_size: int = 40, token_delay: float = 0.0,
+                 fail_with: tuple[int, ...] = (), retry_after: float = 0, model_status: dict | None = None,
+                 model_latency: dict | None = None):
+        self.latency = latency
+        self.content = content
+        self.chunk_size = chunk_size
+        self.token_delay = token_delay
+        self.fail_with = list(fail_with)
+        self.retry_after = retry_after
+        self.model_status = model_status or {}
+        self.model_latency = model_latency or {}
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                model = body.get("model", "fake")
+                with server._lock:
+                    server.requests.append(body)
+                    status = server.fail_with.pop(0) if server.fail_with else server.model_status.get(model)
+                time.sleep(server.model_latency.get(model, server.latency))
+                if status is not None:
+                    self._error(status)
+                    return
+                if body.get("stream"):
+                    self._stream(body)
+                    return
+                payload = json.dumps({
+                    "id": f"chatcmpl-{len(server.requests)}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _error(self, status):
+                payload = json.dumps({"error": {"message": f"Injected failure {status}", "type": "fake_error", "code": str(status)}}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429:
+                    self.send_header("Retry-After", str(server.retry_after))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                content = server.content
+                for start in range(0, len(content), server.chunk_size):
+                    chunk = {
+                        "id": f"chatcmpl-{len(server.requests)}",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": content[start:start + server.chunk_size]},
+                            "finish_reason": None,
+                        }],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(server.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
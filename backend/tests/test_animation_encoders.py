@@ -0,0 +1,68 @@
+import sys
+import os
+import tempfile
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PIL import Image, ImageDraw
+from services import animation_encoders
+from services.animation_encoders import make_encoder, available_formats, _frame_durations_ms
+
+
+def make_frames(count: int) -> list[Image.Image]:
+    frames = []
+    for i in range(count):
+        img = Image.new("RGB", (80, 60), (10, 20, 60))
+        ImageDraw.Draw(img).ellipse((i * 6, 20, i * 6 + 16, 36), fill=(250, 180, 40))
+        frames.append(img)
+    return frames
+
+
+def test_durations_follow_the_ideal_timeline():
+    durations = _frame_durations_ms(30, 1000 / 30)
+    assert sum(durations) == 1000
+    assert set(durations) == {33, 34}
+
+
+@pytest.mark.parametrize("output_format", ["webp", "apng"])
+def test_pillow_formats_round_trip(output_format):
+    path = tempfile.mktemp(suffix=animation_encoders.OUTPUT_FORMATS[output_format]["extension"])
+    with make_encoder(output_format, path, 100.0) as encoder:
+        for frame in make_frames(6):
+            encoder.add_frame(frame)
+    assert encoder.frame_count == 6
+
+    with Image.open(path) as img:
+        assert img.n_frames == 6
+        assert img.info["loop"] == 0
+        img.seek(3)
+        assert img.convert("RGB").getpixel((3 * 6 + 8, 28))[0] > 200  # the ball moved here
+    os.remove(path)
+
+
+def test_video_formats_need_a_backend(monkeypatch):
+    monkeypatch.setattr(animation_encoders, "av", None)
+    monkeypatch.setattr(animation_encoders, "FFMPEG_BINARY", "no-such-ffmpeg")
+    assert "mp4" not in available_formats() and "webp" in available_formats()
+    with pytest.raises(ValueError):
+        make_encoder("mp4", "out.mp4", 33.3)
+    with pytest.raises(ValueError):
+        make_encoder("bmp", "out.bmp", 33.3)
+
+
+@pytest.mark.parametrize("output_format", ["mp4", "webm"])
+def test_video_encoding(output_format):
+    if animation_encoders.video_backend() is None:
+        pytest.skip("Neither PyAV nor ffmpeg is installed")
+    path = tempfile.mktemp(suffix=animation_encoders.OUTPUT_FORMATS[output_format]["extension"])
+    with make_encoder(output_format, path, 1000 / 30) as encoder:
+        for frame in make_frames(10):
+            encoder.add_frame(frame.crop((0, 0, 79, 59)))  # odd size gets padded
+    assert os.path.getsize(path) > 0
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
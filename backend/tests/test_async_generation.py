@@ -0,0 +1,99 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import httpx
+import pytest
+import uvicorn
+from services.llm_providers import GroqProvider
+from fake_llm_server import FakeLLMServer
+from services import groq_service
+from services.prompt_cache import PromptCache
+from routes import generate as generate_routes
+from main import app
+
+LATENCY = 0.5
+CONCURRENT_REQUESTS = 8
+
+
+@pytest.fixture(autouse=True)
+def no_prompt_cache(monkeypatch):
+    monkeypatch.setattr(generate_routes, "prompt_cache", PromptCache(max_entries=0))
+
+
+def test_concurrent_generations_do_not_block_the_event_loop(monkeypatch):
+    """Load test: N generations against a slow fake LLM finish in about one latency, not N."""
+    with FakeLLMServer(latency=LATENCY) as server:
+        monkeypatch.setattr(groq_service, "provider", GroqProvider(api_key="test-key", base_url=server.base_url))
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                started = time.perf_counter()
+                responses = await asyncio.gather(*(
+                    client.post("/generate-animation", json={"prompt": f"a bouncing ball {i}"})
+                    for i in range(CONCURRENT_REQUESTS)
+                ))
+                return responses, time.perf_counter() - started
+
+        responses, elapsed = asyncio.run(run())
+
+    assert [r.status_code for r in responses] == [200] * CONCURRENT_REQUESTS
+    assert all("<!DOCTYPE html>" in r.json()["generated_html"] for r in responses)
+    assert len(server.requests) == CONCURRENT_REQUESTS
+    # Serialized, this would take CONCURRENT_REQUESTS * LATENCY seconds
+    assert elapsed < LATENCY * CONCURRENT_REQUESTS / 2, f"took {elapsed:.2f}s"
+
+
+def serve_app_in_thread():
+    """Run the app on a real socket (ASGITransport buffers whole responses, hiding streaming)."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def test_stream_endpoint_sends_events_before_completion(monkeypatch):
+    with FakeLLMServer(latency=0.3, chunk_size=64, token_delay=0.05) as llm:
+        monkeypatch.setattr(groq_service, "provider", GroqProvider(api_key="test-key", base_url=llm.base_url))
+        server, thread, base_url = serve_app_in_thread()
+        try:
+            started = time.perf_counter()
+            first_event_at = None
+            events = []
+            with httpx.stream("POST", f"{base_url}/generate-animation/stream", json={"prompt": "a bouncing ball"}, timeout=10) as response:
+                assert response.headers["content-type"].startswith("text/event-stream")
+                for line in response.iter_lines():
+                    if line.startswith("event: "):
+                        first_event_at = first_event_at or time.perf_counter() - started
+                        events.append([line[len("event: "):], None])
+                    elif line.startswith("data: "):
+                        events[-1][1] = json.loads(line[len("data: "):])
+            total = time.perf_counter() - started
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    names = [name for name, _ in events]
+    assert names[0] == "progress"
+    assert names.count("token") > 1
+    assert names[-1] == "done"
+    streamed = "".join(data["text"] for name, data in events if name == "token")
+    assert streamed == llm.content
+    assert events[-1][1]["generated_html"].startswith("<!DOCTYPE html>")
+    # The first event goes out before the model's first token (0.3s) arrives
+    assert first_event_at < 0.25 < total, f"first event {first_event_at:.2f}s, total {total:.2f}s"
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,159 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import httpx
+import pytest
+from services import gif_service, batch_generation
+from services.batch_generation import RateLimiter
+from services.gif_jobs import GifJobQueue
+from services.llm_providers import LLM_PROVIDER
+from services.prompt_cache import PromptCache
+from routes import generate as generate_routes
+from routes import gif_jobs as gif_jobs_routes
+from limiter import limiter
+from main import app
+
+
+@pytest.fixture
+def fake_generate(monkeypatch):
+    """Generation takes as many tenths of a second as the prompt says ("3 ..." -> 0.3s)."""
+    running, peak = [0], [0]
+
+    async def generate(prompt):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        try:
+            await asyncio.sleep(int(prompt.split()[0]) / 10)
+        finally:
+            running[0] -= 1
+        if "fail" in prompt:
+            raise RuntimeError("Animation generation failed after 3 attempt(s): boom")
+        return f"<!DOCTYPE html><html><body><p>{prompt}</p></body></html>"
+
+    monkeypatch.setattr(generate_routes, "prompt_cache", PromptCache(max_entries=0))
+    monkeypatch.setattr(generate_routes, "generate_animation_async", generate)
+    monkeypatch.setattr(batch_generation, "_rate_limiters", {})
+    limiter.reset()  # other test modules share the per-IP rate limit
+    return peak
+
+
+async def post_batch(client, body: dict) -> list[dict]:
+    async with client.stream("POST", "/generate-animation/batch", json=body) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        return [json.loads(line) async for line in response.aiter_lines() if line]
+
+
+def test_rate_limiter_spaces_requests_after_a_burst():
+    async def run():
+        limiter = RateLimiter(per_minute=600, burst=2)  # one every 0.1s
+        started = time.perf_counter()
+        times = []
+        for _ in range(4):
+            await limiter.acquire()
+            times.append(time.perf_counter() - started)
+        return times
+
+    times = asyncio.run(run())
+    assert times[1] < 0.05  # the burst
+    assert 0.08 <= times[2] < 0.15 and 0.18 <= times[3] < 0.25
+
+
+def test_results_stream_as_they_complete(fake_generate):
+    prompts = ["5 slow ball", "1 quick square", "2 fail please", "1 quick circle"]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await post_batch(client, {"prompts": prompts, "concurrency": 2})
+
+    lines = asyncio.run(run())
+    results, summary = lines[:-1], lines[-1]["summary"]
+
+    assert [r["index"] for r in results] == [1, 2, 3, 0]
+    assert [r["status"] for r in results] == ["ok", "error", "ok", "ok"]
+    assert "<p>1 quick square</p>" in results[0]["generated_html"]
+    assert "boom" in results[1]["error"]
+    assert fake_generate[0] == 2
+    assert summary == dict(summary, prompts=4, succeeded=3, failed=1)
+
+
+def test_batch_renders_gifs(fake_generate, monkeypatch):
+    async def render(html_content, on_progress=None, **options):
+        assert options["output_format"] == "gif" and options["fps"] == 10
+        fd, path = tempfile.mkstemp(suffix=".gif")
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"GIF89a")
+        return path, "BYPASS"
+
+    monkeypatch.setattr(gif_service, "get_or_generate_gif", render)
+
+    async def run():
+        queue = GifJobQueue(max_queued=1, concurrency=1)
+        monkeypatch.setattr(batch_generation, "gif_jobs", queue)
+        monkeypatch.setattr(gif_jobs_routes, "gif_jobs", queue)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                lines = await post_batch(client, {"prompts": ["1 a", "1 b", "1 c"], "concurrency": 3,
+                                                  "gif": {"duration": 1, "fps": 10}})
+                gif = await client.get(lines[0]["gif"]["result_url"])
+                return lines, gif
+        finally:
+            await queue.shutdown()
+
+    lines, gif = asyncio.run(run())
+    # Three renders fit through a one-slot queue by waiting for room
+    assert [line["gif"]["status"] for line in lines[:-1]] == ["done"] * 3
+    assert gif.status_code == 200 and gif.content == b"GIF89a"
+
+
+def test_interactive_renders_are_accepted_while_a_batch_renders(fake_generate, monkeypatch):
+    started = []
+
+    async def render(html_content, on_progress=None, **options):
+        started.append(html_content)
+        await asyncio.sleep(0.2)
+        fd, path = tempfile.mkstemp(suffix=".gif")
+        os.close(fd)
+        return path, "BYPASS"
+
+    monkeypatch.setattr(gif_service, "get_or_generate_gif", render)
+    monkeypatch.setattr(batch_generation, "render_slots", asyncio.Semaphore(2))
+    monkeypatch.setattr(batch_generation, "_rate_limiters", {LLM_PROVIDER: RateLimiter(0)})
+
+    async def run():
+        queue = GifJobQueue(max_queued=3, concurrency=1)
+        monkeypatch.setattr(batch_generation, "gif_jobs", queue)
+        monkeypatch.setattr(gif_jobs_routes, "gif_jobs", queue)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                batch = asyncio.ensure_future(post_batch(client, {
+                    "prompts": [f"0 animation {i}" for i in range(8)], "concurrency": 8, "gif": {"duration": 1, "fps": 10}}))
+                while not started:
+                    await asyncio.sleep(0.01)
+                # Eight batch renders would fill the three queue places; they hold at most two
+                interactive = [await client.post("/gif-jobs", json={"html": "<html><body>now</body></html>"})
+                               for _ in range(2)]
+                return await batch, interactive, len(queue.jobs)
+        finally:
+            await queue.shutdown()
+
+    lines, interactive, jobs = asyncio.run(run())
+    assert [response.status_code for response in interactive] == [202, 202]
+    assert [line["gif"]["status"] for line in lines[:-1]] == ["done"] * 8
+    # The interactive renders ran ahead of the rest of the batch
+    assert started.index("<html><body>now</body></html>") < len(started) - 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import animation_examples
+from services.animation_examples import EXAMPLES, index, rank_examples, get_relevant_examples
+
+
+def test_ranks_by_relevance():
+    assert rank_examples("A red ball bouncing up and down") == ["bouncing", "floating"]
+    assert rank_examples("Neon text with cyberpunk glow", max_examples=1) == ["neon"]
+    assert rank_examples("A spinning cube in 3D") == ["3d_cube", "rotating"]
+    # The strongest match comes first even when a weaker one is earlier in EXAMPLES
+    assert rank_examples("rotating gradient background")[0] == "gradient"
+    scores = [score for _, score in index.search("glowing text typed letter by letter")]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_fuzzy_and_fallback():
+    assert rank_examples("bouncng bal", max_examples=1) == ["bouncing"]
+    assert rank_examples("confeti celebrations", max_examples=1) == ["confetti"]
+    assert rank_examples("a cat") == animation_examples.DEFAULT_EXAMPLES
+
+
+def test_prompts_selecting_the_same_examples_share_the_cache():
+    animation_examples._format_examples.cache_clear()
+    first = get_relevant_examples("A red ball, bouncing!")
+    assert get_relevant_examples("red ball bouncing") == first
+    assert animation_examples._format_examples.cache_info().hits == 1
+    assert first.count(EXAMPLES["bouncing"]) == 1
+
+
+def test_search_is_fast():
+    prompt = "A glowing neon ball bouncing over an ocean wave at sunset"
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.search(prompt)
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+if __name__ == "__main__":
+    test_ranks_by_relevance()
+    test_fuzzy_and_fallback()
+    test_prompts_selecting_the_same_examples_share_the_cache()
+    test_search_is_fast()
+    print("Example retrieval tests passed.")
@@ -0,0 +1,69 @@
+import sys
+import os
+import asyncio
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import httpx
+import pytest
+from services import metrics
+from services.prompt_cache import PromptCache
+from routes import generate as generate_routes
+from limiter import limiter
+from main import app
+
+PROMPTS = ["A red ball bouncing.", "a red ball bouncing", "A RED BALL, BOUNCING!", "red ball bouncing"]
+
+
+@pytest.fixture
+def fake_generate(monkeypatch):
+    calls = []
+
+    async def generate(prompt):
+        calls.append(prompt)
+        number = len(calls)
+        await asyncio.sleep(0.2)
+        if "fail" in prompt:
+            raise RuntimeError("Animation generation failed after 3 attempt(s): boom")
+        return f"<!DOCTYPE html><html><body>{number}</body></html>"
+
+    monkeypatch.setattr(generate_routes, "prompt_cache", PromptCache(max_entries=0))
+    monkeypatch.setattr(generate_routes, "generate_animation_async", generate)
+    limiter.reset()  # other test modules share the per-IP rate limit
+    metrics.registry.reset()
+    return calls
+
+
+def post_all(bodies: list[dict]) -> list[httpx.Response]:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/generate-animation", json=body) for body in bodies))
+
+    return asyncio.run(run())
+
+
+def test_identical_prompts_share_one_generation(fake_generate):
+    responses = post_all([{"prompt": prompt} for prompt in PROMPTS] + [{"prompt": "a spinning square"}])
+
+    assert [r.status_code for r in responses] == [200] * 5
+    assert len(fake_generate) == 2
+    assert len({r.json()["generated_html"] for r in responses[:4]}) == 1
+    assert metrics.LLM_COALESCED_REQUESTS.value() == 3
+
+
+def test_fresh_requests_and_failures(fake_generate):
+    responses = post_all([{"prompt": "a red ball bouncing", "fresh": True}] * 2)
+    assert len(fake_generate) == 2 and metrics.LLM_COALESCED_REQUESTS.value() == 0
+    assert responses[0].json() != responses[1].json()
+
+    # A failed generation fails every request waiting on it, without a second attempt
+    responses = post_all([{"prompt": "fail please"}] * 3)
+    assert [r.status_code for r in responses] == [502] * 3
+    assert len(fake_generate) == 3
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
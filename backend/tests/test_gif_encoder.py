@@ -0,0 +1,182 @@
+import sys
+import os
+import io
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageSequence
+from services.gif_encoder import StreamingGifEncoder, BackgroundEncoder
+from services.gif_palette import PaletteMapper, median_cut
+
+
+def make_frames(count=30, size=(120, 80)):
+    frames = []
+    for i in range(count):
+        img = Image.new("RGB", size, (20, 20, 60))
+        ImageDraw.Draw(img).rectangle((i * 3, 20, i * 3 + 20, 40), fill=(240, 60, 60))
+        frames.append(img)
+    return frames
+
+
+def test_streaming_encoder_round_trip():
+    frames = make_frames()
+    buf = io.BytesIO()
+    with StreamingGifEncoder(buf, 1000.0 / 30) as encoder:
+        for frame in frames:
+            encoder.add_frame(frame)
+
+    buf.seek(0)
+    with Image.open(buf) as gif:
+        decoded = [f.convert("RGB") for f in ImageSequence.Iterator(gif)]
+        assert gif.info.get("loop") == 0
+    assert len(decoded) == len(frames)
+    assert decoded[10].getpixel((35, 30)) == (240, 60, 60)
+    assert decoded[10].getpixel((5, 5)) == (20, 20, 60)
+
+
+def test_frame_delays_track_ideal_timeline():
+    buf = io.BytesIO()
+    with StreamingGifEncoder(buf, 1000.0 / 30) as encoder:
+        for frame in make_frames():
+            encoder.add_frame(frame)
+
+    buf.seek(0)
+    with Image.open(buf) as gif:
+        total = 0
+        for frame in ImageSequence.Iterator(gif):
+            total += frame.info["duration"]
+    # 30 frames at 30fps should last one second, not 30 * 30ms
+    assert total == 1000
+
+
+def test_background_encoder_matches_direct():
+    frames = make_frames()
+    direct, threaded = io.BytesIO(), io.BytesIO()
+    with StreamingGifEncoder(direct, 40) as encoder:
+        for frame in frames:
+            encoder.add_frame(frame)
+
+    background = BackgroundEncoder(StreamingGifEncoder(threaded, 40), max_pending=2)
+    for frame in frames:
+        background.add_frame(frame)
+    background.close()
+
+    assert background.frame_count == len(frames)
+    assert direct.getvalue() == threaded.getvalue()
+
+
+def test_median_cut_keeps_exact_colors():
+    colors = np.array([[20, 20, 60], [240, 60, 60], [0, 200, 0]], dtype=np.uint8)
+    pixels = np.repeat(colors, [500, 50, 5], axis=0)
+    palette = median_cut(pixels, colors=256)
+    assert sorted(map(tuple, palette)) == sorted(map(tuple, colors))
+
+    mapper = PaletteMapper(palette)
+    frame = colors[np.array([[0, 1], [2, 0]])]
+    assert (palette[mapper.map(frame)] == frame).all()
+
+
+def test_palette_modes_share_one_palette():
+    frames = make_frames()
+    for mode in ("global", "global_dither"):
+        buf = io.BytesIO()
+        with StreamingGifEncoder(buf, 40, palette_mode=mode, palette_window=4) as encoder:
+            for frame in frames:
+                encoder.add_frame(frame)
+        buf.seek(0)
+        with Image.open(buf) as gif:
+            palette = np.array(gif.getpalette()[:768]).reshape(-1, 3)
+            known = set(map(tuple, palette))
+            for frame in ImageSequence.Iterator(gif):
+                used = np.unique(np.asarray(frame.convert("RGB")).reshape(-1, 3), axis=0)
+                assert set(map(tuple, used)) <= known
+
+def decode(buf):
+    buf.seek(0)
+    with Image.open(buf) as gif:
+        return [(np.asarray(f.convert("RGB")), f.info["duration"]) for f in ImageSequence.Iterator(gif)]
+
+
+def test_delta_frames_decode_like_full_frames():
+    frames = make_frames()
+    full, delta = io.BytesIO(), io.BytesIO()
+    for buf, use_delta in ((full, False), (delta, True)):
+        with StreamingGifEncoder(buf, 40, delta=use_delta) as encoder:
+            for frame in frames:
+                encoder.add_frame(frame)
+
+    assert len(delta.getvalue()) < len(full.getvalue())
+    for (expected, _), (actual, _) in zip(decode(full), decode(delta)):
+        assert (expected == actual).all()
+
+
+def test_identical_frames_are_merged():
+    moving = make_frames(4)
+    buf = io.BytesIO()
+    with StreamingGifEncoder(buf, 40) as encoder:
+        for frame in [moving[0]] + [moving[1]] * 5 + moving[2:]:
+            encoder.add_frame(frame)
+
+    assert encoder.frame_count == 8
+    assert encoder.written_frames == 4
+    assert [duration for _, duration in decode(buf)] == [40, 200, 40, 40]
+
+
+def test_global_palette_is_rebuilt_for_colors_that_appear_later():
+    frames = []
+    for i in range(40):
+        img = Image.new("RGB", (120, 80), (20, 20, 60))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((10, 20, 40, 40), fill=(240, 60, 60))
+        if i >= 20:  # Long after the first palette window
+            draw.rectangle((60, 40, 110, 70), fill=(30, 220, 90))
+            draw.ellipse((70, 5, 100, 30), fill=(250, 240, 20))
+        frames.append(img)
+
+    buf = io.BytesIO()
+    with StreamingGifEncoder(buf, 40, palette_mode="global", palette_window=8) as encoder:
+        for frame in frames:
+            encoder.add_frame(frame)
+
+    assert encoder.palettes_built == 2
+    decoded = decode(buf)
+    assert len(decoded) == 2
+    for (pixels, _), expected in zip(decoded, (frames[0], frames[20])):
+        assert (pixels == np.asarray(expected)).all()
+
+    # A steady animation keeps its single palette
+    with StreamingGifEncoder(io.BytesIO(), 40, palette_mode="global", palette_window=8) as encoder:
+        for frame in make_frames():
+            encoder.add_frame(frame)
+    assert encoder.palettes_built == 1
+
+
+def test_global_palette_follows_a_fade_in():
+    y, x = np.mgrid[0:80, 0:120]
+    scene = np.stack([x * 2, y * 3, np.full_like(x, 128)], axis=2).astype(np.float32)
+    frames = [Image.fromarray((scene * min(1.0, i / 30)).astype(np.uint8)) for i in range(40)]
+
+    buf = io.BytesIO()
+    with StreamingGifEncoder(buf, 40, palette_mode="global", delta=False) as encoder:
+        for frame in frames:
+            encoder.add_frame(frame)
+
+    # Built from the dark first frames only, the palette would be off by up to ~130 levels here
+    last = decode(buf)[-1][0].astype(int)
+    error = np.abs(last - np.asarray(frames[-1], dtype=int)).max(axis=2)
+    assert error.mean() < 10 and error.max() <= 32
+
+
+if __name__ == "__main__":
+    test_streaming_encoder_round_trip()
+    test_frame_delays_track_ideal_timeline()
+    test_background_encoder_matches_direct()
+    test_median_cut_keeps_exact_colors()
+    test_palette_modes_share_one_palette()
+    test_delta_frames_decode_like_full_frames()
+    test_identical_frames_are_merged()
+    test_global_palette_is_rebuilt_for_colors_that_appear_later()
+    test_global_palette_follows_a_fade_in()
+    print("GIF encoder tests passed.")
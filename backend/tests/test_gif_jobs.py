@@ -0,0 +1,136 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import httpx
+from services import gif_service
+from services.gif_jobs import GifJobQueue, JobQueueFull
+from services.render_cache import RenderCache
+from routes import gif_jobs as gif_jobs_routes
+from main import app
+
+
+def fake_renderer(order: list, release: asyncio.Event):
+    """Stands in for get_or_generate_gif: reports progress, then waits for `release`."""
+    async def render(html_content, duration=None, fps=None, palette_mode="global", output_format="gif", on_progress=None, **capture):
+        order.append(html_content)
+        on_progress(45)
+        await release.wait()
+        fd, path = tempfile.mkstemp(suffix=".gif")
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"GIF89a" + html_content.encode())
+        return path, "BYPASS"
+    return render
+
+
+def test_priority_order_backpressure_and_progress(monkeypatch):
+    async def run():
+        order, release = [], asyncio.Event()
+        monkeypatch.setattr(gif_service, "get_or_generate_gif", fake_renderer(order, release))
+        queue = GifJobQueue(max_queued=2, concurrency=1)
+        try:
+            first = queue.submit({"html_content": "first"})
+            await asyncio.sleep(0.01)  # "first" is now running
+            low = queue.submit({"html_content": "low"}, priority=9)
+            high = queue.submit({"html_content": "high"}, priority=0)
+            try:
+                queue.submit({"html_content": "rejected"})
+                assert False, "queue should be full"
+            except JobQueueFull as e:
+                assert e.retry_after >= 1
+
+            assert first.status == "running" and first.frames_captured == 45
+            assert queue.queued_ahead(low) == 1 and queue.queued_ahead(high) == 0
+
+            release.set()
+            while not low.finished:
+                await asyncio.sleep(0.01)
+            assert order == ["first", "high", "low"]
+            assert low.status == "done" and low.frames_captured == low.total_frames
+            path = low.result_path
+        finally:
+            await queue.shutdown()
+        assert not os.path.exists(path)  # results are removed with their job
+
+    asyncio.run(run())
+
+
+def test_job_routes(monkeypatch):
+    async def run():
+        order, release = [], asyncio.Event()
+        monkeypatch.setattr(gif_service, "get_or_generate_gif", fake_renderer(order, release))
+        queue = GifJobQueue(max_queued=1, concurrency=1)
+        monkeypatch.setattr(gif_jobs_routes, "gif_jobs", queue)
+
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                created = await client.post("/gif-jobs", json={"html": "<p>a</p>", "duration": 3, "fps": 30})
+                assert created.status_code == 202
+                job = created.json()
+                await asyncio.sleep(0.01)
+                await client.post("/gif-jobs", json={"html": "<p>b</p>"})  # fills the queue
+
+                full = await client.post("/gif-jobs", json={"html": "<p>c</p>"})
+                assert full.status_code == 429
+                assert int(full.headers["Retry-After"]) >= 1
+
+                status = (await client.get(job["status_url"])).json()
+                assert status["status"] == "running"
+                assert status["progress"] == {"frames_captured": 45, "total_frames": 90}
+                assert (await client.get(job["result_url"])).status_code == 409
+                assert (await client.get("/gif-jobs/missing")).status_code == 404
+
+                release.set()
+                while queue.get(job["job_id"]).status != "done":
+                    await asyncio.sleep(0.01)
+                result = await client.get(job["result_url"])
+                assert result.status_code == 200
+                assert result.content == b"GIF89a<p>a</p>"
+        finally:
+            await queue.shutdown()
+
+    asyncio.run(run())
+
+
+def test_result_outlives_its_render_cache_entry(monkeypatch):
+    async def fake_render(html, width, height, duration, fps, palette_mode, on_progress=None, output_format="gif", **capture):
+        fd, path = tempfile.mkstemp(suffix=".gif")
+        with os.fdopen(fd, "wb") as f:
+            f.write(html.encode().ljust(100))
+        return path
+
+    # Room for one render: each new one evicts the previous
+    monkeypatch.setattr(gif_service, "render_cache", RenderCache(tempfile.mkdtemp(), max_bytes=150))
+    monkeypatch.setattr(gif_service, "generate_gif_from_html", fake_render)
+
+    async def run():
+        queue = GifJobQueue(max_queued=2, concurrency=1)
+        monkeypatch.setattr(gif_jobs_routes, "gif_jobs", queue)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                jobs = [(await client.post("/gif-jobs", json={"html": html})).json() for html in ("<p>a</p>", "<p>b</p>")]
+                for job in jobs:
+                    await queue.get(job["job_id"]).wait()
+
+                result = await client.get(jobs[0]["result_url"])
+                assert result.status_code == 200 and result.content.startswith(b"<p>a</p>")
+
+                os.remove(queue.get(jobs[1]["job_id"]).result_path)
+                expired = await client.get(jobs[1]["result_url"])
+                assert expired.status_code == 410
+        finally:
+            await queue.shutdown()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
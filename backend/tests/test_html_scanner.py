@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.html_scanner import scan_html
+from scripts.benchmark_html_scanner import legacy, single_pass, model_response
+
+BODY = "<div class=\"ball\"></div>\n<script>\n  requestAnimationFrame(function tick() { requestAnimationFrame(tick); });\n</script>\n" * 4
+DOCUMENT = f"<!DOCTYPE html>\n<html lang=\"en\">\n<head><title>Ball</title></head>\n<body>\n{BODY}</body>\n</html>"
+
+
+def test_matches_the_legacy_cleaning_and_validation():
+    responses = [
+        DOCUMENT,
+        f"```html\n{DOCUMENT}\n```",
+        f"Sure! Here it is:\n\n```html\n{DOCUMENT}\n```\nHope you like it.",
+        f"<HTML>\n<HEAD></HEAD>\n<BODY>{BODY}</BODY>\n</HTML>",
+        DOCUMENT.replace("</html>", ""),
+        DOCUMENT.replace("<!DOCTYPE html>\n", ""),
+        DOCUMENT.replace("requestAnimationFrame(tick);", "// TODO: animate"),
+        DOCUMENT.replace("<div", "/* add the ball here */<div", 1),
+        DOCUMENT.replace("requestAnimationFrame(tick);", "/// TODO: animate"),
+        DOCUMENT.replace("requestAnimationFrame(tick);", "x = a / b; // TODO: animate"),
+        f"<div class=\"ball\"></div>\n<style>.ball {{ width: 40px; }}</style>\n{BODY}",
+        "<!DOCTYPE html><html><body>too short</body></html>",
+        model_response(8),
+    ]
+    for raw in responses:
+        assert single_pass(raw) == legacy(raw), raw[:60]
+
+
+def test_diagnostics():
+    scan = scan_html(f"Here you go:\n```html\n{DOCUMENT}\n```")
+    assert scan.valid and scan.html == DOCUMENT
+    assert scan.fences == 2 and not scan.wrapped and not scan.truncated
+
+    truncated = scan_html(DOCUMENT.split("</script>")[0])
+    assert truncated.truncated and truncated.unclosed_tags == 1
+    assert truncated.missing_tags == ["html_close"]
+    assert truncated.error == "Missing closing </html> tag"
+
+    placeholder = scan_html(DOCUMENT.replace("requestAnimationFrame(tick);", "// TODO", 1))
+    assert placeholder.errors == ["Generated code contains placeholder comments"]
+    assert placeholder.placeholders == ["// TODO"]
+
+    # Non-ASCII text that changes length when lowercased doesn't shift the document
+    unicode = scan_html(f"İİİİ Straße:\n```html\n{DOCUMENT}\n```")
+    assert unicode.valid and unicode.html == DOCUMENT
+    assert scan_html("İİİİ" + DOCUMENT.replace("</html>", "")).error == "Missing closing </html> tag"
+
+    fragment = scan_html("<canvas id=\"c\"></canvas>")
+    assert fragment.wrapped and fragment.valid and fragment.html.startswith("<!DOCTYPE html>")
+    assert "<body>\n<canvas id=\"c\"></canvas>\n</body>" in fragment.html
+
+    assert scan_html("   ").errors == ["Empty HTML code"]
+    assert scan_html("<canvas></canvas>", wrap=False).error == "Missing DOCTYPE declaration"
+
+
+if __name__ == "__main__":
+    test_matches_the_legacy_cleaning_and_validation()
+    test_diagnostics()
+    print("HTML scanner tests passed.")
@@ -0,0 +1,117 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from services import groq_service
+from services.animation_examples import EXAMPLES
+from services.llm_providers import get_provider, GroqProvider, GeminiProvider, LocalProvider
+from services.llm_retry import RetryPolicy, CircuitBreakers, classify_error
+
+
+# Same names, module and status codes as google.api_core.exceptions, which google.generativeai
+# raises (not installed here; see test_gemini_errors_from_the_sdk for the real classes)
+class GoogleAPICallError(Exception):
+    code = None
+
+
+def _google_error(name: str, code: int):
+    return type(name, (GoogleAPICallError,), {"code": code, "__module__": "google.api_core.exceptions"})
+
+
+ResourceExhausted = _google_error("ResourceExhausted", 429)
+ServiceUnavailable = _google_error("ServiceUnavailable", 503)
+InternalServerError = _google_error("InternalServerError", 500)
+NotFound = _google_error("NotFound", 404)
+InvalidArgument = _google_error("InvalidArgument", 400)
+
+
+def test_providers_are_selected_by_name_without_network():
+    assert isinstance(get_provider("groq"), GroqProvider)
+    assert isinstance(get_provider("Gemini"), GeminiProvider)
+    assert isinstance(get_provider("local"), LocalProvider)
+    with pytest.raises(ValueError, match="Unknown LLM provider"):
+        get_provider("openai")
+    # Clients are only created on first use
+    assert GroqProvider()._async_client is None
+
+
+def test_local_provider_replays_the_matching_example(monkeypatch):
+    provider = LocalProvider(latency=0.2)
+    monkeypatch.setattr(groq_service, "provider", provider)
+    monkeypatch.setattr(groq_service, "DEFAULT_MODEL", provider.default_model)
+
+    started = time.perf_counter()
+    html = asyncio.run(groq_service.generate_animation_async("confetti falling for a celebration"))
+    elapsed = time.perf_counter() - started
+
+    assert html == EXAMPLES["confetti"].partition("Complete Code:")[2].strip()
+    assert provider.calls == 1
+    assert 0.2 <= elapsed < 1.0
+    assert groq_service.generate_animation("confetti falling for a celebration") == html
+
+
+def test_local_provider_streams_tokens(monkeypatch):
+    provider = LocalProvider(latency=0.05, tokens_per_second=5000)
+    monkeypatch.setattr(groq_service, "provider", provider)
+    monkeypatch.setattr(groq_service, "DEFAULT_MODEL", provider.default_model)
+
+    async def collect():
+        return [(event, data) async for event, data in groq_service.stream_animation("a spinning cube in 3D")]
+
+    started = time.perf_counter()
+    events = asyncio.run(collect())
+    elapsed = time.perf_counter() - started
+
+    tokens = [data for event, data in events if event == "token"]
+    assert len(tokens) > 100 and all(len(token) <= LocalProvider.CHARS_PER_TOKEN for token in tokens)
+    assert events[-1] == ("done", "".join(tokens))
+    assert elapsed >= provider.simulated_seconds(events[-1][1])
+
+
+def test_gemini_errors_are_classified_by_status():
+    gemini = GeminiProvider()
+    assert classify_error(ResourceExhausted("Quota exceeded"), gemini) == "rate_limit"
+    assert classify_error(ServiceUnavailable("The model is overloaded"), gemini) == "transient"
+    assert classify_error(InternalServerError("Internal error"), gemini) == "transient"
+    assert classify_error(NotFound("models/gemini-x is not found"), gemini) == "not_found"
+    assert classify_error(InvalidArgument("API key not valid"), gemini) == "fatal"
+    # Other errors are left to the generic rules
+    assert gemini.classify(ConnectionError("reset")) is None
+    assert classify_error(ConnectionError("reset"), gemini) == "transient"
+
+
+def test_gemini_errors_from_the_sdk():
+    exceptions = pytest.importorskip("google.api_core.exceptions")
+    gemini = GeminiProvider()
+    assert gemini.classify(exceptions.ResourceExhausted("Quota exceeded")) == "rate_limit"
+    assert gemini.classify(exceptions.ServiceUnavailable("The model is overloaded")) == "transient"
+    assert gemini.classify(exceptions.InternalServerError("Internal error")) == "transient"
+    assert gemini.classify(exceptions.InvalidArgument("API key not valid")) == "fatal"
+
+
+def test_overloaded_gemini_is_retried(monkeypatch):
+    html = EXAMPLES["confetti"].partition("Complete Code:")[2].strip()
+
+    class OverloadedGemini(GeminiProvider):
+        def __init__(self):
+            super().__init__()
+            self.errors = [ResourceExhausted("Quota exceeded"), ServiceUnavailable("The model is overloaded")]
+
+        async def complete_async(self, system, user, model):
+            if self.errors:
+                raise self.errors.pop(0)
+            return html
+
+    monkeypatch.setattr(groq_service, "provider", OverloadedGemini())
+    monkeypatch.setattr(groq_service, "retry_policy", RetryPolicy(max_attempts=3, base_delay=0.01))
+    monkeypatch.setattr(groq_service, "breakers", CircuitBreakers())
+    assert asyncio.run(groq_service.generate_animation_async("confetti falling")) == html
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
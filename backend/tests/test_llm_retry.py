@@ -0,0 +1,199 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import pytest
+from services.llm_providers import GroqProvider
+from fake_llm_server import FakeLLMServer
+from services import groq_service
+from services.llm_retry import RetryPolicy, CircuitBreaker, CircuitBreakers, CircuitOpen, InvalidGeneration, hedged
+
+DEFAULT_MODEL = groq_service.DEFAULT_MODEL
+FALLBACK_MODEL = groq_service.FALLBACK_MODEL
+
+
+@pytest.fixture
+def fake_groq(monkeypatch):
+    """Starts a FakeLLMServer with the given options and points the async client at it."""
+    servers = []
+
+    def start(**options):
+        server = FakeLLMServer(**options).__enter__()
+        servers.append(server)
+        monkeypatch.setattr(groq_service, "provider", GroqProvider(api_key="test-key", base_url=server.base_url))
+        return server
+
+    monkeypatch.setattr(groq_service, "retry_policy", RetryPolicy(max_attempts=3, base_delay=0.05, max_delay=0.2))
+    monkeypatch.setattr(groq_service, "breakers", CircuitBreakers(failure_threshold=2, reset_timeout=60))
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
+
+
+def test_backoff_grows_with_jitter_and_respects_retry_after():
+    policy = RetryPolicy(max_attempts=5, base_delay=1, max_delay=4, rng=lambda: 1.0)
+    transient = ConnectionError("connection reset")
+    assert [policy.backoff(attempt, transient) for attempt in range(5)] == [1, 2, 4, 4, None]
+    assert RetryPolicy(base_delay=1, rng=lambda: 0.25).backoff(1, transient) == 0.5
+    # Invalid output is regenerated right away, errors that won't go away are not retried
+    assert policy.backoff(0, InvalidGeneration("Missing <body> tag")) == 0
+    assert policy.backoff(0, ValueError("bad request")) is None
+
+
+def test_circuit_breaker_opens_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 11
+    assert breaker.allow()       # The single trial request
+    assert not breaker.allow()
+    breaker.record_failure()     # Trial failed: open again
+    assert breaker.state == "open"
+
+    now[0] = 22
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breakers.get("a").trip()
+    assert breakers.choose(["a", "b"]) == "b"
+    breakers.get("b").trip()
+    with pytest.raises(CircuitOpen):
+        breakers.choose(["a", "b"])
+
+
+def test_hedged_takes_the_first_success():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+            return "slow"
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def fast():
+        return "fast"
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def run():
+        assert await hedged(slow, fast, hedge_after=0.05) == ("fast", "hedge")
+        assert await hedged(fast, slow, hedge_after=0.05) == ("fast", "primary")
+        # A failed hedge doesn't fail the request while the primary can still answer
+        assert await hedged(lambda: asyncio.sleep(0.1, result="late"), failing, hedge_after=0.01) == ("late", "primary")
+        with pytest.raises(RuntimeError):
+            await hedged(failing, fast, hedge_after=0.05)
+
+    asyncio.run(run())
+    assert cancelled == ["slow"]
+
+
+def test_rate_limits_are_retried_with_backoff(fake_groq):
+    server = fake_groq(fail_with=(429, 429), retry_after=0.1)
+    started = time.perf_counter()
+    html = asyncio.run(groq_service.generate_animation_async("a bouncing ball"))
+    elapsed = time.perf_counter() - started
+
+    assert html.startswith("<!DOCTYPE html>")
+    assert len(server.requests) == 3
+    # Each retry waited at least the server's Retry-After
+    assert elapsed >= 0.2
+
+
+def test_fatal_errors_are_not_retried(fake_groq):
+    server = fake_groq(fail_with=(400,))
+    with pytest.raises(RuntimeError, match="after 1 attempt"):
+        asyncio.run(groq_service.generate_animation_async("a bouncing ball"))
+    assert len(server.requests) == 1
+
+
+def test_slow_model_is_hedged(fake_groq, monkeypatch):
+    monkeypatch.setattr(groq_service, "LLM_HEDGE_AFTER_SECONDS", 0.1)
+    server = fake_groq(model_latency={DEFAULT_MODEL: 1.5, FALLBACK_MODEL: 0.05})
+    started = time.perf_counter()
+    html = asyncio.run(groq_service.generate_animation_async("a bouncing ball"))
+    elapsed = time.perf_counter() - started
+
+    assert html.startswith("<!DOCTYPE html>")
+    assert [r["model"] for r in server.requests] == [DEFAULT_MODEL, FALLBACK_MODEL]
+    assert elapsed < 1.0, f"took {elapsed:.2f}s"
+
+
+def test_failing_model_trips_its_circuit(fake_groq):
+    server = fake_groq(model_status={DEFAULT_MODEL: 503})
+    # Two 503s open the default model's circuit; the third attempt goes to the fallback
+    assert asyncio.run(groq_service.generate_animation_async("a bouncing ball")).startswith("<!DOCTYPE html>")
+    assert [r["model"] for r in server.requests] == [DEFAULT_MODEL, DEFAULT_MODEL, FALLBACK_MODEL]
+
+    # While open, later generations skip the failing model entirely
+    server.requests.clear()
+    asyncio.run(groq_service.generate_animation_async("a spinning square"))
+    assert [r["model"] for r in server.requests] == [FALLBACK_MODEL]
+    assert groq_service.breakers.get(DEFAULT_MODEL).state == "open"
+
+
+def half_open(model: str):
+    """Opens `model`'s circuit with a reset timeout short enough to be half-open right away."""
+    groq_service.breakers = CircuitBreakers(failure_threshold=2, reset_timeout=0.01)
+    groq_service.breakers.get(model).trip()
+    time.sleep(0.02)
+    assert groq_service.breakers.get(model).state == "half_open"
+    return groq_service.breakers.get(model)
+
+
+def test_cancelled_hedge_gives_back_the_half_open_trial(fake_groq, monkeypatch):
+    monkeypatch.setattr(groq_service, "LLM_HEDGE_AFTER_SECONDS", 0.05)
+    server = fake_groq(model_latency={DEFAULT_MODEL: 0.3, FALLBACK_MODEL: 1.5})
+    breaker = half_open(FALLBACK_MODEL)
+
+    # The hedge on the fallback is the half-open trial; the primary wins and the hedge is cancelled
+    assert asyncio.run(groq_service.generate_animation_async("a bouncing ball")).startswith("<!DOCTYPE html>")
+    assert [r["model"] for r in server.requests] == [DEFAULT_MODEL, FALLBACK_MODEL]
+    assert breaker.state == "half_open" and breaker.allow()
+
+
+def test_cancelled_generation_gives_back_the_half_open_trial(fake_groq):
+    fake_groq(latency=1.5)
+    breaker = half_open(DEFAULT_MODEL)
+
+    async def run():
+        task = asyncio.ensure_future(groq_service.generate_animation_async("a bouncing ball"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert breaker.allow()
+
+
+def test_fatal_error_gives_back_the_half_open_trial(fake_groq):
+    fake_groq(fail_with=(400,))
+    breaker = half_open(DEFAULT_MODEL)
+    with pytest.raises(RuntimeError, match="after 1 attempt"):
+        asyncio.run(groq_service.generate_animation_async("a bouncing ball"))
+    # A bad request says nothing about the model: still half-open, and the next request is the trial
+    assert breaker.state == "half_open" and breaker.allow()
+
+
+def test_missing_model_falls_back_within_the_attempt(fake_groq):
+    server = fake_groq(model_status={DEFAULT_MODEL: 404})
+    assert asyncio.run(groq_service.generate_animation_async("a bouncing ball")).startswith("<!DOCTYPE html>")
+    assert [r["model"] for r in server.requests] == [DEFAULT_MODEL, FALLBACK_MODEL]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,90 @@
+import sys
+import os
+import asyncio
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import httpx
+import pytest
+from services.llm_providers import GroqProvider
+from fake_llm_server import FakeLLMServer
+from services import groq_service, metrics
+from services.metrics import MetricsRegistry
+from services.render_pool import record_stage_timings
+from main import app
+
+
+def test_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("status",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    depth = registry.gauge("depth", "Depth")
+    requests.inc(status="ok")
+    requests.inc(2, status='say "hi"\n')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3)
+    depth.set_function(lambda: 4)
+
+    text = registry.render()
+    assert "# TYPE requests_total counter\n" in text
+    assert 'requests_total{status="ok"} 1\n' in text
+    assert 'requests_total{status="say \\"hi\\"\\n"} 2\n' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_count 3\n" in text
+    assert "latency_seconds_sum 3.55\n" in text
+    assert "depth 4\n" in text
+
+    with pytest.raises(ValueError):
+        requests.inc(code="200")
+
+
+def test_llm_latency_and_validation_failures(monkeypatch):
+    metrics.registry.reset()
+    with FakeLLMServer(content="<html><body>too short</body></html>") as server:
+        monkeypatch.setattr(groq_service, "provider", GroqProvider(api_key="test-key", base_url=server.base_url))
+        with pytest.raises(RuntimeError):
+            asyncio.run(groq_service.generate_animation_async("a bouncing ball"))
+
+    model = groq_service.DEFAULT_MODEL
+    for attempt in range(1, groq_service.retry_policy.max_attempts + 1):
+        assert metrics.LLM_REQUEST_SECONDS.count(model=model, attempt=str(attempt), outcome="ok") == 1
+    assert metrics.LLM_VALIDATION_FAILURES.value(reason="Missing DOCTYPE declaration") == groq_service.retry_policy.max_attempts
+
+
+def test_metrics_endpoint_reports_render_stages():
+    metrics.registry.reset()
+    record_stage_timings("render", {
+        "browser_launch_seconds": 0.8,
+        "page_load_seconds": 0.12,
+        "frame_capture_seconds": [0.01, 0.02, 0.03],
+        "vendored_requests": 2,
+        "blocked_requests": 1,
+    })
+
+    async def scrape():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/metrics")
+
+    response = asyncio.run(scrape())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "render_browser_launch_seconds_count 1\n" in response.text
+    assert 'render_page_load_seconds_count{type="render"} 1\n' in response.text
+    assert 'render_frame_capture_seconds_count{type="render"} 3\n' in response.text
+    assert 'render_external_requests_total{type="render",result="vendored"} 2\n' in response.text
+    assert 'render_external_requests_total{type="render",result="blocked"} 1\n' in response.text
+    assert 'result="remote"' not in response.text
+    assert 'render_blocked_pages_total{type="render"} 1\n' in response.text
+    assert "render_pool_waiting_jobs 0\n" in response.text
+    assert "gif_jobs_queued 0\n" in response.text
+
+
+if __name__ == "__main__":
+    test_text_format()
+    print("Metrics tests passed (run with pytest for the LLM and endpoint tests).")
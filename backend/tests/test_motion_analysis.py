@@ -0,0 +1,146 @@
+import sys
+import os
+import math
+import asyncio
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+from services import gif_service
+from services.motion_analysis import analyze_motion, collect_probe, box_to_clip, PROBE_SECONDS
+
+PROBE_FPS = 30
+
+
+def probe(draw, seconds: float = PROBE_SECONDS) -> list[Image.Image]:
+    """Synthetic low-res probe frames: draw(canvas, t) paints the scene at time t seconds."""
+    frames = []
+    for i in range(round(seconds * PROBE_FPS)):
+        img = Image.new("RGB", (120, 80), (20, 20, 40))
+        draw(ImageDraw.Draw(img), i / PROBE_FPS)
+        frames.append(img)
+    return frames
+
+
+def orbit(period: float, radius: int = 5):
+    def draw(canvas, t):
+        angle = 2 * math.pi * t / period
+        x, y = 60 + 25 * math.cos(angle), 40 + 25 * math.sin(angle)
+        canvas.ellipse((x - radius, y - radius, x + radius, y + radius), fill=(255, 80, 80))
+    return draw
+
+
+def test_loop_is_rendered_once_at_a_low_fps():
+    timing = analyze_motion(probe(orbit(1.0)), PROBE_FPS)
+    assert timing["loop_seconds"] == 1.0
+    assert timing["duration"] == 1.0
+    assert timing["fps"] < 30
+
+
+def test_fast_motion_keeps_the_full_frame_rate():
+    timing = analyze_motion(probe(orbit(0.4)), PROBE_FPS)
+    assert timing["loop_seconds"] == 0.4
+    assert timing["fps"] == 30
+
+
+def test_pulse_with_rounding_noise_still_loops():
+    def pulse(canvas, t):
+        r = 10 + 8 * math.sin(2 * math.pi * t / 2)
+        canvas.ellipse((60 - r, 40 - r, 60 + r, 40 + r), fill=(255, 80, 80))
+
+    timing = analyze_motion(probe(pulse), PROBE_FPS)
+    assert timing["loop_seconds"] == 2.0
+    assert round(timing["duration"] * timing["fps"]) == timing["duration"] * timing["fps"]
+
+
+def test_non_looping_and_static_pages():
+    def drift(canvas, t):
+        x = t * 9
+        canvas.rectangle((x, 30, x + 20, 50), fill=(200, 200, 255))
+
+    timing = analyze_motion(probe(drift), PROBE_FPS)
+    assert timing["loop_seconds"] is None and timing["duration"] == 3.0
+
+    static = analyze_motion(probe(lambda canvas, t: canvas.rectangle((10, 10, 30, 30), fill=(255, 255, 255))), PROBE_FPS)
+    assert static["static"] and round(static["duration"] * static["fps"]) == 1
+    assert static["motion_box"] is None
+
+
+def test_probe_stops_once_a_loop_is_confirmed():
+    def drift(canvas, t):
+        canvas.rectangle((t * 9, 30, t * 9 + 20, 50), fill=(200, 200, 255))
+
+    captured = []
+
+    def capture(draw):
+        for frame in probe(draw):
+            captured.append(frame)
+            yield frame
+
+    frames = collect_probe(capture(orbit(1.0)), PROBE_FPS)
+    assert len(frames) == len(captured) == 90  # Three repetitions instead of the whole 8s
+    assert analyze_motion(frames, PROBE_FPS)["loop_seconds"] == 1.0
+
+    assert len(collect_probe(iter(probe(drift)), PROBE_FPS)) == round(PROBE_SECONDS * PROBE_FPS)
+
+
+def test_slow_loop_is_detected():
+    timing = analyze_motion(collect_probe(iter(probe(orbit(6.0))), PROBE_FPS), PROBE_FPS)
+    assert timing["loop_seconds"] == 6.0 and timing["duration"] == 6.0
+
+
+def test_motion_box_covers_only_the_moving_area():
+    def scene(canvas, t):
+        canvas.rectangle((2, 2, 20, 8), fill=(255, 255, 255))  # Static title, not cropped in
+        orbit(1.0)(canvas, t)
+
+    left, top, right, bottom = analyze_motion(probe(scene), PROBE_FPS)["motion_box"]
+    # Orbit of radius 25 around (60, 40) with a ball of radius 5
+    assert 28 <= left <= 32 and 8 <= top <= 12
+    assert 88 <= right <= 92 and 68 <= bottom <= 72
+
+    # Back to CSS pixels of a 600x400 page probed at 0.2, padded and kept inside the viewport
+    assert box_to_clip((30, 10, 90, 70), 0.2, 600, 400, margin=10) == {"x": 140, "y": 40, "width": 320, "height": 320}
+    assert box_to_clip((0, 0, 120, 80), 0.2, 600, 400, margin=10) == {"x": 0, "y": 0, "width": 600, "height": 400}
+
+
+def test_auto_crop_captures_the_probed_motion_area(monkeypatch):
+    jobs = []
+
+    class FakePool:
+        size = 1
+
+        async def probe(self, job):
+            return {"duration": 1.0, "fps": 15, "loop_seconds": 1.0, "motion_clip": {"x": 140, "y": 40, "width": 320, "height": 320}}
+
+        async def render(self, job, on_progress=None):
+            jobs.append(job)
+            return {}
+
+    monkeypatch.setattr(gif_service, "render_pool", FakePool())
+    path = asyncio.run(gif_service.generate_gif_from_html("<html>", auto_crop=True, scale=0.5))
+    os.remove(path)
+    # One probe serves both the crop and the timing
+    assert jobs[0]["clip"] == {"x": 140, "y": 40, "width": 320, "height": 320}
+    assert (jobs[0]["duration"], jobs[0]["fps"], jobs[0]["scale"]) == (1.0, 15, 0.5)
+
+
+def test_resolve_timing_falls_back_when_the_probe_fails(monkeypatch):
+    class BrokenPool:
+        async def probe(self, job):
+            raise RuntimeError("no browser")
+
+    monkeypatch.setattr(gif_service, "render_pool", BrokenPool())
+    assert asyncio.run(gif_service.resolve_timing("<html>", 600, 400, None, None)) == (3, 30)
+    assert asyncio.run(gif_service.resolve_timing("<html>", 600, 400, None, 12)) == (3, 12)
+    assert asyncio.run(gif_service.resolve_timing("<html>", 600, 400, 2.5, 24)) == (2.5, 24)
+
+
+if __name__ == "__main__":
+    test_loop_is_rendered_once_at_a_low_fps()
+    test_fast_motion_keeps_the_full_frame_rate()
+    test_pulse_with_rounding_noise_still_loops()
+    test_non_looping_and_static_pages()
+    test_motion_box_covers_only_the_moving_area()
+    print("Motion analysis tests passed (run with pytest for the fallback test).")
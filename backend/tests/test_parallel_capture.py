@@ -0,0 +1,107 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PIL import Image, ImageDraw
+from services import gif_service
+from services.gif_encoder import StreamingGifEncoder
+from services.render_pool import RenderPool
+from services.animation_examples import EXAMPLES
+
+WIDTH, HEIGHT = 64, 48
+
+# Capture-only render worker: frame i is a square at x = 2 * i, written as raw RGB
+FAKE_CAPTURE_WORKER = """
+import sys, json, os
+from PIL import Image, ImageDraw
+print(json.dumps({"type": "ready"}), flush=True)
+for line in sys.stdin:
+    job = json.loads(line)
+    if job["type"] == "shutdown":
+        break
+    with open(job["output"], "wb") as f:
+        for i in range(job["start_frame"], job["end_frame"]):
+            img = Image.new("RGB", (job["width"], job["height"]), (20, 20, 40))
+            ImageDraw.Draw(img).rectangle([2 * i, 10, 2 * i + 12, 22], fill=(230, 60, 90))
+            f.write(img.tobytes())
+    stats = {"frames": job["end_frame"] - job["start_frame"], "width": job["width"], "height": job["height"], "pid": os.getpid()}
+    print(json.dumps({"id": job["id"], "type": "result", "stats": stats}), flush=True)
+"""
+
+
+def make_frame(i: int) -> Image.Image:
+    img = Image.new("RGB", (WIDTH, HEIGHT), (20, 20, 40))
+    ImageDraw.Draw(img).rectangle([2 * i, 10, 2 * i + 12, 22], fill=(230, 60, 90))
+    return img
+
+
+def test_split_frames_covers_the_timeline():
+    assert gif_service.split_frames(90, 4) == [(0, 22), (22, 45), (45, 68), (68, 90)]
+    assert gif_service.split_frames(3, 8) == [(0, 1), (1, 2), (2, 3)]
+    assert gif_service.split_frames(10, 1) == [(0, 10)]
+
+
+def test_sliced_render_matches_sequential_encoding(monkeypatch):
+    fd, worker_path = tempfile.mkstemp(suffix=".py")
+    with os.fdopen(fd, "w") as f:
+        f.write(FAKE_CAPTURE_WORKER)
+    pool = RenderPool(size=3, health_check_interval=0, worker_command=[sys.executable, worker_path])
+    monkeypatch.setattr(gif_service, "render_pool", pool)
+
+    async def run():
+        try:
+            path = await gif_service.generate_gif_from_html("<html></html>", WIDTH, HEIGHT, duration=1, fps=20, slices=3)
+        finally:
+            await pool.shutdown()
+        return path
+
+    sliced_path = asyncio.run(run())
+    sequential_path = tempfile.mktemp(suffix=".gif")
+    with StreamingGifEncoder(sequential_path, 50.0, loop=0) as encoder:
+        for i in range(20):
+            encoder.add_frame(make_frame(i))
+
+    with open(sliced_path, "rb") as a, open(sequential_path, "rb") as b:
+        assert a.read() == b.read()
+    os.remove(sliced_path)
+    os.remove(sequential_path)
+
+
+def example_html(name: str) -> str:
+    return EXAMPLES[name].split("Complete Code:", 1)[1].strip()
+
+
+@pytest.mark.parametrize("name", ["bouncing", "rotating", "particles", "wave", "pulse", "gradient"])
+def test_parallel_capture_is_pixel_identical(name):
+    from playwright.sync_api import sync_playwright
+    from scripts.generate_gif_standalone import render_frames
+
+    html = example_html(name)
+    out = tempfile.mkdtemp()
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.launch()
+        except Exception as e:
+            pytest.skip(f"Chromium not available: {e}")
+        context = browser.new_context()
+        sequential = os.path.join(out, "all.rgb")
+        render_frames(context, html, sequential, 200, 150, fps=15, start_frame=0, end_frame=30)
+        slices = []
+        for start, end in gif_service.split_frames(30, 3):
+            slices.append(os.path.join(out, f"{start}.rgb"))
+            render_frames(context, html, slices[-1], 200, 150, fps=15, start_frame=start, end_frame=end)
+        browser.close()
+
+    with open(sequential, "rb") as f:
+        expected = f.read()
+    actual = b"".join(open(path, "rb").read() for path in slices)
+    assert actual == expected
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
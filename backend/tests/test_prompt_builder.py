@@ -0,0 +1,74 @@
+import sys
+import os
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import metrics
+from services.animation_examples import EXAMPLES
+from services.prompt_builder import build_prompt, compact_example, count_tokens, minify_code
+
+SYSTEM_PROMPT = "You write single-file HTML animations. " * 20
+PROMPT = "a glowing ball bouncing"
+
+
+def test_examples_are_compacted_to_fit_the_budget():
+    full = build_prompt(PROMPT, SYSTEM_PROMPT, budget=100_000)
+    assert full.example_mode == "full" and full.examples == ["bouncing", "neon"]
+    assert EXAMPLES["bouncing"] in full.user
+    assert full.input_tokens == count_tokens(SYSTEM_PROMPT) + count_tokens(full.user)
+
+    previous = full.input_tokens
+    for mode in ("minified", "skeleton"):
+        built = build_prompt(PROMPT, SYSTEM_PROMPT, budget=previous - 1)
+        assert built.example_mode == mode and built.examples == ["bouncing", "neon"]
+        assert not built.over_budget
+        previous = built.input_tokens
+
+    # Below what two skeletons need, the least relevant example goes first
+    one = build_prompt(PROMPT, SYSTEM_PROMPT, budget=previous - 1)
+    assert one.examples == ["bouncing"] and one.example_mode == "skeleton"
+
+    none = build_prompt(PROMPT, SYSTEM_PROMPT, budget=10)
+    assert none.examples == [] and none.example_mode == "none" and none.over_budget
+    assert f'"{PROMPT}"' in none.user
+
+
+def test_minified_and_skeleton_examples():
+    code = """<style>
+        body {
+            margin: 0; /* reset */
+        }
+    </style>
+    <!-- stage -->
+    <script src="https://cdnjs.cloudflare.com/ajax/libs/gsap/3.12.2/gsap.min.js"></script>
+    <script>
+        // Move the box
+        const x = 1  // no semicolon
+        gsap.to('.box', { x: 100 });
+    </script>"""
+    assert minify_code(code) == (
+        "<style>body{margin:0;}</style>\n"
+        '<script src="https://cdnjs.cloudflare.com/ajax/libs/gsap/3.12.2/gsap.min.js"></script>\n'
+        "<script>\nconst x = 1\ngsap.to('.box', { x: 100 });\n</script>"
+    )
+
+    skeleton = compact_example("gsap_timeline", "skeleton")
+    assert "GSAP Timeline Animation" in skeleton and "Multiple elements animating in sequence" in skeleton
+    assert "Approach: gsap (CDN), GSAP timeline" in skeleton
+    assert count_tokens(skeleton) < count_tokens(compact_example("gsap_timeline", "minified")) < count_tokens(EXAMPLES["gsap_timeline"])
+
+
+def test_input_tokens_are_reported():
+    metrics.registry.reset()
+    build_prompt(PROMPT, SYSTEM_PROMPT, budget=100_000)
+    build_prompt(PROMPT, SYSTEM_PROMPT, budget=10)
+    assert metrics.LLM_INPUT_TOKENS.count(examples="full") == 1
+    assert metrics.LLM_INPUT_TOKENS.count(examples="none") == 1
+
+
+if __name__ == "__main__":
+    test_examples_are_compacted_to_fit_the_budget()
+    test_minified_and_skeleton_examples()
+    test_input_tokens_are_reported()
+    print("Prompt builder tests passed.")
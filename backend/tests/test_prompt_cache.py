@@ -0,0 +1,99 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import subprocess
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import httpx
+from services.prompt_cache import PromptCache, normalize_prompt
+from routes import generate as generate_routes
+from limiter import limiter
+from main import app
+
+
+def temp_cache(**kwargs) -> PromptCache:
+    return PromptCache(os.path.join(tempfile.mkdtemp(), "cache.sqlite3"), **kwargs)
+
+
+def test_normalization_ignores_case_punctuation_and_filler():
+    assert normalize_prompt("A red ball bouncing.") == "red ball bouncing"
+    assert normalize_prompt("  a RED ball,   bouncing!! ") == "red ball bouncing"
+    assert normalize_prompt("Please make a red ball bouncing") == "red ball bouncing"
+    assert normalize_prompt("a ball without shadow") != normalize_prompt("a ball with shadow")
+    assert normalize_prompt("The") == "the"
+
+
+def test_entries_are_scoped_by_model_and_template_version():
+    cache = temp_cache()
+    cache.put("A red ball bouncing.", "model-a", "1", "<html>a</html>")
+    assert cache.get("a red ball bouncing", "model-a", "1") == "<html>a</html>"
+    assert cache.get("a red ball bouncing", "model-b", "1") is None
+    assert cache.get("a red ball bouncing", "model-a", "2") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_lru_and_ttl_eviction():
+    cache = temp_cache(max_entries=2, ttl_seconds=60)
+    cache.put("one", "m", "1", "1")
+    time.sleep(0.01)
+    cache.put("two", "m", "1", "2")
+    time.sleep(0.01)
+    assert cache.get("one", "m", "1") == "1"  # "two" becomes least recently used
+    cache.put("three", "m", "1", "3")
+    assert cache.get("two", "m", "1") is None
+    assert cache.get("one", "m", "1") == "1"
+
+    cache.ttl_seconds = 0
+    assert cache.get("three", "m", "1") is None
+
+
+def test_database_is_created_on_first_use():
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    cache = PromptCache(path)
+    assert not os.path.exists(path)
+    assert cache.get("a red ball", "m", "1") is None
+    assert os.path.exists(path)
+
+    # Example retrieval normalizes prompts too, without pulling in the cache
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, services.animation_examples; print('services.prompt_cache' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=backend, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_route_serves_repeats_from_cache_unless_fresh(monkeypatch):
+    calls = []
+
+    async def fake_generate(prompt):
+        calls.append(prompt)
+        return f"<!DOCTYPE html><html><body>{len(calls)}</body></html>"
+
+    monkeypatch.setattr(generate_routes, "prompt_cache", temp_cache())
+    monkeypatch.setattr(generate_routes, "generate_animation_async", fake_generate)
+    limiter.reset()  # other test modules share the per-IP rate limit
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.post("/generate-animation", json={"prompt": "A red ball bouncing."})
+            repeat = await client.post("/generate-animation", json={"prompt": "a red ball bouncing"})
+            fresh = await client.post("/generate-animation", json={"prompt": "a red ball bouncing", "fresh": True})
+            return first.json(), repeat.json(), fresh.json()
+
+    first, repeat, fresh = asyncio.run(run())
+    assert len(calls) == 2
+    assert repeat == first
+    assert fresh != first
+
+
+if __name__ == "__main__":
+    test_normalization_ignores_case_punctuation_and_filler()
+    test_entries_are_scoped_by_model_and_template_version()
+    test_lru_and_ttl_eviction()
+    test_database_is_created_on_first_use()
+    print("Prompt cache tests passed (run with pytest for the route test).")
@@ -0,0 +1,160 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import gif_service
+from services.render_cache import RenderCache, render_cache_key
+from services.single_flight import SingleFlight
+
+
+def write_temp(size: int) -> str:
+    fd, path = tempfile.mkstemp(suffix=".gif")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"G" * size)
+    return path
+
+
+def test_key_covers_options():
+    assert render_cache_key("<html>", fps=30) == render_cache_key("<html>", fps=30)
+    assert render_cache_key("<html>", fps=30) != render_cache_key("<html>", fps=15)
+    assert render_cache_key("<html>", fps=30) != render_cache_key("<html> ", fps=30)
+
+
+def test_lru_eviction_and_ttl():
+    cache = RenderCache(tempfile.mkdtemp(), max_bytes=250, ttl_seconds=60)
+    cache.put("a", write_temp(100))
+    cache.put("b", write_temp(100))
+    assert cache.get("a")  # "b" is now least recently used
+    cache.put("c", write_temp(100))
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["bytes"] == 200
+
+    # Age "a" past the TTL
+    path = cache.get("a")
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert cache.get("a") is None
+    assert not os.path.exists(path)
+
+    # A fresh instance rebuilds its index from disk
+    assert RenderCache(cache.directory, max_bytes=250, ttl_seconds=60).get("c")
+
+
+def test_entries_keep_their_format_extension(monkeypatch):
+    async def fake_render(html, width, height, duration, fps, palette_mode, on_progress=None, output_format="gif", **capture):
+        fd, path = tempfile.mkstemp(suffix=".tmp")
+        os.close(fd)
+        return path
+
+    cache = RenderCache(tempfile.mkdtemp(), max_bytes=10_000)
+    monkeypatch.setattr(gif_service, "render_cache", cache)
+    monkeypatch.setattr(gif_service, "generate_gif_from_html", fake_render)
+
+    async def run():
+        return [await gif_service.get_or_generate_gif("<html></html>", output_format=output_format)
+                for output_format in ("webp", "mp4", "webp")]
+
+    (webp, _), (mp4, _), (hit, status) = asyncio.run(run())
+    assert webp.endswith(".webp") and mp4.endswith(".mp4")
+    assert status == "HIT" and hit.endswith(".webp")
+    assert sorted(os.path.splitext(name)[1] for name in os.listdir(cache.directory)) == [".mp4", ".webp"]
+    # A fresh instance finds both entries under their own extensions
+    reloaded = RenderCache(cache.directory, max_bytes=10_000)
+    assert reloaded.stats()["entries"] == 2
+    for path in (webp, mp4, hit):
+        os.remove(path)
+
+
+def test_concurrent_identical_requests_render_once(monkeypatch):
+    renders = []
+
+    async def fake_render(html, width, height, duration, fps, palette_mode, on_progress=None, output_format="gif", **capture):
+        renders.append(html)
+        await asyncio.sleep(0.05)
+        return write_temp(10)
+
+    monkeypatch.setattr(gif_service, "render_cache", RenderCache(tempfile.mkdtemp(), max_bytes=10_000))
+    monkeypatch.setattr(gif_service, "generate_gif_from_html", fake_render)
+
+    async def run():
+        results = await asyncio.gather(*(gif_service.get_or_generate_gif("<html>same</html>") for _ in range(5)))
+        again = await gif_service.get_or_generate_gif("<html>same</html>")
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert len(renders) == 1
+    assert {status for _, status in results} == {"MISS"}
+    assert again[1] == "HIT"
+    # Every caller gets its own pinned file with the one render's content
+    paths = [path for path, _ in results] + [again[0]]
+    assert len(set(paths)) == 6
+    for path in paths:
+        with open(path, "rb") as f:
+            assert f.read() == b"G" * 10
+        os.remove(path)
+
+
+def test_pinned_render_survives_eviction(monkeypatch):
+    async def fake_render(html, width, height, duration, fps, palette_mode, on_progress=None, output_format="gif", **capture):
+        return write_temp(100)
+
+    cache = RenderCache(tempfile.mkdtemp(), max_bytes=150)
+    monkeypatch.setattr(gif_service, "render_cache", cache)
+    monkeypatch.setattr(gif_service, "generate_gif_from_html", fake_render)
+
+    async def run():
+        await gif_service.get_or_generate_gif("<html>a</html>")
+        hit, status = await gif_service.get_or_generate_gif("<html>a</html>")
+        # Another render evicts "a" while its file is still being served
+        await gif_service.get_or_generate_gif("<html>b</html>")
+        return hit, status
+
+    hit, status = asyncio.run(run())
+    assert status == "HIT" and cache.stats()["entries"] == 1
+    with open(hit, "rb") as f:
+        assert f.read() == b"G" * 100
+
+
+def test_cancelled_caller_does_not_fail_the_others():
+    runs, cancelled = [], []
+
+    async def work():
+        runs.append(1)
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return "done"
+
+    async def run():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()  # The caller that started the work goes away
+        assert await second == "done"
+        assert first.cancelled()
+
+        # Once every caller is gone, the work is cancelled too
+        lone = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        await asyncio.sleep(0.01)
+        assert not flight.in_flight("k")
+
+    asyncio.run(run())
+    assert len(runs) == 2 and len(cancelled) == 1
+
+
+if __name__ == "__main__":
+    test_key_covers_options()
+    test_lru_eviction_and_ttl()
+    print("Render cache tests passed (run with pytest for the coalescing test).")
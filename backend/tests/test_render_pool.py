@@ -0,0 +1,112 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.render_pool import RenderPool
+
+# Speaks the render_worker.py protocol without launching a browser.
+# A job whose html is "crash" kills the process to simulate a Chromium/worker crash,
+# one whose html is "slow" takes half a second.
+FAKE_WORKER = """
+import sys, json, os, time
+print(json.dumps({"type": "ready"}), flush=True)
+renders = 0
+for line in sys.stdin:
+    job = json.loads(line)
+    if job["type"] == "shutdown":
+        break
+    if job["type"] == "ping":
+        print(json.dumps({"id": job["id"], "type": "pong", "renders": renders}), flush=True)
+        continue
+    if job["html"] == "crash":
+        os._exit(3)
+    if job["html"] == "slow":
+        time.sleep(0.5)
+    print(json.dumps({"id": job["id"], "type": "progress", "frames": 5}), flush=True)
+    renders += 1
+    print(json.dumps({"id": job["id"], "type": "result", "stats": {"pid": os.getpid(), "renders": renders}}), flush=True)
+"""
+
+
+def make_pool(size=1):
+    fd, path = tempfile.mkstemp(suffix=".py")
+    with os.fdopen(fd, 'w') as f:
+        f.write(FAKE_WORKER)
+    return RenderPool(size=size, health_check_interval=0, worker_command=[sys.executable, path])
+
+
+def test_render_reuses_worker():
+    async def run():
+        pool = make_pool()
+        try:
+            first = await pool.render({"html": "<html></html>"})
+            second = await pool.render({"html": "<html></html>"})
+            assert first["pid"] == second["pid"]
+            assert second["renders"] == 2
+        finally:
+            await pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_progress_is_forwarded():
+    async def run():
+        pool = make_pool()
+        progress = []
+        try:
+            stats = await pool.render({"html": "<html></html>"}, on_progress=progress.append)
+            assert stats["renders"] == 1
+            assert progress == [5]
+        finally:
+            await pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_crashed_worker_is_restarted():
+    async def run():
+        pool = make_pool()
+        try:
+            before = await pool.render({"html": "<html></html>"})
+            try:
+                await pool.render({"html": "crash"})
+                assert False, "crash should surface as an error"
+            except RuntimeError as e:
+                assert "crashed" in str(e)
+            after = await pool.render({"html": "<html></html>"})
+            assert after["pid"] != before["pid"]
+        finally:
+            await pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_cancelled_render_keeps_the_worker_until_it_finishes():
+    async def run():
+        pool = make_pool()
+        try:
+            slow = asyncio.ensure_future(pool.render({"html": "slow"}))
+            await asyncio.sleep(0.1)
+            slow.cancel()
+            await asyncio.sleep(0.1)
+            # The worker is still rendering the abandoned job, so no other job may take it yet
+            assert pool._idle.qsize() == 0 and pool.busy == 1
+            stats = await asyncio.wait_for(pool.render({"html": "<html></html>"}), timeout=5)
+            assert stats["renders"] == 2
+            assert pool._idle.qsize() == 1 and pool.busy == 0
+        finally:
+            await pool.shutdown()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_render_reuses_worker()
+    test_progress_is_forwarded()
+    test_crashed_worker_is_restarted()
+    test_cancelled_render_keeps_the_worker_until_it_finishes()
+    print("Render pool tests passed.")
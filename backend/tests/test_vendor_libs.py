@@ -0,0 +1,88 @@
+import sys
+import os
+import re
+import tempfile
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+from services.groq_service import SYSTEM_PROMPT
+from services.vendor_libs import LibraryStore, normalize_library_url, VENDORED_LIBRARIES
+
+LIBRARIES = {
+    "https://cdn.example.com/anim.min.js": "anim.min.js",
+    "https://cdn.example.com/not-fetched.js": "not-fetched.js",
+}
+
+
+class FakeRequest:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeRoute:
+    """Records what the handler did with the request, like playwright's Route."""
+
+    def __init__(self, url):
+        self.request = FakeRequest(url)
+        self.action = None
+        self.body = None
+
+    def fulfill(self, status, body, content_type, headers):
+        self.action, self.body = "fulfill", body
+
+    def continue_(self):
+        self.action = "continue"
+
+    def abort(self, error_code):
+        self.action = error_code
+
+
+def make_store(block_external=True) -> LibraryStore:
+    directory = tempfile.mkdtemp()
+    with open(os.path.join(directory, "anim.min.js"), "wb") as f:
+        f.write(b"window.anim = {};")
+    return LibraryStore(directory, LIBRARIES, block_external=block_external)
+
+
+def route(store, url) -> FakeRoute:
+    r = FakeRoute(url)
+    store.handle(r)
+    return r
+
+
+def test_url_normalization():
+    assert normalize_library_url("http://CDN.example.com/anim.min.js") == "https://cdn.example.com/anim.min.js"
+    assert normalize_library_url("https://cdn.tailwindcss.com/") == "https://cdn.tailwindcss.com"
+    assert normalize_library_url("https://cdn.tailwindcss.com?plugins=forms,typography") == "https://cdn.tailwindcss.com"
+
+
+def test_prompted_libraries_are_vendored():
+    # External requests are blocked by default, so a library the model is told to use must be vendored
+    prompted = re.findall(r'<script src="([^"]+)"', SYSTEM_PROMPT)
+    assert len(prompted) >= 5
+    vendored = {normalize_library_url(url) for url in VENDORED_LIBRARIES}
+    assert [url for url in prompted if normalize_library_url(url) not in vendored] == []
+
+
+def test_vendored_served_unknown_blocked():
+    store = make_store()
+
+    served = route(store, "http://cdn.example.com/anim.min.js")
+    assert served.action == "fulfill" and served.body == b"window.anim = {};"
+    assert route(store, "https://cdn.example.com/anim.min.js?v=2").action == "fulfill"
+    assert route(store, "https://cdn.example.com/not-fetched.js").action == "continue"
+    assert route(store, "https://fonts.example.com/font.woff2").action == "blockedbyclient"
+    assert route(store, "data:image/png;base64,AAAA").action == "continue"
+    assert store.counters() == {"served": 2, "fetched_remote": 1, "blocked": 1}
+
+    # With blocking off, unknown URLs go to the network
+    assert route(make_store(block_external=False), "https://fonts.example.com/font.woff2").action == "continue"
+
+
+if __name__ == "__main__":
+    test_url_normalization()
+    test_prompted_libraries_are_vendored()
+    test_vendored_served_unknown_blocked()
+    print("Vendor library tests passed.")
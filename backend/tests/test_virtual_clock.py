@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from scripts.generate_gif_standalone import TIME_HIJACK_SCRIPT
+
+CLOCK_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+<style>
+    #spin { width: 40px; height: 40px; background: red; animation: spin 1s linear infinite; }
+    @keyframes spin { from { transform: rotate(0deg); } to { transform: rotate(360deg); } }
+</style>
+</head>
+<body>
+<div id="spin"></div>
+<script>
+    window.log = [];
+    setTimeout(() => log.push(["timeout", performance.now()]), 50);
+    const id = setInterval(() => { log.push(["interval", performance.now()]); if (log.length > 3) clearInterval(id); }, 30);
+    requestAnimationFrame((t) => log.push(["raf", t]));
+</script>
+</body>
+</html>
+"""
+
+
+@pytest.fixture(scope="module")
+def page():
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.launch()
+        except Exception as e:
+            pytest.skip(f"Chromium not available: {e}")
+        page = browser.new_page()
+        page.add_init_script(TIME_HIJACK_SCRIPT)
+        page.set_content(CLOCK_HTML, wait_until="load")
+        page.evaluate("() => window.__virtualClockReady()")
+        yield page
+        browser.close()
+
+
+def test_timers_and_animations_follow_virtual_time(page):
+    spin = "document.getAnimations()[0]"
+    assert page.evaluate(f"{spin}.currentTime") == 0
+
+    for _ in range(4):
+        page.evaluate("ms => window.advanceTime(ms)", 25)
+
+    # The page clears the interval once the log has four entries, at 60ms
+    assert page.evaluate("window.log") == [
+        ["raf", 0], ["interval", 30], ["timeout", 50], ["interval", 60],
+    ]
+    assert page.evaluate("performance.now()") == 100
+    assert page.evaluate(f"{spin}.currentTime") == 100
+
+    # Wall-clock time passing between ticks changes nothing
+    page.wait_for_timeout(200)
+    assert page.evaluate(f"{spin}.currentTime") == 100
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
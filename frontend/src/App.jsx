@@ -1,10 +1,11 @@
 import { useState } from 'react';
 import InputPanel from './components/InputPanel';
 import OutputPanel from './components/OutputPanel';
-import { generateAnimation } from './services/apiService';
+import { generateAnimationStream } from './services/apiService';
 
 export default function App() {
   const [generatedHtml, setGeneratedHtml] = useState('');
+  const [streamingHtml, setStreamingHtml] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState('');
   const [activeTab, setActiveTab] = useState('code');
@@ -13,14 +14,19 @@ export default function App() {
     setIsLoading(true);
     setError('');
     setGeneratedHtml('');
+    setStreamingHtml('');
 
     try {
-      const html = await generateAnimation(prompt);
+      const html = await generateAnimationStream(prompt, {
+        onToken: (text) => setStreamingHtml((current) => current + text),
+        onRetry: () => setStreamingHtml(''),
+      });
       setGeneratedHtml(html);
       setActiveTab('preview'); // Auto-switch to preview on success
     } catch (err) {
       setError(err.message || 'Failed to generate animation. Please try again.');
     } finally {
+      setStreamingHtml('');
       setIsLoading(false);
     }
   };
@@ -39,6 +45,7 @@ export default function App() {
         <InputPanel onGenerate={handleGenerate} isLoading={isLoading} />
         <OutputPanel
           generatedHtml={generatedHtml}
+          streamingHtml={streamingHtml}
           activeTab={activeTab}
           onTabChange={setActiveTab}
           isLoading={isLoading}
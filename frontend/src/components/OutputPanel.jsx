@@ -2,12 +2,14 @@ import ToggleTabs from './ToggleTabs';
 import CodeViewer from './CodeViewer';
 import PreviewFrame from './PreviewFrame';
 
-export default function OutputPanel({ generatedHtml, activeTab, onTabChange, isLoading }) {
+export default function OutputPanel({ generatedHtml, streamingHtml, activeTab, onTabChange, isLoading }) {
   return (
     <div className="output-panel">
       <ToggleTabs activeTab={activeTab} onTabChange={onTabChange} />
 
-      {isLoading ? (
+      {isLoading && streamingHtml ? (
+        <CodeViewer code={streamingHtml} />
+      ) : isLoading ? (
         <div className="loading-skeleton">
           <div className="skeleton-line" />
           <div className="skeleton-line" />
@@ -18,6 +18,66 @@ export async function generateAnimation(prompt) {
   return data.generated_html;
 }
 
+/**
+ * Generate an animation, streaming progress and HTML as it is produced.
+ * @param {string} prompt - The animation description
+ * @param {object} handlers - Optional callbacks:
+ *   onProgress(message), onToken(text) for each chunk of raw model output,
+ *   onRetry(reason) when an attempt failed and the streamed text so far should be discarded
+ * @returns {Promise<string>} - The final validated HTML
+ */
+export async function generateAnimationStream(prompt, { onProgress, onToken, onRetry } = {}) {
+  const response = await fetch(`${API_BASE_URL}/generate-animation/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+    },
+    body: JSON.stringify({ prompt }),
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.detail || `Server error (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Server-sent events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === 'token') onToken?.(payload.text);
+      else if (event === 'progress') onProgress?.(payload.message);
+      else if (event === 'retry') onRetry?.(payload.message);
+      else if (event === 'error') throw new Error(payload.detail || 'Generation failed');
+      else if (event === 'done') {
+        reader.cancel();
+        return payload.generated_html;
+      }
+    }
+  }
+
+  throw new Error('Stream ended before the animation was complete');
+}
+
 /**
  * Generate a GIF from HTML content via backend.
  * @param {string} html - The HTML content to render